@@ -1,18 +1,21 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
 import os
 from dotenv import load_dotenv
 
+from utils import configure_logging
 from .endpoints import router
 from .models import ErrorResponse
 
 # Load environment variables
 load_dotenv()
+configure_logging()
 
 # Create FastAPI app
 app = FastAPI(
     title="AI Dashboard API",
+    default_response_class=ORJSONResponse,
     description="API for AI-powered dashboard generation with natural language prompts",
     version="1.0.0",
     docs_url="/docs",
@@ -49,25 +52,25 @@ async def root():
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             error=f"HTTP {exc.status_code}",
             message=exc.detail,
             details=None
-        ).dict()
+        ).model_dump()
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """General exception handler for unexpected errors"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Internal Server Error",
             message="An unexpected error occurred",
             details=str(exc) if os.getenv("DEBUG", "false").lower() == "true" else None
-        ).dict()
+        ).model_dump()
     )
 
 @app.on_event("startup")
@@ -100,6 +103,7 @@ async def shutdown_event():
     print("🛑 AI Dashboard API shutting down...")
 
 if __name__ == "__main__":
+    import sys
     import uvicorn
     
     # Run the server
@@ -108,5 +112,8 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # libuv event loop + C HTTP parser (uvloop is not available on Windows)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level="info"
     )
\ No newline at end of file
@@ -1,9 +1,10 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from typing import Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+import msgpack
+import orjson
 import uuid
-import asyncio
 from datetime import datetime
-import traceback
 
 from .models import (
     ChartGenerationRequest, ChartGenerationResponse, AsyncJobResponse, 
@@ -11,35 +12,75 @@ from .models import (
     ErrorResponse, JobStatus
 )
 
-from prompt_enhancement import PromptEnhancer
-from query_generation import QueryExecutor, DataProcessor
-from chart_generation import ComponentGenerator
-from database import DatabaseManager
+from database import DatabaseManager, get_shared_db_manager
+from workers import JobQueue
 
 # Router instance
 router = APIRouter()
 
-# In-memory job storage (in production, use Redis or database)
-jobs_storage: Dict[str, Dict[str, Any]] = {}
+# Redis-backed job storage shared by all API processes and chart workers
+# (jobs are processed by `python -m workers.chart`)
+queue = JobQueue()
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def model_response(model: BaseModel) -> Response:
+    """
+    Render a server-built response model directly
+    
+    Returning a Response skips FastAPI's re-validation and re-encoding
+    against `response_model`, which stays on the route for the OpenAPI docs.
+    
+    Args:
+        model: Response model constructed by the endpoint
+        
+    Returns:
+        JSON response with the model's fields
+    """
+    return ORJSONResponse(content=model.model_dump(mode="json"))
+
+def negotiate_response(request: Request, model: BaseModel) -> Response:
+    """
+    Render a response model as MessagePack when the client asks for it
+    
+    Args:
+        request: Incoming request (its Accept header selects the format)
+        model: Response model to render
+        
+    Returns:
+        MessagePack response for `Accept: application/msgpack`, JSON otherwise
+    """
+    payload = model.model_dump(mode="json")
+    
+    if MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return Response(
+            content=msgpack.packb(payload, use_bin_type=True),
+            media_type=MSGPACK_MEDIA_TYPE
+        )
+    
+    return ORJSONResponse(content=payload)
+
+def get_db_manager() -> DatabaseManager:
+    """Shared DatabaseManager (overridable in tests via app.dependency_overrides)"""
+    return get_shared_db_manager()
 
 @router.post("/generate-chart", response_model=AsyncJobResponse)
-async def generate_chart(request: ChartGenerationRequest, background_tasks: BackgroundTasks):
+async def generate_chart(request: ChartGenerationRequest):
     """
     Generate a chart component asynchronously from user prompt
     
     Args:
         request: Chart generation request with prompt
-        background_tasks: FastAPI background tasks
         
     Returns:
         Job ID for tracking the async generation process
     """
     try:
         # Create unique job ID
-        job_id = str(uuid.uuid4())
+        job_id = uuid.uuid4().hex
         
-        # Initialize job in storage
-        jobs_storage[job_id] = {
+        # Initialize job in storage and queue it for a worker
+        await queue.enqueue(job_id, {
             "id": job_id,
             "status": JobStatus.PENDING,
             "prompt": request.prompt,
@@ -49,16 +90,13 @@ async def generate_chart(request: ChartGenerationRequest, background_tasks: Back
             "result": None,
             "error_message": None,
             "completed_at": None
-        }
-        
-        # Start background task
-        background_tasks.add_task(process_chart_generation, job_id, request.prompt)
+        })
         
-        return AsyncJobResponse(
+        return model_response(AsyncJobResponse(
             job_id=job_id,
             status=JobStatus.PENDING,
             message="Chart generation started. Use the job ID to check status."
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(
@@ -66,26 +104,31 @@ async def generate_chart(request: ChartGenerationRequest, background_tasks: Back
             detail=f"Failed to start chart generation: {str(e)}"
         )
 
-@router.get("/job-status/{job_id}", response_model=JobStatusResponse)
-async def get_job_status(job_id: str):
+@router.get(
+    "/job-status/{job_id}",
+    response_model=JobStatusResponse,
+    responses={200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+)
+async def get_job_status(job_id: str, request: Request):
     """
     Get the status of an async chart generation job
     
     Args:
         job_id: Unique job identifier
+        request: Incoming request (send `Accept: application/msgpack` for MessagePack)
         
     Returns:
         Current job status and result if completed
     """
-    if job_id not in jobs_storage:
+    job = await queue.get_job(job_id)
+    
+    if job is None:
         raise HTTPException(
             status_code=404,
             detail="Job not found"
         )
     
-    job = jobs_storage[job_id]
-    
-    return JobStatusResponse(
+    return negotiate_response(request, JobStatusResponse(
         job_id=job["id"],
         status=job["status"],
         progress=job.get("progress", 0),
@@ -93,18 +136,54 @@ async def get_job_status(job_id: str):
         error_message=job.get("error_message"),
         created_at=job["created_at"],
         completed_at=job.get("completed_at")
+    ))
+
+@router.get("/job-stream/{job_id}")
+async def stream_job_status(job_id: str):
+    """
+    Stream job progress as Server-Sent Events instead of polling /job-status
+    
+    Args:
+        job_id: Unique job identifier
+        
+    Returns:
+        text/event-stream with the current job state followed by each update;
+        the stream ends once the job completes or fails, is deleted or expires,
+        or its worker stops reporting
+    """
+    if await queue.get_job(job_id) is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found"
+        )
+    
+    async def event_stream():
+        # Running jobs heartbeat well within the visibility timeout, so a claim
+        # older than that has lost its worker
+        async for update in queue.watch_job(job_id, stale_after=queue.visibility_timeout):
+            yield b"data: " + orjson.dumps(update) + b"\n\n"
+            
+            if update.get("status") in (JobStatus.COMPLETED, JobStatus.FAILED):
+                break
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @router.get("/database-status", response_model=DatabaseStatusResponse)
-async def get_database_status():
+def get_database_status(db_manager: DatabaseManager = Depends(get_db_manager)):
     """
     Get current database status and available tables
     
+    Declared as a plain function: SQLite access is blocking, so FastAPI
+    runs it in the thread pool instead of on the event loop.
+    
     Returns:
         Database information including all available tables
     """
     try:
-        db_manager = DatabaseManager()
         tables_info = db_manager.get_all_tables()
         
         # Convert to response format
@@ -120,11 +199,11 @@ async def get_database_status():
             for table in tables_info
         ]
         
-        return DatabaseStatusResponse(
+        return model_response(DatabaseStatusResponse(
             total_tables=len(tables),
             tables=tables,
             database_path=db_manager.db_path
-        )
+        ))
         
     except Exception as e:
         raise HTTPException(
@@ -143,14 +222,14 @@ async def delete_job(job_id: str):
     Returns:
         Success message
     """
-    if job_id not in jobs_storage:
+    job = await queue.get_job(job_id)
+    
+    if job is None:
         raise HTTPException(
             status_code=404,
             detail="Job not found"
         )
     
-    job = jobs_storage[job_id]
-    
     # Only allow deletion of completed or failed jobs
     if job["status"] in [JobStatus.PENDING, JobStatus.PROCESSING]:
         raise HTTPException(
@@ -158,7 +237,7 @@ async def delete_job(job_id: str):
             detail="Cannot delete job that is still processing"
         )
     
-    del jobs_storage[job_id]
+    await queue.delete_job(job_id)
     
     return {"message": "Job deleted successfully"}
 
@@ -170,8 +249,10 @@ async def list_jobs():
     Returns:
         List of all jobs with their current status
     """
+    jobs = await queue.list_jobs()
+    
     return {
-        "total_jobs": len(jobs_storage),
+        "total_jobs": len(jobs),
         "jobs": [
             {
                 "job_id": job["id"],
@@ -179,90 +260,15 @@ async def list_jobs():
                 "prompt": job["prompt"][:50] + "..." if len(job["prompt"]) > 50 else job["prompt"],
                 "created_at": job["created_at"]
             }
-            for job in jobs_storage.values()
+            for job in jobs
         ]
     }
 
-async def process_chart_generation(job_id: str, user_prompt: str):
-    """
-    Background task to process chart generation
-    
-    Args:
-        job_id: Unique job identifier
-        user_prompt: User's prompt for chart generation
-    """
-    try:
-        # Update job status to processing
-        jobs_storage[job_id]["status"] = JobStatus.PROCESSING
-        jobs_storage[job_id]["progress"] = 10
-        
-        # Step 1: Enhance prompt
-        enhancer = PromptEnhancer()
-        enhancement_result = enhancer.enhance_prompt(user_prompt)
-        jobs_storage[job_id]["progress"] = 25
-        
-        if not enhancement_result.has_context and enhancement_result.sql_context.strip() == "No database tables available.":
-            raise Exception("No database tables available. Please process data files first.")
-        
-        # Step 2: Generate and execute SQL
-        executor = QueryExecutor()
-        sql_result, execution_results = executor.execute_sql_generation(
-            enhancement_result.enhanced_prompt,
-            enhancement_result.sql_context
-        )
-        jobs_storage[job_id]["progress"] = 50
-        
-        if not sql_result.success:
-            raise Exception(f"SQL generation failed: {sql_result.error_message}")
-        
-        # Step 3: Process data
-        processor = DataProcessor()
-        processed_data = processor.process_query_results(sql_result, execution_results)
-        jobs_storage[job_id]["progress"] = 75
-        
-        if not processed_data.success:
-            raise Exception(f"Data processing failed: {processed_data.error_message}")
-        
-        # Step 4: Generate React component
-        component_generator = ComponentGenerator()
-        component_result = component_generator.generate_component(processed_data, user_prompt)
-        
-        if not component_result.success:
-            # Try fallback component
-            component_result = component_generator.generate_fallback_component(
-                processed_data, 
-                component_result.error_message or "Component generation failed"
-            )
-        
-        # Update job with result
-        jobs_storage[job_id].update({
-            "status": JobStatus.COMPLETED,
-            "progress": 100,
-            "result": component_result.component_code,
-            "component_name": component_result.component_name,
-            "chart_type": component_result.chart_type,
-            "completed_at": datetime.now().isoformat()
-        })
-        
-    except Exception as e:
-        # Update job with error
-        error_message = str(e)
-        
-        # Log full error for debugging
-        print(f"Chart generation error for job {job_id}: {error_message}")
-        print(f"Full traceback: {traceback.format_exc()}")
-        
-        jobs_storage[job_id].update({
-            "status": JobStatus.FAILED,
-            "error_message": error_message,
-            "completed_at": datetime.now().isoformat()
-        })
-
 @router.get("/health")
 async def health_check():
     """Simple health check endpoint"""
-    return {
+    return ORJSONResponse(content={
         "status": "healthy",
         "message": "AI Dashboard API is running",
         "timestamp": datetime.now().isoformat()
-    }
\ No newline at end of file
+    })
\ No newline at end of file
@@ -0,0 +1,103 @@
+"""
+In-process cache of generated components
+
+Sits in front of the shared Redis cache:
+- exact matches on (prompt, data) from a bounded LRU
+- near-duplicate prompts over the same data, matched by bag-of-words cosine similarity
+"""
+
+from collections import Counter, OrderedDict
+import math
+import re
+from typing import Dict, Any, Optional, Set, Tuple
+
+_TOKEN_RE = re.compile(r'\w+')
+
+def prompt_vector(prompt: str) -> Counter:
+    """Bag-of-words term counts for a prompt (case-insensitive)"""
+    return Counter(_TOKEN_RE.findall(prompt.lower()))
+
+def vector_norm(vector: Counter) -> float:
+    """Euclidean norm of a term-count vector"""
+    return math.sqrt(sum(c * c for c in vector.values()))
+
+def cosine_similarity(a: Counter, b: Counter, norm_a: Optional[float] = None, norm_b: Optional[float] = None) -> float:
+    """Cosine similarity of two term-count vectors (norms are computed if not given)"""
+    if not a or not b:
+        return 0.0
+
+    # Only shared terms contribute, so walk the shorter vector
+    if len(b) < len(a):
+        a, b = b, a
+    dot = sum(count * b[token] for token, count in a.items() if token in b)
+    norm = (norm_a if norm_a is not None else vector_norm(a)) * (norm_b if norm_b is not None else vector_norm(b))
+    return dot / norm
+
+class ComponentMemoryCache:
+    """Bounded LRU of validated components with near-duplicate prompt lookup"""
+
+    def __init__(self, max_entries: int = 256, similarity_threshold: float = 0.95):
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        # cache_key -> (data_key, prompt vector, vector norm, component)
+        self._entries: "OrderedDict[str, Tuple[str, Counter, float, Dict[str, Any]]]" = OrderedDict()
+        # data_key -> cache keys of its entries, so near-duplicate lookups only
+        # score prompts over the same data
+        self._keys_by_data: Dict[str, Set[str]] = {}
+
+    def get(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Exact-match lookup"""
+        entry = self._entries.get(cache_key)
+        if entry is None:
+            return None
+
+        self._entries.move_to_end(cache_key)
+        return entry[3]
+
+    def find_similar(self, data_key: str, user_prompt: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a component generated for the same data from a near-identical prompt
+
+        Args:
+            data_key: Fingerprint of the chart data, config and summary
+            user_prompt: Prompt being generated
+
+        Returns:
+            Best matching component above the similarity threshold, or None
+        """
+        candidates = self._keys_by_data.get(data_key)
+        if not candidates:
+            return None
+
+        vector = prompt_vector(user_prompt)
+        norm = vector_norm(vector)
+        best_key, best_score = None, self.similarity_threshold
+
+        for cache_key in candidates:
+            _, entry_vector, entry_norm, _ = self._entries[cache_key]
+            score = cosine_similarity(vector, entry_vector, norm, entry_norm)
+            if score >= best_score:
+                best_key, best_score = cache_key, score
+
+        return self.get(best_key) if best_key else None
+
+    def put(self, cache_key: str, data_key: str, user_prompt: str, component: Dict[str, Any]):
+        """Store a component, evicting the least recently used entry when full"""
+        if cache_key in self._entries:
+            self._unindex(cache_key, self._entries[cache_key][0])
+
+        vector = prompt_vector(user_prompt)
+        self._entries[cache_key] = (data_key, vector, vector_norm(vector), component)
+        self._entries.move_to_end(cache_key)
+        self._keys_by_data.setdefault(data_key, set()).add(cache_key)
+
+        while len(self._entries) > self.max_entries:
+            evicted_key, (evicted_data_key, _, _, _) = self._entries.popitem(last=False)
+            self._unindex(evicted_key, evicted_data_key)
+
+    def _unindex(self, cache_key: str, data_key: str):
+        """Remove a cache key from the data key index"""
+        keys = self._keys_by_data[data_key]
+        keys.discard(cache_key)
+        if not keys:
+            del self._keys_by_data[data_key]
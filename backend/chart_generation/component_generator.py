@@ -1,15 +1,279 @@
+import asyncio
 import groq
-import json
+import hashlib
+import logging
+import orjson
 import re
-from typing import Dict, Any, List, Optional
+import redis.asyncio as redis
+from typing import Dict, Any, List, Optional, Tuple
 import os
 from dotenv import load_dotenv
 from dataclasses import dataclass
+from functools import lru_cache
+import weakref
 
 from query_generation import ProcessedData
+from utils import get_groq_client, run_with_groq_client
+from .component_cache import ComponentMemoryCache
+from .jsx_validator import HAS_TREE_SITTER, validate_component_structure
+from .templates import (
+    CHART_DATA_PRELUDE, COMPONENT_SYSTEM_PROMPT, COMPONENT_SYSTEM_PROMPTS, COMPONENT_REQUEST_TEMPLATE,
+    FALLBACK_COMPONENT_TEMPLATE
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# orjson options for pipeline data (numpy scalars, non-string dict keys)
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# Rows of chart data shown to the LLM, enough to show the row shape and value
+# formats (the schema line describes the rest; the full data is embedded
+# server-side as chartData)
+PROMPT_SAMPLE_ROWS = 3
+
+# Rows of chart data embedded in a generated component (server-side, as chartData)
+EMBEDDED_DATA_MAX_ROWS = 500
+
+# (model, max_tokens) per request complexity; components are typically 800-1500 tokens
+_MODEL_TIERS = {
+    "simple": ("llama-3.1-8b-instant", 1200),
+    "complex": ("llama-3.3-70b-versatile", 2500),
+}
+_COMPLEX_REQUEST_RE = re.compile(r'\b(dashboard|multi\w*|multiple|combined|interactive|drill\w*|stacked|dual)\b', re.IGNORECASE)
+SIMPLE_MAX_ROWS = 50
+SIMPLE_MAX_COLUMNS = 4
+
+# Generated components are cached for a week, keyed by prompt + data
+COMPONENT_CACHE_TTL = 7 * 24 * 3600
+COMPONENT_CACHE_PREFIX = "llm:component:"
+
+# Structural patterns every generated component must contain
+_REQUIRED_PATTERNS = tuple(re.compile(p, re.MULTILINE | re.DOTALL) for p in (
+    r'const\s+\w+\s*=\s*\(\s*\)\s*=>\s*{',  # Function component pattern
+    r'return\s*\(',                           # Return statement
+    r'<\w+',                                  # JSX elements
+    r'};?\s*$',                              # Proper ending
+))
+
+# Code that must never be rendered in the browser, matched in a single pass
+# through one alternation (one capture group per pattern)
+_DANGEROUS_PATTERNS = (
+    r'eval\s*\(',
+    r'Function\s*\(',
+    r'document\.write',
+    r'innerHTML\s*=',
+    r'dangerouslySetInnerHTML',
+    r'__html',
+)
+_DANGEROUS_RE = re.compile('|'.join(f'({p})' for p in _DANGEROUS_PATTERNS), re.IGNORECASE)
+
+# Characters carried between streamed chunks when screening for dangerous code
+_STREAM_SCREEN_OVERLAP = 64
+
+# Clean-up applied to generated component code
+_IMPORT_RE = re.compile(r'import\s+.*?from\s+[\'"][^\'"]+[\'"];?\s*')
+_EXPORT_RE = re.compile(r'export\s+default\s+\w+;?\s*$', re.MULTILINE)
+_JSX_GAP_RE = re.compile(r'>\s*<')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*\n')
+
+# Escapes for control characters that LLMs leave raw inside JSON strings
+_CONTROL_ESCAPES = {'\n': '\\n', '\r': '\\r', '\t': '\\t', '\b': '\\b', '\f': '\\f'}
+_JSON_ESCAPABLE = set('"\\/bfnrtu')
+
+_OPEN_TAG_RE = re.compile(r'<(\w+)(?:\s+[^>]*)?>(?!.*<\/\1>)')
+_SELF_CLOSING_TAG_RE = re.compile(r'<(\w+)(?:\s+[^>]*)?\/>')
+
+# Keywords in the user prompt that select a chart-type specific system prompt,
+# checked in order: explicit chart names first, then softer hints. An explicit
+# request wins over the data-derived chart type.
+_CHART_TYPE_KEYWORDS = tuple((chart_type, re.compile(p, re.IGNORECASE)) for chart_type, p in (
+    ("pie", r'\b(pie|donut|doughnut)\b'),
+    ("scatter", r'\bscatter\b'),
+    ("line", r'\bline (chart|graph|plot)s?\b'),
+    ("bar", r'\b(bar (chart|graph|plot)s?|histogram)\b'),
+    ("table", r'\b((as|in) a table|tabular)\b'),
+    ("pie", r'\b(share|proportions?|percentages?)\b'),
+    ("scatter", r'\b(correlations?|relationship)\b'),
+    ("line", r'\b(trends?|over time|timeline|monthly|daily|yearly)\b'),
+    ("bar", r'\b(compare|comparison|ranking|top)\b'),
+))
+
+def _pick_system_prompt(user_prompt: str, chart_config: Dict[str, Any]) -> str:
+    """Choose the shortest system prompt that covers the requested chart type"""
+    for chart_type, pattern in _CHART_TYPE_KEYWORDS:
+        if pattern.search(user_prompt):
+            return COMPONENT_SYSTEM_PROMPTS[chart_type]
+    
+    return COMPONENT_SYSTEM_PROMPTS.get(chart_config.get('chart_type'), COMPONENT_SYSTEM_PROMPT)
+
+def _canonical_prompt(user_prompt: str) -> str:
+    """Collapse whitespace so equivalent prompts produce identical bytes"""
+    return " ".join(user_prompt.split())
+
+def _canonical_json(obj: Any) -> str:
+    """Compact JSON with sorted keys, byte-identical for equal inputs"""
+    return orjson.dumps(obj, default=str, option=_ORJSON_OPTS | orjson.OPT_SORT_KEYS).decode()
+
+def _pick_model_tier(user_prompt: str, data_summary: Dict[str, Any]) -> Tuple[str, int]:
+    """Use the fast model for small single-chart requests, the large model otherwise"""
+    is_simple = (
+        not _COMPLEX_REQUEST_RE.search(user_prompt)
+        and data_summary.get('total_rows', 0) <= SIMPLE_MAX_ROWS
+        and data_summary.get('total_columns', 0) <= SIMPLE_MAX_COLUMNS
+    )
+    return _MODEL_TIERS["simple" if is_simple else "complex"]
+
+@lru_cache(maxsize=256)
+def _describe_data(chart_type: Any, x_axis: Any, y_axis: Any, title: Any, total_rows: int, schema: str) -> str:
+    """Chart configuration and data summary section of the prompt (memoized per data shape)"""
+    return (
+        f"CHART CONFIGURATION: type={chart_type}; x={x_axis}; y={y_axis}; title={title}\n"
+        f"DATA SUMMARY: {total_rows} rows; columns: {schema}"
+    )
+
+# Per-process tier in front of Redis (exact and near-duplicate prompt hits)
+component_memory = ComponentMemoryCache(
+    max_entries=int(os.getenv('COMPONENT_MEMORY_SIZE', '256')),
+    similarity_threshold=0.95
+)
+
+# Upper bound on in-flight LLM requests per event loop (stays under Groq rate limits)
+MAX_CONCURRENT_LLM_CALLS = int(os.getenv('LLM_CONCURRENCY', '8'))
+
+# Async clients hold loop-bound connection pools, so they are shared per event loop
+_cache_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.Redis]" = weakref.WeakKeyDictionary()
+_llm_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Shared limiter for concurrent LLM requests on the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _llm_slots:
+        _llm_slots[loop] = asyncio.Semaphore(MAX_CONCURRENT_LLM_CALLS)
+    return _llm_slots[loop]
+
+def get_cache_client() -> redis.Redis:
+    """Shared Redis client for the generated component cache"""
+    loop = asyncio.get_running_loop()
+    if loop not in _cache_clients:
+        _cache_clients[loop] = redis.Redis.from_url(
+            os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+            decode_responses=True
+        )
+    return _cache_clients[loop]
+
+async def close_cache_client():
+    """Close the running loop's cache client (for loops about to end, e.g. asyncio.run)"""
+    client = _cache_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+class _JsonObjectScanner:
+    """
+    Track the first top-level JSON object in text fed chunk by chunk
+    
+    Single pass, aware of strings and escapes, so braces inside the
+    component code string never affect the depth.
+    """
+    
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.position = 0
+        self.start: Optional[int] = None
+        self.end: Optional[int] = None
+    
+    @property
+    def complete(self) -> bool:
+        return self.end is not None
+    
+    def feed(self, text: str) -> bool:
+        """Scan the next chunk of text; returns True once the object has closed"""
+        for offset, char in enumerate(text):
+            if self.complete:
+                break
+            
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == '\\':
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                # Strings only matter inside the object (prose may contain quotes)
+                self.in_string = self.start is not None
+            elif char == '{':
+                if self.start is None:
+                    self.start = self.position + offset
+                self.depth += 1
+            elif char == '}' and self.start is not None:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.end = self.position + offset + 1
+        
+        self.position += len(text)
+        return self.complete
+
+def _find_json_object(text: str) -> Optional[Tuple[int, int]]:
+    """Return (start, end) of the first balanced JSON object in text, if any"""
+    scanner = _JsonObjectScanner()
+    if scanner.feed(text):
+        return scanner.start, scanner.end
+    return None
+
+def _repair_component_code_value(json_str: str) -> Optional[str]:
+    """
+    Re-escape the component_code string value in one linear pass
+    
+    A quote only closes the value when the next non-blank character is ',' or
+    '}'; quotes inside the code, raw control characters and invalid escapes
+    are escaped along the way.
+    
+    Returns:
+        Repaired JSON text, or None if no component_code string value is found
+    """
+    key = json_str.find('"component_code"')
+    if key == -1:
+        return None
+    
+    n = len(json_str)
+    i = key + len('"component_code"')
+    while i < n and json_str[i] in ' \t\r\n:':
+        i += 1
+    if i >= n or json_str[i] != '"':
+        return None
+    
+    start = i + 1
+    out = []
+    i = start
+    while i < n:
+        char = json_str[i]
+        
+        if char == '\\':
+            if i + 1 < n and json_str[i + 1] in _JSON_ESCAPABLE:
+                out.append(json_str[i:i + 2])
+                i += 2
+                continue
+            out.append('\\\\')
+        elif char == '"':
+            j = i + 1
+            while j < n and json_str[j] in ' \t\r\n':
+                j += 1
+            if j >= n or json_str[j] in ',}':
+                return json_str[:start] + ''.join(out) + json_str[i:]
+            out.append('\\"')
+        elif char < ' ':
+            out.append(_CONTROL_ESCAPES.get(char, f'\\u{ord(char):04x}'))
+        else:
+            out.append(char)
+        
+        i += 1
+    
+    return None
+
 @dataclass
 class ComponentGenerationResult:
     """Structure for component generation results"""
@@ -22,10 +286,37 @@ class ComponentGenerationResult:
 class ComponentGenerator:
     """Generate complete React components from processed data using pure LLM generation"""
     
-    def __init__(self):
-        self.client = groq.Groq(api_key=os.getenv('GROQ_API_KEY'))
+    @property
+    def client(self) -> groq.AsyncGroq:
+        return get_groq_client()
     
-    def generate_component(self, processed_data: ProcessedData, user_prompt: str) -> ComponentGenerationResult:
+    async def generate_components_batch(self, items: List[Tuple[ProcessedData, str]]) -> List[ComponentGenerationResult]:
+        """
+        Generate several components concurrently (e.g. every chart of a dashboard)
+        
+        Args:
+            items: (processed_data, user_prompt) pairs
+            
+        Returns:
+            ComponentGenerationResult for each item, in the same order
+        """
+        return await asyncio.gather(*[
+            self.generate_component(processed_data, user_prompt)
+            for processed_data, user_prompt in items
+        ])
+    
+    def generate_component_sync(self, processed_data: ProcessedData, user_prompt: str) -> ComponentGenerationResult:
+        """Blocking wrapper around generate_component for synchronous callers"""
+        async def generate() -> ComponentGenerationResult:
+            # The loop ends with this call, so release its Redis pool too
+            try:
+                return await self.generate_component(processed_data, user_prompt)
+            finally:
+                await close_cache_client()
+        
+        return run_with_groq_client(generate())
+    
+    async def generate_component(self, processed_data: ProcessedData, user_prompt: str) -> ComponentGenerationResult:
         """
         Generate complete React component from processed data using LLM
         
@@ -48,7 +339,7 @@ class ComponentGenerator:
         
         try:
             # Generate complete component using LLM
-            component_result = self._generate_complete_component(processed_data, user_prompt)
+            component_result = await self._generate_complete_component(processed_data, user_prompt)
             
             if not component_result:
                 print("❌ LLM failed to generate component code")
@@ -84,104 +375,58 @@ class ComponentGenerator:
                 error_message=f"Component generation error: {str(e)}"
             )
     
-    def _generate_complete_component(self, processed_data: ProcessedData, user_prompt: str) -> Optional[Dict[str, Any]]:
+    async def _generate_complete_component(self, processed_data: ProcessedData, user_prompt: str) -> Optional[Dict[str, Any]]:
         """Generate complete React component code using LLM"""
         
         chart_data = processed_data.chart_data
         chart_config = processed_data.chart_config
         data_summary = processed_data.data_summary
         
-        generation_prompt = f"""
-You are an expert React developer. Generate a complete, self-contained React component for data visualization.
-
-USER REQUEST: "{user_prompt}"
-
-DATA TO VISUALIZE:
-{json.dumps(chart_data[:5], indent=2, default=str)}  
-(Sample of {len(chart_data)} total rows)
-
-CHART CONFIGURATION:
-- Chart Type: {chart_config.get('chart_type', 'auto-detect from data')}
-- X-Axis: {chart_config.get('x_axis', 'auto-detect')}
-- Y-Axis: {chart_config.get('y_axis', 'auto-detect')}
-- Title: {chart_config.get('title', 'Generate appropriate title')}
-
-DATA SUMMARY:
-- Columns: {data_summary.get('column_names', [])}
-- Rows: {data_summary.get('total_rows', 0)}
-- Numeric columns: {data_summary.get('numeric_columns', 0)}
-- Categorical columns: {data_summary.get('categorical_columns', 0)}
-
-STRICT REQUIREMENTS:
-1. Generate a COMPLETE React functional component that works standalone
-2. DO NOT include any import statements - they will be provided automatically
-3. Use only React hooks (useState, useEffect, etc.) and Recharts components
-4. Embed the complete data array directly in the component
-5. Use ONLY inline styles with style={{}} - DO NOT use className or Tailwind
-6. Choose the BEST chart type for this data and user request
-7. Include error handling and loading states
-8. Make it responsive with proper sizing
-9. Add meaningful tooltips, labels, and formatting
-10. Generate an appropriate PascalCase component name
-11. Include proper axis labels, legends, and titles
-12. The component must be ready to render immediately when executed
-13. Handle empty or invalid data gracefully
-14. Use proper TypeScript syntax if needed
-
-CRITICAL STYLING RULES:
-- Use inline styles (style={{...}}) instead of className
-- DO NOT use Tailwind classes as they won't work in dynamic components
-- Example: style={{width: '100%', height: '400px'}} instead of className="w-full h-96"
-- Ensure the root div has explicit height (e.g., style={{width: '100%', height: '400px'}})
-
-EXAMPLE STRUCTURE:
-```javascript
-const SalesChart = () => {{
-  const data = [...your data here...];
-  
-  return (
-    <div style={{{{width: '100%', height: '400px', padding: '16px'}}}}>
-      <h2 style={{{{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}}}>
-        Your Chart Title
-      </h2>
-      <ResponsiveContainer width="100%" height="90%">
-        <BarChart data={{data}}>
-          <CartesianGrid strokeDasharray="3 3" />
-          <XAxis dataKey="category" />
-          <YAxis />
-          <Tooltip />
-          <Legend />
-          <Bar dataKey="value" fill="#8884d8" />
-        </BarChart>
-      </ResponsiveContainer>
-    </div>
-  );
-}};
-```
-Very IMPORTANT: Use only double quotes " for strings in JSON. Do NOT use backticks ` or single quotes '."
-Return your response as a JSON object:
-{{
-  "component_code": "/* Complete React component code here - NO IMPORTS */",
-  "component_name": "ComponentName",
-  "chart_type": "bar|line|pie|scatter|table|area|etc"
-}}
-
-CRITICAL: 
-- The component_code should be the ENTIRE React component as a string, ready to execute
-- NO import statements
-- Use INLINE STYLES only (no className)
-- Ensure root element has explicit height
-"""
+        # Whitespace differences must not change the prompt bytes or cache key
+        user_prompt = _canonical_prompt(user_prompt)
         
-        try:
-            response = self.client.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": generation_prompt}],
-                temperature=0.1,  # Lower temperature for more consistent code generation
-                max_tokens=4000
+        # Identical (or near-identical) prompt + data yields an equivalent component
+        data_key = self._data_cache_key(chart_data, chart_config, data_summary)
+        cache_key = self._component_cache_key(user_prompt, data_key)
+        
+        cached = component_memory.get(cache_key) or component_memory.find_similar(data_key, user_prompt)
+        if cached:
+            logger.info("Using cached component")
+            return cached
+        
+        cached = await self._get_cached_component(cache_key)
+        if cached:
+            logger.info("Using cached component")
+            component_memory.put(cache_key, data_key, user_prompt, cached)
+            return cached
+        
+        request_prompt = COMPONENT_REQUEST_TEMPLATE.format(
+            user_prompt=user_prompt,
+            data_sample=_canonical_json(chart_data[:PROMPT_SAMPLE_ROWS]),
+            total=len(chart_data),
+            data_description=_describe_data(
+                chart_config.get('chart_type', 'auto-detect from data'),
+                chart_config.get('x_axis', 'auto-detect'),
+                chart_config.get('y_axis', 'auto-detect'),
+                chart_config.get('title', 'Generate appropriate title'),
+                data_summary.get('total_rows', 0),
+                data_summary.get('schema', '')
             )
+        )
+        
+        try:
+            model, max_tokens = _pick_model_tier(user_prompt, data_summary)
+            system_prompt = _pick_system_prompt(user_prompt, chart_config)
             
-            response_text = response.choices[0].message.content.strip()
+            # Same hash across calls = byte-identical prefix (provider cache eligible)
+            if logger.isEnabledFor(logging.DEBUG):
+                prefix_hash = hashlib.sha256(system_prompt[:1024].encode()).hexdigest()[:12]
+                logger.debug("Prompt prefix %s (%s)", prefix_hash, model)
+            
+            response_text = await self._stream_completion([
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": request_prompt}
+            ], model, max_tokens)
             
             # Extract JSON from response
             result = self._extract_json_from_response(response_text)
@@ -193,7 +438,10 @@ CRITICAL:
                 cleaned_code = self._clean_component_code(result['component_code'])
                 
                 if self._validate_component_code(cleaned_code):
-                    result['component_code'] = cleaned_code
+                    # The data is added after validation: it is JSON, not model output
+                    result['component_code'] = self._embed_chart_data(cleaned_code, chart_data)
+                    component_memory.put(cache_key, data_key, user_prompt, result)
+                    await self._cache_component(cache_key, result)
                     return result
                 else:
                     print("Generated component failed validation")
@@ -205,20 +453,100 @@ CRITICAL:
             print(f"Error in LLM component generation: {e}")
             return None
     
+    async def _stream_completion(self, messages: List[Dict[str, str]], model: str, max_tokens: int) -> str:
+        """
+        Stream the LLM reply and stop reading as soon as the JSON object closes
+        
+        Any trailing prose/code fences after the object are never downloaded.
+        Code is screened for dangerous patterns while it streams, so a reply
+        that would fail validation is abandoned (returns "") without waiting
+        for the remaining tokens.
+        """
+        scanner = _JsonObjectScanner()
+        parts = []
+        tail = ""
+        
+        async with get_llm_semaphore():
+            stream = await self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.1,  # Lower temperature for more consistent code generation
+                max_tokens=max_tokens,
+                stream=True
+            )
+            
+            try:
+                async for chunk in stream:
+                    delta = chunk.choices[0].delta.content if chunk.choices else None
+                    if not delta:
+                        continue
+                    
+                    parts.append(delta)
+                    closed = scanner.feed(delta)
+                    
+                    if scanner.start is not None:
+                        # Overlap with the previous chunk so split patterns still match
+                        window = tail + delta
+                        dangerous = _DANGEROUS_RE.search(window)
+                        if dangerous:
+                            logger.warning("Dangerous pattern found while streaming: %s", _DANGEROUS_PATTERNS[dangerous.lastindex - 1])
+                            return ""
+                        tail = window[-_STREAM_SCREEN_OVERLAP:]
+                    
+                    if closed:
+                        break
+            finally:
+                # Release the connection when we stop reading early
+                await stream.response.aclose()
+        
+        return "".join(parts).strip()
+    
+    def _data_cache_key(self, chart_data: List[Dict[str, Any]],
+                        chart_config: Dict[str, Any], data_summary: Dict[str, Any]) -> str:
+        """Content hash of the data side of the prompt"""
+        # Chart data is part of the key because the component embeds it
+        payload = orjson.dumps(
+            [chart_data, chart_config, data_summary],
+            default=str,
+            option=_ORJSON_OPTS | orjson.OPT_SORT_KEYS
+        )
+        return hashlib.sha256(payload).hexdigest()
+    
+    def _component_cache_key(self, user_prompt: str, data_key: str) -> str:
+        """Build a content hash of everything that shapes the generated component"""
+        digest = hashlib.sha256(f"{data_key}:{user_prompt}".encode()).hexdigest()
+        return COMPONENT_CACHE_PREFIX + digest
+    
+    async def _get_cached_component(self, cache_key: str) -> Optional[Dict[str, Any]]:
+        """Return a previously validated component, or None on miss/cache failure"""
+        try:
+            cached = await get_cache_client().get(cache_key)
+            return orjson.loads(cached) if cached else None
+        except (redis.RedisError, orjson.JSONDecodeError) as e:
+            logger.warning("Component cache lookup failed: %s", e)
+            return None
+    
+    async def _cache_component(self, cache_key: str, result: Dict[str, Any]):
+        """Store a validated component (cache failures never fail generation)"""
+        try:
+            await get_cache_client().setex(cache_key, COMPONENT_CACHE_TTL, orjson.dumps(result))
+        except redis.RedisError as e:
+            logger.warning("Component cache store failed: %s", e)
+    
     def _clean_component_code(self, component_code: str) -> str:
         """Clean and normalize the generated component code"""
         
         # Remove any stray import statements that might have been included
-        cleaned = re.sub(r'import\s+.*?from\s+[\'"][^\'"]+[\'"];?\s*', '', component_code)
+        cleaned = _IMPORT_RE.sub('', component_code)
         
         # Remove any export statements
-        cleaned = re.sub(r'export\s+default\s+\w+;?\s*$', '', cleaned, flags=re.MULTILINE)
+        cleaned = _EXPORT_RE.sub('', cleaned)
         
         # Ensure proper spacing around JSX elements
-        cleaned = re.sub(r'>\s*<', '>\n<', cleaned)
+        cleaned = _JSX_GAP_RE.sub('>\n<', cleaned)
         
         # Remove excessive whitespace
-        cleaned = re.sub(r'\n\s*\n\s*\n', '\n\n', cleaned)
+        cleaned = _BLANK_LINES_RE.sub('\n\n', cleaned)
         
         # Ensure the component ends properly
         if not cleaned.strip().endswith('};'):
@@ -229,51 +557,44 @@ CRITICAL:
         
         return cleaned.strip()
     
+    def _embed_chart_data(self, component_code: str, chart_data: List[Dict[str, Any]]) -> str:
+        """Prepend the chart data the component renders as the chartData constant"""
+        data_literal = orjson.dumps(chart_data[:EMBEDDED_DATA_MAX_ROWS], default=str, option=_ORJSON_OPTS).decode()
+        return CHART_DATA_PRELUDE % {'data_literal': data_literal} + component_code
+    
     def _validate_component_code(self, component_code: str) -> bool:
         """Enhanced validation of generated component code"""
         
         if not component_code or len(component_code.strip()) < 50:
-            print("Component code too short")
+            logger.warning("Component code too short")
             return False
         
-        # Check for required patterns
-        required_patterns = [
-            r'const\s+\w+\s*=\s*\(\s*\)\s*=>\s*{',  # Function component pattern
-            r'return\s*\(',                           # Return statement
-            r'<\w+',                                  # JSX elements
-            r'};?\s*$',                              # Proper ending
-        ]
-        
-        for pattern in required_patterns:
-            if not re.search(pattern, component_code, re.MULTILINE | re.DOTALL):
-                print(f"Missing required pattern: {pattern}")
-                return False
-        
         # Check for dangerous code
-        dangerous_patterns = [
-            r'eval\s*\(',
-            r'Function\s*\(',
-            r'document\.write',
-            r'innerHTML\s*=',
-            r'dangerouslySetInnerHTML',
-            r'__html',
-        ]
-        
-        for pattern in dangerous_patterns:
-            if re.search(pattern, component_code, re.IGNORECASE):
-                print(f"Dangerous pattern found: {pattern}")
+        dangerous = _DANGEROUS_RE.search(component_code)
+        if dangerous:
+            logger.warning("Dangerous pattern found: %s", _DANGEROUS_PATTERNS[dangerous.lastindex - 1])
+            return False
+        
+        # A real parse covers the structure and tag balance in one pass
+        if HAS_TREE_SITTER:
+            return validate_component_structure(component_code)
+        
+        # Check for required patterns
+        for pattern in _REQUIRED_PATTERNS:
+            if not pattern.search(component_code):
+                logger.warning("Missing required pattern: %s", pattern.pattern)
                 return False
         
         # Check for proper JSX closing tags
-        open_tags = re.findall(r'<(\w+)(?:\s+[^>]*)?>(?!.*<\/\1>)', component_code)
-        self_closing = re.findall(r'<(\w+)(?:\s+[^>]*)?\/>', component_code)
+        open_tags = _OPEN_TAG_RE.findall(component_code)
+        self_closing = _SELF_CLOSING_TAG_RE.findall(component_code)
         
         # Make sure we don't have unclosed tags (basic check)
         for tag in open_tags:
             if tag not in self_closing and tag.lower() not in ['br', 'img', 'input', 'hr']:
                 close_pattern = f'</{tag}>'
                 if close_pattern not in component_code:
-                    print(f"Unclosed tag found: {tag}")
+                    logger.warning("Unclosed tag found: %s", tag)
                     # Don't fail validation for this, as it might be a nested component
         
         return True
@@ -281,39 +602,26 @@ CRITICAL:
     def _extract_json_from_response(self, response_text: str) -> Optional[Dict[str, Any]]:
         """Extract JSON object from LLM response with better error handling"""
         try:
-            # Remove code block formatting if present
-            cleaned_text = response_text
-            # print("===============================\n", cleaned_text)
-            # Handle various markdown code block formats
-            if '```json' in cleaned_text:
-                start_marker = '```json'
-                end_marker = '```'
-                start_idx = cleaned_text.find(start_marker)
-                if start_idx != -1:
-                    start_idx += len(start_marker)
-                    end_idx = cleaned_text.find(end_marker, start_idx)
-                    if end_idx != -1:
-                        cleaned_text = cleaned_text[start_idx:end_idx].strip()
-            
-            elif cleaned_text.startswith('```'):
-                cleaned_text = re.sub(r'```[\w]*\n?', '', cleaned_text).strip()
-                cleaned_text = cleaned_text.replace('```', '').strip()
+            # Locate the first balanced object (skips code fences and prose)
+            bounds = _find_json_object(response_text)
             
-            # Find JSON object boundaries
-            start_idx = cleaned_text.find('{')
-            end_idx = cleaned_text.rfind('}') + 1
+            if bounds is None:
+                # Unbalanced output (e.g. truncated); fall back to the outermost braces
+                start_idx = response_text.find('{')
+                end_idx = response_text.rfind('}') + 1
+                bounds = (start_idx, end_idx) if start_idx != -1 and end_idx > start_idx else None
             
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = cleaned_text[start_idx:end_idx]
+            if bounds is not None:
+                json_str = response_text[bounds[0]:bounds[1]]
                 
                 # Clean up the JSON string
                 json_str = self._clean_json_response(json_str)
                 
-                return json.loads(json_str)
+                return orjson.loads(json_str)
             
             return None
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"JSON parsing error: {e}")
             print(f"Response text (first 500 chars): {response_text[:500]}")
             return None
@@ -326,34 +634,20 @@ CRITICAL:
         
         try:
             # First, try to parse as-is
-            json.loads(json_str)
+            orjson.loads(json_str)
             return json_str
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             pass
         
-        # If that fails, try to fix common issues
-        
-        # Fix unescaped quotes in component code (basic approach)
-        # Look for component_code field and escape quotes within it
-        
-        def escape_quotes_in_code(match):
-            field_name = match.group(1)
-            code_content = match.group(2)
-            
-            # Escape quotes in the code content, but preserve JSON structure
-            escaped_content = code_content.replace('\\', '\\\\').replace('"', '\\"')
-            
-            return f'"{field_name}": "{escaped_content}"'
-        
-        # Pattern to match component_code field with its content
-        pattern = r'"(component_code)"\s*:\s*"((?:[^"\\]|\\.)*)(?<!\\)"'
-        
-        try:
-            fixed_json = re.sub(pattern, escape_quotes_in_code, json_str, flags=re.DOTALL)
-            json.loads(fixed_json)
-            return fixed_json
-        except (json.JSONDecodeError, re.error):
-            pass
+        # If that fails, re-escape the component code value (raw newlines,
+        # stray quotes and invalid escapes are the usual culprits)
+        fixed_json = _repair_component_code_value(json_str)
+        if fixed_json is not None:
+            try:
+                orjson.loads(fixed_json)
+                return fixed_json
+            except orjson.JSONDecodeError:
+                pass
         
         # If all else fails, return original
         return json_str
@@ -363,71 +657,12 @@ CRITICAL:
         
         chart_data = processed_data.chart_data if processed_data.success else []
         
-        # Use inline styles instead of Tailwind classes
-        fallback_code = f'''const ErrorChart = () => {{
-  const data = {json.dumps(chart_data[:10], default=str)};
-  
-  return (
-    <div style={{{{
-      width: '100%',
-      height: '100%',
-      display: 'flex',
-      alignItems: 'center',
-      justifyContent: 'center',
-      padding: '1rem'
-    }}}}>
-      <div style={{{{
-        textAlign: 'center',
-        maxWidth: '32rem',
-        backgroundColor: '#fee2e2',
-        border: '1px solid #fecaca',
-        borderRadius: '0.5rem',
-        padding: '2rem'
-      }}}}>
-        <div style={{{{fontSize: '2rem', marginBottom: '1rem'}}}}>⚠️</div>
-        <div style={{{{fontSize: '1.125rem', fontWeight: '600', color: '#b91c1c', marginBottom: '0.5rem'}}}}>
-          Chart Generation Error
-        </div>
-        <div style={{{{fontSize: '0.875rem', color: '#7f1d1d', marginBottom: '1rem', backgroundColor: '#fef2f2', padding: '0.75rem', borderRadius: '0.25rem'}}}}>
-          {error_message}
-        </div>
-        {{data && data.length > 0 && (
-          <div style={{{{
-            backgroundColor: '#dbeafe',
-            border: '1px solid #93c5fd',
-            borderRadius: '0.5rem',
-            padding: '1rem',
-            marginTop: '1rem',
-            textAlign: 'left'
-          }}}}>
-            <h4 style={{{{fontWeight: '500', color: '#1e40af', marginBottom: '0.5rem'}}}}>
-              Available Data Preview:
-            </h4>
-            <div style={{{{
-              fontSize: '0.75rem',
-              fontFamily: 'monospace',
-              backgroundColor: 'white',
-              padding: '0.5rem',
-              borderRadius: '0.25rem',
-              overflow: 'auto',
-              maxHeight: '8rem'
-            }}}}>
-              <pre>{{JSON.stringify(data.slice(0, 3), null, 2)}}</pre>
-            </div>
-            {{data.length > 3 && (
-              <div style={{{{fontSize: '0.75rem', color: '#2563eb', marginTop: '0.5rem'}}}}>
-                ... and {{data.length - 3}} more rows
-              </div>
-            )}}
-          </div>
-        )}}
-        <div style={{{{marginTop: '1rem', fontSize: '0.75rem', color: '#6b7280'}}}}>
-          Try rephrasing your prompt or check the data source
-        </div>
-      </div>
-    </div>
-  );
-}};'''
+        # Only the data and message vary; both are emitted as JSON literals so
+        # the message cannot inject markup or expressions into the JSX
+        fallback_code = FALLBACK_COMPONENT_TEMPLATE % {
+            'data_literal': orjson.dumps(chart_data[:10], default=str, option=_ORJSON_OPTS).decode(),
+            'error_literal': orjson.dumps(error_message).decode()
+        }
         
         return ComponentGenerationResult(
             component_code=fallback_code,
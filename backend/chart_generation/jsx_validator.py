@@ -0,0 +1,76 @@
+"""
+Structural validation of generated components with tree-sitter
+
+Parses the component once in C (TSX grammar, so TypeScript annotations are
+accepted) instead of running a series of regex scans. Optional: when
+tree_sitter_languages is not installed HAS_TREE_SITTER is False and callers
+keep their regex checks.
+"""
+
+import logging
+from functools import lru_cache
+
+try:
+    import tree_sitter_languages
+    HAS_TREE_SITTER = True
+except ImportError:
+    HAS_TREE_SITTER = False
+
+logger = logging.getLogger(__name__)
+
+_JSX_NODE_TYPES = ('jsx_element', 'jsx_self_closing_element')
+
+@lru_cache(maxsize=1)
+def _parser():
+    """Shared TSX parser (built on first use)"""
+    return tree_sitter_languages.get_parser('tsx')
+
+def _is_jsx(node) -> bool:
+    """True if node is JSX, possibly wrapped in parentheses"""
+    while node is not None and node.type == 'parenthesized_expression' and node.named_children:
+        node = node.named_children[0]
+    return node is not None and node.type in _JSX_NODE_TYPES
+
+def _returns_jsx(function_node) -> bool:
+    """True if the arrow function renders JSX (expression body or a return statement)"""
+    body = function_node.child_by_field_name('body')
+    if _is_jsx(body):
+        return True
+
+    stack = [body] if body is not None else []
+    while stack:
+        node = stack.pop()
+        if node.type == 'return_statement' and any(_is_jsx(child) for child in node.named_children):
+            return True
+        stack.extend(node.named_children)
+
+    return False
+
+def validate_component_structure(component_code: str) -> bool:
+    """
+    Check that code is syntactically valid and declares an arrow function component
+
+    Args:
+        component_code: Cleaned component source
+
+    Returns:
+        True if the code parses without errors and a top-level
+        `const Name = () => ...` returns JSX
+    """
+    root = _parser().parse(component_code.encode()).root_node
+
+    if root.has_error:
+        logger.warning("Component code has syntax errors (unbalanced JSX or braces)")
+        return False
+
+    for statement in root.named_children:
+        if statement.type != 'lexical_declaration':
+            continue
+
+        for declarator in statement.named_children:
+            value = declarator.child_by_field_name('value')
+            if value is not None and value.type == 'arrow_function' and _returns_jsx(value):
+                return True
+
+    logger.warning("No arrow function component returning JSX found")
+    return False
@@ -0,0 +1,315 @@
+"""Prompt templates for React component generation
+
+System prompts hold only invariant text so each one is a byte-identical
+prefix across calls (provider-side prompt caching); everything per-request
+goes in the user message built from COMPONENT_REQUEST_TEMPLATE. The LLM only
+sees a data sample; the data itself is prepended to the generated code as the
+chartData constant (CHART_DATA_PRELUDE), so it is never retyped by the model.
+"""
+
+# Generic instructions, used when the chart type is unknown
+COMPONENT_SYSTEM_PROMPT = """You are an expert React developer. Generate a complete, self-contained React component for data visualization from the user request, data sample, chart configuration and data summary provided in the user message.
+
+STRICT REQUIREMENTS:
+1. Generate a COMPLETE React functional component that works standalone
+2. DO NOT include any import statements - they will be provided automatically
+3. Use only React hooks (useState, useEffect, etc.) and Recharts components
+4. The data is already defined before your component as the constant chartData (an array of row objects) - use it directly; do NOT embed, redefine or invent data values
+5. Use ONLY inline styles with style={} - DO NOT use className or Tailwind
+6. Choose the BEST chart type for this data and user request
+7. Include error handling and loading states
+8. Make it responsive with proper sizing
+9. Add meaningful tooltips, labels, and formatting
+10. Generate an appropriate PascalCase component name
+11. Include proper axis labels, legends, and titles
+12. The component must be ready to render immediately when executed
+13. Handle empty or invalid data gracefully
+14. Use proper TypeScript syntax if needed
+
+CRITICAL STYLING RULES:
+- Use inline styles (style={...}) instead of className
+- DO NOT use Tailwind classes as they won't work in dynamic components
+- Example: style={width: '100%', height: '400px'} instead of className="w-full h-96"
+- Ensure the root div has explicit height (e.g., style={width: '100%', height: '400px'})
+
+EXAMPLE STRUCTURE:
+```javascript
+const SalesChart = () => {
+  const data = chartData;
+  
+  return (
+    <div style={{width: '100%', height: '400px', padding: '16px'}}>
+      <h2 style={{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}>
+        Your Chart Title
+      </h2>
+      <ResponsiveContainer width="100%" height="90%">
+        <BarChart data={data}>
+          <CartesianGrid strokeDasharray="3 3" />
+          <XAxis dataKey="category" />
+          <YAxis />
+          <Tooltip />
+          <Legend />
+          <Bar dataKey="value" fill="#8884d8" />
+        </BarChart>
+      </ResponsiveContainer>
+    </div>
+  );
+};
+```
+Very IMPORTANT: Use only double quotes " for strings in JSON. Do NOT use backticks ` or single quotes '."
+Return your response as a JSON object:
+{
+  "component_code": "/* Complete React component code here - NO IMPORTS */",
+  "component_name": "ComponentName",
+  "chart_type": "bar|line|pie|scatter|table|area|etc"
+}
+
+CRITICAL: 
+- The component_code should be the ENTIRE React component as a string, ready to execute
+- NO import statements
+- Use INLINE STYLES only (no className)
+- Ensure root element has explicit height
+"""
+
+_INTRO = """You are an expert React developer. Generate a complete, self-contained React component for data visualization from the user request, data sample, chart configuration and data summary provided in the user message.
+"""
+
+_COMMON_RULES = """
+STRICT REQUIREMENTS:
+1. Generate a COMPLETE React functional component that works standalone
+2. DO NOT include any import statements - they will be provided automatically
+3. Use only React hooks (useState, useEffect, etc.){libraries}
+4. The data is already defined before your component as the constant chartData (an array of row objects) - use it directly; do NOT embed, redefine or invent data values
+5. Use ONLY inline styles (style={{...}}) - DO NOT use className or Tailwind
+6. Ensure the root div has explicit height (e.g., style={{width: '100%', height: '400px'}})
+7. Handle empty or invalid data gracefully
+8. Generate an appropriate PascalCase component name
+"""
+
+_RESPONSE_FORMAT = """
+Very IMPORTANT: Use only double quotes " for strings in JSON. Do NOT use backticks ` or single quotes '.
+Return your response as a JSON object:
+{{
+  "component_code": "/* Complete React component code here - NO IMPORTS */",
+  "component_name": "ComponentName",
+  "chart_type": "{chart_type}"
+}}
+"""
+
+def _specialized(chart_type: str, libraries: str, guidance: str, example: str) -> str:
+    """Assemble a chart-type specific system prompt"""
+    return (
+        _INTRO
+        + _COMMON_RULES.format(libraries=libraries)
+        + guidance
+        + "\nEXAMPLE STRUCTURE:\n```javascript\n" + example + "```\n"
+        + _RESPONSE_FORMAT.format(chart_type=chart_type)
+    )
+
+_RECHARTS = " and Recharts components"
+
+# Shorter system prompts that only carry guidance relevant to one chart type
+COMPONENT_SYSTEM_PROMPTS = {
+    "bar": _specialized("bar", _RECHARTS, """
+CHART GUIDANCE:
+- Render a bar chart (BarChart) unless the user request clearly asks for another type
+- Categories on the X axis, values on the Y axis; label both axes and add a title
+- Add a Tooltip and, for multiple series, a Legend
+""", """const SalesChart = () => {
+  const data = chartData;
+  
+  return (
+    <div style={{width: '100%', height: '400px', padding: '16px'}}>
+      <h2 style={{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}>Your Chart Title</h2>
+      <ResponsiveContainer width="100%" height="90%">
+        <BarChart data={data}>
+          <CartesianGrid strokeDasharray="3 3" />
+          <XAxis dataKey="category" />
+          <YAxis />
+          <Tooltip />
+          <Bar dataKey="value" fill="#8884d8" />
+        </BarChart>
+      </ResponsiveContainer>
+    </div>
+  );
+};
+"""),
+    "line": _specialized("line", _RECHARTS, """
+CHART GUIDANCE:
+- Render a line chart (LineChart) unless the user request clearly asks for another type
+- Keep the data in X order (usually time); label both axes and add a title
+- Add a Tooltip and, for multiple series, a Legend
+""", """const TrendChart = () => {
+  const data = chartData;
+  
+  return (
+    <div style={{width: '100%', height: '400px', padding: '16px'}}>
+      <h2 style={{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}>Your Chart Title</h2>
+      <ResponsiveContainer width="100%" height="90%">
+        <LineChart data={data}>
+          <CartesianGrid strokeDasharray="3 3" />
+          <XAxis dataKey="date" />
+          <YAxis />
+          <Tooltip />
+          <Line type="monotone" dataKey="value" stroke="#8884d8" />
+        </LineChart>
+      </ResponsiveContainer>
+    </div>
+  );
+};
+"""),
+    "pie": _specialized("pie", _RECHARTS, """
+CHART GUIDANCE:
+- Render a pie chart (PieChart) unless the user request clearly asks for another type
+- One Cell per slice with distinct colors; show labels or a Legend and a Tooltip
+""", """const ShareChart = () => {
+  const data = chartData;
+  const colors = ['#8884d8', '#82ca9d', '#ffc658', '#ff8042', '#0088fe'];
+  
+  return (
+    <div style={{width: '100%', height: '400px', padding: '16px'}}>
+      <h2 style={{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}>Your Chart Title</h2>
+      <ResponsiveContainer width="100%" height="90%">
+        <PieChart>
+          <Pie data={data} dataKey="value" nameKey="name" label>
+            {data.map((entry, index) => <Cell key={index} fill={colors[index % colors.length]} />)}
+          </Pie>
+          <Tooltip />
+          <Legend />
+        </PieChart>
+      </ResponsiveContainer>
+    </div>
+  );
+};
+"""),
+    "scatter": _specialized("scatter", _RECHARTS, """
+CHART GUIDANCE:
+- Render a scatter chart (ScatterChart) unless the user request clearly asks for another type
+- Numeric X and Y axes with type="number"; label both axes and add a title
+- Add a Tooltip showing both values
+""", """const CorrelationChart = () => {
+  const data = chartData;
+  
+  return (
+    <div style={{width: '100%', height: '400px', padding: '16px'}}>
+      <h2 style={{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}>Your Chart Title</h2>
+      <ResponsiveContainer width="100%" height="90%">
+        <ScatterChart>
+          <CartesianGrid />
+          <XAxis type="number" dataKey="x" name="X" />
+          <YAxis type="number" dataKey="y" name="Y" />
+          <Tooltip />
+          <Scatter data={data} fill="#8884d8" />
+        </ScatterChart>
+      </ResponsiveContainer>
+    </div>
+  );
+};
+"""),
+    "table": _specialized("table", "", """
+TABLE GUIDANCE:
+- Render a plain HTML table unless the user request clearly asks for a chart
+- Header row from the data keys; scroll vertically when rows overflow
+""", """const DataTable = () => {
+  const data = chartData;
+  const columns = data.length ? Object.keys(data[0]) : [];
+  
+  return (
+    <div style={{width: '100%', height: '400px', padding: '16px', overflowY: 'auto'}}>
+      <h2 style={{fontSize: '1.25rem', fontWeight: 'bold', marginBottom: '16px', textAlign: 'center'}}>Your Table Title</h2>
+      <table style={{width: '100%', borderCollapse: 'collapse'}}>
+        <thead>
+          <tr>{columns.map(col => <th key={col} style={{textAlign: 'left', padding: '8px', borderBottom: '2px solid #ddd'}}>{col}</th>)}</tr>
+        </thead>
+        <tbody>
+          {data.map((row, i) => (
+            <tr key={i}>{columns.map(col => <td key={col} style={{padding: '8px', borderBottom: '1px solid #eee'}}>{row[col]}</td>)}</tr>
+          ))}
+        </tbody>
+      </table>
+    </div>
+  );
+};
+"""),
+}
+
+# Per-request part of the prompt, sent as the user message
+COMPONENT_REQUEST_TEMPLATE = """USER REQUEST: "{user_prompt}"
+
+DATA TO VISUALIZE (sample; all {total} rows are in chartData):
+{data_sample}
+
+{data_description}
+"""
+
+# Prepended to every generated component: the chart data as a JSON literal
+CHART_DATA_PRELUDE = """const chartData = %(data_literal)s;
+
+"""
+
+# Error component shown when generation fails (inline styles only); filled with
+# %-formatting: data_literal and error_literal are JSON literals
+FALLBACK_COMPONENT_TEMPLATE = """const ErrorChart = () => {
+  const data = %(data_literal)s;
+  
+  return (
+    <div style={{
+      width: '100%%',
+      height: '100%%',
+      display: 'flex',
+      alignItems: 'center',
+      justifyContent: 'center',
+      padding: '1rem'
+    }}>
+      <div style={{
+        textAlign: 'center',
+        maxWidth: '32rem',
+        backgroundColor: '#fee2e2',
+        border: '1px solid #fecaca',
+        borderRadius: '0.5rem',
+        padding: '2rem'
+      }}>
+        <div style={{fontSize: '2rem', marginBottom: '1rem'}}>⚠️</div>
+        <div style={{fontSize: '1.125rem', fontWeight: '600', color: '#b91c1c', marginBottom: '0.5rem'}}>
+          Chart Generation Error
+        </div>
+        <div style={{fontSize: '0.875rem', color: '#7f1d1d', marginBottom: '1rem', backgroundColor: '#fef2f2', padding: '0.75rem', borderRadius: '0.25rem'}}>
+          {%(error_literal)s}
+        </div>
+        {data && data.length > 0 && (
+          <div style={{
+            backgroundColor: '#dbeafe',
+            border: '1px solid #93c5fd',
+            borderRadius: '0.5rem',
+            padding: '1rem',
+            marginTop: '1rem',
+            textAlign: 'left'
+          }}>
+            <h4 style={{fontWeight: '500', color: '#1e40af', marginBottom: '0.5rem'}}>
+              Available Data Preview:
+            </h4>
+            <div style={{
+              fontSize: '0.75rem',
+              fontFamily: 'monospace',
+              backgroundColor: 'white',
+              padding: '0.5rem',
+              borderRadius: '0.25rem',
+              overflow: 'auto',
+              maxHeight: '8rem'
+            }}>
+              <pre>{JSON.stringify(data.slice(0, 3), null, 2)}</pre>
+            </div>
+            {data.length > 3 && (
+              <div style={{fontSize: '0.75rem', color: '#2563eb', marginTop: '0.5rem'}}>
+                ... and {data.length - 3} more rows
+              </div>
+            )}
+          </div>
+        )}
+        <div style={{marginTop: '1rem', fontSize: '0.75rem', color: '#6b7280'}}>
+          Try rephrasing your prompt or check the data source
+        </div>
+      </div>
+    </div>
+  );
+};"""
@@ -1,4 +1,4 @@
-from .db_manager import DatabaseManager
+from .db_manager import DatabaseManager, get_shared_db_manager
 from .schema_analyzer import SchemaAnalyzer
 
-__all__ = ['DatabaseManager', 'SchemaAnalyzer']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'get_shared_db_manager', 'SchemaAnalyzer']
\ No newline at end of file
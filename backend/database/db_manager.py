@@ -1,10 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+import gc
 import sqlite3
+import threading
 import pandas as pd
 import os
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 import re
 
+from utils import sniff_csv
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import adbc_driver_sqlite.dbapi as adbc_sqlite
+    HAS_ARROW_INGEST = True
+except ImportError:
+    HAS_ARROW_INGEST = False
+
+# Name cleaning is pure and sees the same stems/headers repeatedly, so it is memoized
+@lru_cache(maxsize=4096)
+def generate_table_name(file_stem: str) -> str:
+    """Generate valid SQL table name from file name"""
+    # Remove special characters and spaces
+    table_name = re.sub(r'[^a-zA-Z0-9_]', '_', file_stem)
+    
+    # Ensure it starts with letter or underscore
+    if not table_name[0].isalpha() and table_name[0] != '_':
+        table_name = 'table_' + table_name
+    
+    return table_name.lower()
+
+def clean_column_name(col_name: str) -> str:
+    """Clean a single column name for SQL compatibility (scalar form of clean_column_names)"""
+    # Replace spaces and special characters with underscores
+    clean_name = re.sub(r'[^a-zA-Z0-9_]', '_', str(col_name))
+    
+    # Remove consecutive underscores
+    clean_name = re.sub(r'_+', '_', clean_name)
+    
+    # Remove leading/trailing underscores
+    clean_name = clean_name.strip('_')
+    
+    # Ensure it starts with letter or underscore
+    if clean_name and not clean_name[0].isalpha() and clean_name[0] != '_':
+        clean_name = 'col_' + clean_name
+    
+    # Handle empty names
+    if not clean_name:
+        clean_name = 'unnamed_column'
+    
+    return clean_name.lower()
+
+@lru_cache(maxsize=4096)
+def clean_column_names(columns: Tuple) -> Tuple[str, ...]:
+    """Vectorized clean_column_name over a whole header (pandas string kernels)"""
+    names = pd.Series(columns, dtype=object).astype(str)
+    
+    names = (
+        names.str.replace(r'[^a-zA-Z0-9_]', '_', regex=True)
+             .str.replace(r'_+', '_', regex=True)
+             .str.strip('_')
+    )
+    
+    # Ensure it starts with letter or underscore, and handle empty names
+    names = names.mask(names.str.match(r'[^a-zA-Z_]'), 'col_' + names)
+    names = names.mask(names == '', 'unnamed_column')
+    
+    return tuple(names.str.lower().tolist())
+
+# Metadata upsert, shared by single and batch loads (sqlite3 caches the
+# prepared statement on the long-lived connection)
+_FILE_METADATA_UPSERT = """
+    INSERT OR REPLACE INTO file_metadata 
+    (file_name, file_path, table_name, row_count, column_count, description)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+# Rows pulled from the cursor per fetchmany when reading results by column
+FETCH_BATCH_SIZE = 10_000
+
+# Actions generated SQL may perform: plain reads only
+_READ_ONLY_ACTIONS = {sqlite3.SQLITE_SELECT, sqlite3.SQLITE_READ, sqlite3.SQLITE_FUNCTION, sqlite3.SQLITE_RECURSIVE}
+
+def _read_only_authorizer(action: int, *args) -> int:
+    """sqlite3 authorizer that denies anything but reads"""
+    return sqlite3.SQLITE_OK if action in _READ_ONLY_ACTIONS else sqlite3.SQLITE_DENY
+
 class DatabaseManager:
     """Manage SQLite database operations for loading CSV/Excel data"""
     
@@ -15,12 +99,54 @@ class DatabaseManager:
         # Create data directory if it doesn't exist
         os.makedirs(self.db_dir, exist_ok=True)
         
+        # One long-lived connection per manager, shared across threads under a
+        # lock; a larger statement cache keeps retried/refreshed queries compiled
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=256)
+        self._lock = threading.RLock()
+        self._configure_connection(self._conn)
+        
+        # Generated queries run on per-thread read connections instead, so
+        # independent queries execute in parallel (WAL readers never block)
+        self._readers = threading.local()
+        
         # Initialize database
         self.init_database()
     
+    def _configure_connection(self, conn: sqlite3.Connection):
+        """Apply the per-connection performance PRAGMAs"""
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA mmap_size=268435456")
+    
+    def _read_connection(self) -> sqlite3.Connection:
+        """
+        This thread's read-only connection (opened on first use)
+        
+        It lives as long as the thread, so queries should run on long-lived
+        threads (QueryExecutor uses one fixed pool) rather than per-call ones.
+        """
+        conn = getattr(self._readers, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, cached_statements=256)
+            self._configure_connection(conn)
+            conn.set_authorizer(_read_only_authorizer)
+            self._readers.conn = conn
+        return conn
+    
+    @contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        """Shared connection; commits on success and rolls back on error"""
+        with self._lock:
+            with self._conn:
+                yield self._conn
+    
     def init_database(self):
         """Initialize SQLite database with metadata table"""
-        with sqlite3.connect(self.db_path) as conn:
+        # WAL is persistent in the database file: readers never block on ingest
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # Create metadata table to track loaded files
@@ -37,6 +163,17 @@ class DatabaseManager:
                 )
             """)
             
+            # Keep table_name lookups (get_all_tables, delete_table) on a unique
+            # index. One-time migration for databases created before it existed:
+            # they may hold several rows per table, of which the latest load wins
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type='index' AND name='idx_meta_table'")
+            if cursor.fetchone() is None:
+                cursor.execute("""
+                    DELETE FROM file_metadata
+                    WHERE id NOT IN (SELECT MAX(id) FROM file_metadata GROUP BY table_name)
+                """)
+                cursor.execute("CREATE UNIQUE INDEX idx_meta_table ON file_metadata(table_name)")
+            
             conn.commit()
     
     def load_file_to_database(self, file_path: str, table_name: Optional[str] = None) -> Dict[str, Any]:
@@ -50,6 +187,47 @@ class DatabaseManager:
         Returns:
             Dict with loading results
         """
+        result = self._load_table(file_path, table_name)
+        
+        # Update metadata
+        with self._connection() as conn:
+            conn.execute(_FILE_METADATA_UPSERT, self._metadata_row(result))
+        
+        return result
+    
+    def load_files_to_database(self, file_paths: List[str], max_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Load several CSV/Excel files, parsing them concurrently
+        
+        Parsing runs in a thread pool (the pandas/Arrow parsers release the
+        GIL); writes are serialized on the shared connection and all metadata
+        rows are upserted in one transaction.
+        
+        Args:
+            file_paths: Paths to the files
+            max_workers: Thread pool size (defaults to ThreadPoolExecutor's)
+            
+        Returns:
+            Loading results for every file that loaded successfully
+        """
+        results = []
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(self._load_table, file_path): file_path for file_path in file_paths}
+            
+            for future in as_completed(futures):
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    print(f"❌ Error loading {futures[future]}: {e}")
+        
+        with self._connection() as conn:
+            conn.executemany(_FILE_METADATA_UPSERT, [self._metadata_row(result) for result in results])
+        
+        return results
+    
+    def _load_table(self, file_path: str, table_name: Optional[str] = None) -> Dict[str, Any]:
+        """Load one file into its table (without touching file_metadata)"""
         path = Path(file_path)
         
         if not path.exists():
@@ -59,78 +237,155 @@ class DatabaseManager:
         if table_name is None:
             table_name = self._generate_table_name(path.stem)
         
+        # Fast path: multithreaded Arrow CSV parser + ADBC bulk ingest
+        loaded = None
+        if HAS_ARROW_INGEST and path.suffix.lower() == '.csv':
+            try:
+                loaded = self._ingest_csv_arrow(file_path, table_name)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, UnicodeDecodeError, adbc_sqlite.Error) as e:
+                print(f"Arrow ingest failed, falling back to pandas: {e}")
+        
+        if loaded is None:
+            loaded = self._ingest_dataframe(file_path, table_name)
+        
+        row_count, columns, sample_data = loaded
+        
+        return {
+            'table_name': table_name,
+            'file_name': path.name,
+            'file_path': str(path.absolute()),
+            'row_count': row_count,
+            'column_count': len(columns),
+            'columns': columns,
+            'sample_data': sample_data
+        }
+    
+    def _metadata_row(self, result: Dict[str, Any]) -> Tuple:
+        """Parameters for _FILE_METADATA_UPSERT from a loading result"""
+        return (
+            result['file_name'],
+            result['file_path'],
+            result['table_name'],
+            result['row_count'],
+            result['column_count'],
+            f"Data loaded from {result['file_name']}"
+        )
+    
+    def _ingest_dataframe(self, file_path: str, table_name: str) -> Tuple[int, List[str], List[Dict[str, Any]]]:
+        """
+        Load a file through pandas and df.to_sql
+        
+        Returns:
+            (row_count, column names, first rows as records)
+        """
         # Read file into DataFrame
         df = self._read_file(file_path)
         
         # Clean column names for SQL compatibility
-        df.columns = [self._clean_column_name(col) for col in df.columns]
+        df.columns = self._clean_column_names(df.columns)
         
         # Load into SQLite
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             # Drop table if exists (for reloading)
-            conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+            conn.execute(f"DROP TABLE IF EXISTS {self._quote_identifier(table_name)}")
             
             # Load data
             df.to_sql(table_name, conn, index=False, if_exists='replace')
-            
-            # Update metadata
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO file_metadata 
-                (file_name, file_path, table_name, row_count, column_count, description)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (
-                path.name,
-                str(path.absolute()),
-                table_name,
-                len(df),
-                len(df.columns),
-                f"Data loaded from {path.name}"
-            ))
-            
             conn.commit()
         
-        return {
-            'table_name': table_name,
-            'file_name': path.name,
-            'row_count': len(df),
-            'column_count': len(df.columns),
-            'columns': list(df.columns),
-            'sample_data': df.head(3).to_dict('records')
+        loaded = (len(df), list(df.columns), df.head(3).to_dict('records'))
+        
+        # Release the DataFrame now rather than when the caller's frame ends
+        del df
+        gc.collect()
+        
+        return loaded
+    
+    def _ingest_csv_arrow(self, file_path: str, table_name: str) -> Tuple[int, List[str], List[Dict[str, Any]]]:
+        """
+        Load a CSV with pyarrow's CSV reader and ADBC bulk ingest (no per-row Python work)
+        
+        Returns:
+            (row_count, column names, first rows as records)
+        """
+        encoding, sep = self._sniff_csv(file_path)
+        
+        read_options = pa_csv.ReadOptions(use_threads=True, encoding=encoding)
+        parse_options = pa_csv.ParseOptions(delimiter=sep)
+        
+        # pandas keeps dates and times as the text in the file; read the columns
+        # Arrow would parse as such (inferred from the first block) as strings
+        # so they are stored exactly as written
+        schema = pa_csv.open_csv(file_path, read_options=read_options, parse_options=parse_options).schema
+        text_columns = {
+            field.name: pa.string()
+            for field in schema
+            if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type) or pa.types.is_time(field.type)
         }
+        
+        tbl = pa_csv.read_csv(
+            file_path,
+            read_options=read_options,
+            parse_options=parse_options,
+            # Empty fields are missing values (NULL), as with pd.read_csv
+            convert_options=pa_csv.ConvertOptions(column_types=text_columns, strings_can_be_null=True)
+        )
+        tbl = tbl.rename_columns(self._clean_column_names(tbl.column_names))
+        
+        # Hold the lock across both connections so concurrent loads never
+        # contend for SQLite's write lock
+        with self._lock:
+            with self._connection() as conn:
+                # Drop table if exists (for reloading)
+                conn.execute(f"DROP TABLE IF EXISTS {self._quote_identifier(table_name)}")
+                conn.commit()
+            
+            with adbc_sqlite.connect(self.db_path) as conn:
+                with conn.cursor() as cursor:
+                    cursor.adbc_ingest(table_name, tbl, mode="create")
+                conn.commit()
+        
+        loaded = (tbl.num_rows, tbl.column_names, tbl.slice(0, 3).to_pylist())
+        
+        # Release the Arrow buffers now rather than when the caller's frame ends
+        del tbl
+        gc.collect()
+        
+        return loaded
     
     def get_table_schema(self, table_name: str) -> Dict[str, Any]:
         """Get detailed schema information for a table"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # Get table info
-            cursor.execute(f"PRAGMA table_info({table_name})")
+            cursor.execute(f"PRAGMA table_info({self._quote_identifier(table_name)})")
             columns_info = cursor.fetchall()
             
             if not columns_info:
                 raise ValueError(f"Table {table_name} not found")
             
             # Get sample data
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT 5")
+            cursor.execute(f"SELECT * FROM {self._quote_identifier(table_name)} LIMIT 5")
             sample_rows = cursor.fetchall()
             
-            # Get row count
-            cursor.execute(f"SELECT COUNT(*) FROM {table_name}")
-            row_count = cursor.fetchone()[0]
+            # Row count and per-column statistics in a single table scan
+            select_parts = ["COUNT(*)"]
+            for col_info in columns_info:
+                quoted = self._quote_identifier(col_info[1])
+                select_parts.append(f"COUNT(DISTINCT {quoted}), COUNT({quoted})")
+            
+            cursor.execute(f"SELECT {', '.join(select_parts)} FROM {self._quote_identifier(table_name)}")
+            stats = cursor.fetchone()
+            row_count = stats[0]
             
             # Format column information
             columns = []
-            for col_info in columns_info:
+            for i, col_info in enumerate(columns_info):
                 col_name = col_info[1]
                 col_type = col_info[2]
-                
-                # Get column statistics
-                cursor.execute(f"SELECT COUNT(DISTINCT {col_name}) FROM {table_name}")
-                unique_count = cursor.fetchone()[0]
-                
-                cursor.execute(f"SELECT COUNT({col_name}) FROM {table_name} WHERE {col_name} IS NOT NULL")
-                non_null_count = cursor.fetchone()[0]
+                unique_count = stats[1 + 2 * i]
+                non_null_count = stats[2 + 2 * i]
                 
                 columns.append({
                     'name': col_name,
@@ -149,30 +404,75 @@ class DatabaseManager:
             }
     
     def execute_query(self, query: str) -> List[Dict[str, Any]]:
-        """Execute SQL query and return results"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row  # Enable column access by name
-            cursor = conn.cursor()
-            
-            cursor.execute(query)
-            rows = cursor.fetchall()
-            
-            # Convert to list of dictionaries
-            return [dict(row) for row in rows]
+        """Execute a read-only SQL query and return rows as dictionaries"""
+        columns, rows = self.execute_query_rows(query)
+        return [dict(zip(columns, row)) for row in rows]
+    
+    def execute_query_rows(self, query: str) -> Tuple[List[str], List[Tuple]]:
+        """
+        Execute a read-only SQL query and return (column names, row tuples)
+        
+        Rows are sqlite3's plain tuples, so no per-row dict is built; column
+        names come from the cursor and are known even for empty results.
+        Generated SQL runs on the calling thread's read connection, under an
+        authorizer that only permits reads, so it can never modify or drop
+        tables and concurrent queries do not wait on each other.
+        """
+        cursor = self._read_connection().execute(query)
+        rows = cursor.fetchall()
+        
+        columns = [description[0] for description in cursor.description or ()]
+        return columns, rows
+    
+    def execute_query_columns(self, query: str, batch_size: int = FETCH_BATCH_SIZE) -> Tuple[List[str], List[List[Any]]]:
+        """
+        Execute a read-only SQL query and return (column names, column values)
+        
+        Results are streamed with fetchmany and each batch is transposed into
+        one list per column, so the full result never exists as row tuples;
+        peak memory is the columns plus a single batch. Runs on the same
+        read-only connection as execute_query_rows.
+        """
+        cursor = self._read_connection().execute(query)
+        columns = [description[0] for description in cursor.description or ()]
+        values: List[List[Any]] = [[] for _ in columns]
+        
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            for column_values, batch_values in zip(values, zip(*batch)):
+                column_values.extend(batch_values)
+        
+        return columns, values
+    
+    def get_schema_signature(self) -> Tuple:
+        """
+        Cheap fingerprint of the loaded tables
+        
+        Returns:
+            Table definitions from sqlite_master plus each table's load id, load
+            time and row count from file_metadata; changes whenever a table is
+            created, reloaded or dropped. Every load upserts a new metadata row,
+            and its AUTOINCREMENT id never repeats, so two loads within the same
+            second (loaded_at's resolution) still differ
+        """
+        with self._connection() as conn:
+            return tuple(conn.execute("""
+                SELECT m.name, m.sql, f.id, f.loaded_at, f.row_count
+                FROM sqlite_master m
+                LEFT JOIN file_metadata f ON f.table_name = m.name
+                WHERE m.type='table' AND m.name != 'file_metadata' AND m.name NOT LIKE 'sqlite_%'
+                ORDER BY m.name
+            """).fetchall())
     
     def get_all_tables(self) -> List[Dict[str, Any]]:
         """Get information about all tables in database"""
-        with sqlite3.connect(self.db_path) as conn:
+        with self._connection() as conn:
             cursor = conn.cursor()
             
             # Get all user tables (exclude metadata)
-            cursor.execute("""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name != 'file_metadata'
-                ORDER BY name
-            """)
-            
-            table_names = [row[0] for row in cursor.fetchall()]
+            table_names = self._user_tables(cursor)
             
             tables_info = []
             for table_name in table_names:
@@ -210,14 +510,12 @@ class DatabaseManager:
         path = Path(file_path)
         
         if path.suffix.lower() == '.csv':
-            # Try different encodings and separators
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                for sep in [',', ';', '\t']:
-                    try:
-                        return pd.read_csv(file_path, encoding=encoding, sep=sep)
-                    except:
-                        continue
-            raise ValueError("Could not read CSV file")
+            # Detect encoding and delimiter from the head of the file, then parse once
+            encoding, sep = self._sniff_csv(file_path)
+            try:
+                return pd.read_csv(file_path, encoding=encoding, sep=sep, engine='c', low_memory=False)
+            except (UnicodeDecodeError, pd.errors.ParserError) as e:
+                raise ValueError(f"Could not read CSV file: {e}")
         
         elif path.suffix.lower() in ['.xlsx', '.xls']:
             return pd.read_excel(file_path)
@@ -225,46 +523,44 @@ class DatabaseManager:
         else:
             raise ValueError(f"Unsupported file extension: {path.suffix}")
     
+    def _sniff_csv(self, file_path: str) -> Tuple[str, str]:
+        """Detect a CSV file's (encoding, delimiter); see utils.csv_sniff"""
+        return sniff_csv(file_path)
+    
+    def _user_tables(self, cursor: sqlite3.Cursor) -> List[str]:
+        """Names of all user tables (excludes metadata and SQLite internals)"""
+        cursor.execute("""
+            SELECT name FROM sqlite_master 
+            WHERE type='table' AND name != 'file_metadata' AND name NOT LIKE 'sqlite_%'
+            ORDER BY name
+        """)
+        return [row[0] for row in cursor.fetchall()]
+    
+    def _quote_identifier(self, name: str) -> str:
+        """Quote a table/column name for safe interpolation into SQL"""
+        return '"' + str(name).replace('"', '""') + '"'
+    
     def _generate_table_name(self, file_stem: str) -> str:
         """Generate valid SQL table name from file name"""
-        # Remove special characters and spaces
-        table_name = re.sub(r'[^a-zA-Z0-9_]', '_', file_stem)
-        
-        # Ensure it starts with letter or underscore
-        if not table_name[0].isalpha() and table_name[0] != '_':
-            table_name = 'table_' + table_name
-        
-        return table_name.lower()
+        return generate_table_name(file_stem)
     
-    def _clean_column_name(self, col_name: str) -> str:
-        """Clean column name for SQL compatibility"""
-        # Replace spaces and special characters with underscores
-        clean_name = re.sub(r'[^a-zA-Z0-9_]', '_', str(col_name))
-        
-        # Remove consecutive underscores
-        clean_name = re.sub(r'_+', '_', clean_name)
-        
-        # Remove leading/trailing underscores
-        clean_name = clean_name.strip('_')
-        
-        # Ensure it starts with letter or underscore
-        if clean_name and not clean_name[0].isalpha() and clean_name[0] != '_':
-            clean_name = 'col_' + clean_name
-        
-        # Handle empty names
-        if not clean_name:
-            clean_name = 'unnamed_column'
-        
-        return clean_name.lower()
+    def _clean_column_names(self, columns) -> List[str]:
+        """Clean a whole header (memoized per distinct header)"""
+        return list(clean_column_names(tuple(columns)))
     
     def delete_table(self, table_name: str) -> bool:
         """Delete a table and its metadata"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 
+                # Only user tables loaded from files may be dropped
+                if table_name not in self._user_tables(cursor):
+                    print(f"Error deleting table {table_name}: table not found")
+                    return False
+                
                 # Drop the table
-                cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+                cursor.execute(f"DROP TABLE {self._quote_identifier(table_name)}")
                 
                 # Remove from metadata
                 cursor.execute("DELETE FROM file_metadata WHERE table_name = ?", (table_name,))
@@ -277,6 +573,20 @@ class DatabaseManager:
             return False
         
 
+@lru_cache(maxsize=None)
+def _shared_db_manager(db_path: str, pid: int) -> DatabaseManager:
+    return DatabaseManager(db_path)
+
+def get_shared_db_manager(db_path: str = "data/prototype.db") -> DatabaseManager:
+    """
+    DatabaseManager shared by every component in this process
+    
+    Keeps one warm connection (page cache, compiled statements) per database
+    instead of a new one per QueryExecutor/SchemaAnalyzer. Keyed by process id
+    so forked workers never reuse a parent's connection.
+    """
+    return _shared_db_manager(db_path, os.getpid())
+
 if __name__ == "__main__":
 
     db_manager = DatabaseManager()  # This creates data/prototype.db automatically
@@ -1,17 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 import groq
-from typing import Dict, Any, List
+import hashlib
+import logging
+import orjson
+import time
+from typing import Dict, Any, List, Tuple
 import os
 from dotenv import load_dotenv
-from .db_manager import DatabaseManager
+from utils import cached_llm_section, compact_sample_rows, get_settings, groq_retry, is_skippable_llm_error
+from .db_manager import DatabaseManager, get_shared_db_manager
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Column insights are requested in one JSON batch; wider tables are split into
+# groups (run concurrently) because output tokens grow with every column
+COLUMN_BATCH_LIMIT = 20
+COLUMN_GROUP_SIZE = 15
+TOKENS_PER_COLUMN_INSIGHT = 150
+
+# Columns detailed in the table description prompt; the rest are only counted
+DESCRIPTION_MAX_COLUMNS = 60
+
+# How long a schema analysis is reused while the schema signature is unchanged
+SCHEMA_CACHE_TTL = int(os.getenv('SCHEMA_CACHE_TTL', '300'))
+
 class SchemaAnalyzer:
     """Analyze database schema and generate LLM-friendly context"""
     
+    # db_path -> (schema signature, analyzed at, analysis, prompt context,
+    # prompt context fingerprint); shared by every analyzer in the process
+    # since callers create one per request
+    _schema_cache: Dict[str, Tuple[Tuple, float, Dict[str, Any], str, str]] = {}
+    
     def __init__(self, db_manager: DatabaseManager = None):
-        self.client = groq.Groq(api_key=os.getenv('GROQ_API_KEY'))
-        self.db_manager = db_manager or DatabaseManager()
+        self.db_manager = db_manager or get_shared_db_manager()
+    
+    @cached_property
+    def client(self) -> groq.Groq:
+        """
+        Groq client, created on the first LLM request
+        
+        Query patterns, SQL examples, relationships and cached analyses need no
+        LLM, so analyzers that only use those never open an HTTP client.
+        Retries are handled by _complete.
+        """
+        return groq.Groq(api_key=get_settings().groq_api_key, max_retries=0)
+    
+    def refresh(self):
+        """Drop the cached schema analysis so the next request re-analyzes"""
+        self._schema_cache.pop(self.db_manager.db_path, None)
+    
+    def get_schema_analysis(self) -> Dict[str, Any]:
+        """
+        Schema analysis, reused while the schema signature is unchanged
+        
+        Returns:
+            Result of analyze_complete_schema, cached for up to SCHEMA_CACHE_TTL seconds
+        """
+        return self._cached_schema()[2]
+    
+    def get_prompt_context(self) -> Tuple[str, str]:
+        """
+        Prompt context for the current schema and a fingerprint of it
+        
+        Both are built once per schema analysis, so requests over an unchanged
+        schema reuse the same string and fingerprint.
+        
+        Returns:
+            (context string for prompt enhancement, 32-character hex fingerprint)
+        """
+        _, _, _, context, fingerprint = self._cached_schema()
+        return context, fingerprint
+    
+    def _cached_schema(self) -> Tuple[Tuple, float, Dict[str, Any], str, str]:
+        """Cache entry for the database, re-analyzed when the signature changes or the TTL expires"""
+        signature = self.db_manager.get_schema_signature()
+        cached = self._schema_cache.get(self.db_manager.db_path)
+        
+        if cached and cached[0] == signature and time.monotonic() - cached[1] < SCHEMA_CACHE_TTL:
+            return cached
+        
+        analysis = self.analyze_complete_schema()
+        context = self._format_prompt_context(analysis)
+        fingerprint = hashlib.blake2b(context.encode(), digest_size=16).hexdigest()
+        entry = (signature, time.monotonic(), analysis, context, fingerprint)
+        self._schema_cache[self.db_manager.db_path] = entry
+        return entry
     
     def analyze_complete_schema(self) -> Dict[str, Any]:
         """
@@ -68,14 +145,18 @@ class SchemaAnalyzer:
             'sql_examples': self._generate_sql_examples(schema)
         }
     
+    @cached_llm_section
     def _generate_table_description(self, schema: Dict[str, Any]) -> str:
         """Generate table description using LLM"""
+        columns = schema['columns']
         columns_info = "\n".join([
             f"- {col['name']} ({col['type']}): {col['unique_count']} unique values, {col['non_null_count']} non-null"
-            for col in schema['columns']
+            for col in columns[:DESCRIPTION_MAX_COLUMNS]
         ])
+        if len(columns) > DESCRIPTION_MAX_COLUMNS:
+            columns_info += f"\n- ...and {len(columns) - DESCRIPTION_MAX_COLUMNS} more columns"
         
-        sample_data_str = str(schema['sample_data'][:2])
+        sample_data_str = str(compact_sample_rows(schema['sample_data']))
         
         prompt = f"""
         Analyze this database table and provide a clear business description:
@@ -98,54 +179,97 @@ class SchemaAnalyzer:
         Focus on business value and use cases.
         """
         
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=300
+        return self._complete(prompt, max_tokens=300).strip()
+    
+    @cached_llm_section
+    def _generate_column_insights(self, schema: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Generate insights for key columns (batched into as few requests as possible)"""
+        # Focus on important columns (high uniqueness or key patterns)
+        columns = [
+            col for col in schema['columns']
+            if col['unique_count'] > 1 or 'id' in col['name'].lower()
+        ]
+        if not columns:
+            return []
+        
+        group_size = len(columns) if len(columns) <= COLUMN_BATCH_LIMIT else COLUMN_GROUP_SIZE
+        groups = [columns[i:i + group_size] for i in range(0, len(columns), group_size)]
+        
+        if len(groups) == 1:
+            results = [self._generate_column_group_insights(groups[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=len(groups)) as pool:
+                results = list(pool.map(self._generate_column_group_insights, groups))
+        
+        insights = {}
+        for result in results:
+            insights.update(result)
+        
+        return [
+            {'column': col['name'], 'insight': insights[col['name']]}
+            for col in columns
+            if col['name'] in insights
+        ]
+    
+    def _generate_column_group_insights(self, columns: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Generate insights for a group of columns in one JSON request (name -> insight)"""
+        columns_info = "\n".join(
+            f"{i}. {col['name']} (type: {col['type']}, unique values: {col['unique_count']}, "
+            f"non-null count: {col['non_null_count']})"
+            for i, col in enumerate(columns, 1)
         )
         
-        return response.choices[0].message.content.strip()
+        prompt = f"""
+        Analyze these database columns:
+        
+        {columns_info}
+        
+        For each column, in 1-2 sentences, describe:
+        1. What this column likely represents
+        2. How it might be used in queries/analysis
+        
+        Be specific and practical.
+        
+        Respond ONLY as JSON: {{"columns": [{{"name": "<column name>", "insight": "<insight>"}}, ...]}}
+        """
+        
+        try:
+            content = self._complete(prompt, max_tokens=TOKENS_PER_COLUMN_INSIGHT * len(columns), json_mode=True)
+            return {
+                item['name']: str(item['insight']).strip()
+                for item in orjson.loads(content).get('columns', [])
+                if isinstance(item, dict) and 'name' in item and 'insight' in item
+            }
+        except Exception as e:
+            # Rejected prompts and malformed answers only cost these columns;
+            # anything else (auth, exhausted retries) fails the analysis
+            if not is_skippable_llm_error(e):
+                raise
+            logger.warning("Skipping insights for columns %s: %s", [col['name'] for col in columns], e)
+            return {}
     
-    def _generate_column_insights(self, schema: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Generate insights for key columns"""
-        insights = []
+    @groq_retry
+    def _complete(self, prompt: str, max_tokens: int, json_mode: bool = False) -> str:
+        """
+        Send one prompt to Groq (rate limits and dropped connections are retried)
         
-        for col in schema['columns']:
-            # Focus on important columns (high uniqueness or key patterns)
-            if col['unique_count'] > 1 or 'id' in col['name'].lower():
-                prompt = f"""
-                Analyze this database column:
-                
-                Column: {col['name']}
-                Type: {col['type']}
-                Unique values: {col['unique_count']}
-                Non-null count: {col['non_null_count']}
-                
-                In 1-2 sentences, describe:
-                1. What this column likely represents
-                2. How it might be used in queries/analysis
-                
-                Be specific and practical.
-                """
-                
-                try:
-                    response = self.client.chat.completions.create(
-                        model="llama3-8b-8192",
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.3,
-                        max_tokens=150
-                    )
-                    
-                    insights.append({
-                        'column': col['name'],
-                        'insight': response.choices[0].message.content.strip()
-                    })
-                except Exception as e:
-                    print(f"Error generating insight for column {col['name']}: {e}")
-                    continue
-        
-        return insights
+        Args:
+            prompt: User message
+            max_tokens: Completion length cap
+            json_mode: Constrain the completion to a JSON object
+            
+        Returns:
+            Completion text
+        """
+        options = {'response_format': {'type': 'json_object'}} if json_mode else {}
+        response = self.client.chat.completions.create(
+            model="llama-3.1-8b-instant",
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.3,
+            max_tokens=max_tokens,
+            **options
+        )
+        return response.choices[0].message.content
     
     def _generate_query_patterns(self, schema: Dict[str, Any]) -> List[str]:
         """Generate common query patterns for this table"""
@@ -193,14 +317,14 @@ class SchemaAnalyzer:
         
         summary = f"Database contains {len(tables)} tables with {total_rows} total records. Tables: {', '.join(table_names)}"
         
-        # SQL context for LLM
-        sql_context = "AVAILABLE TABLES AND COLUMNS:\n"
+        # SQL context for LLM (collected as parts and joined once)
+        parts = ["AVAILABLE TABLES AND COLUMNS:\n"]
         for analysis in analyses:
-            sql_context += f"\nTable: {analysis['table_name']}\n"
-            sql_context += f"Description: {analysis['description']}\n"
-            sql_context += "Columns:\n"
-            for col in analysis['columns']:
-                sql_context += f"  - {col['name']} ({col['type']})\n"
+            parts.append(f"\nTable: {analysis['table_name']}\n")
+            parts.append(f"Description: {analysis['description']}\n")
+            parts.append("Columns:\n")
+            parts.extend(f"  - {col['name']} ({col['type']})\n" for col in analysis['columns'])
+        sql_context = "".join(parts)
         
         # Query examples
         query_examples = []
@@ -216,24 +340,33 @@ class SchemaAnalyzer:
     
     def _detect_relationships(self, analyses: List[Dict]) -> List[str]:
         """Detect potential relationships between tables"""
-        relationships = []
-        
-        # Simple relationship detection based on column names
-        all_columns = {}
+        # Simple relationship detection based on column names (sets drop
+        # repeats of a column within one table)
+        col_to_tables: Dict[str, set] = {}
+        key_candidates = set()
         for analysis in analyses:
-            table_name = analysis['table_name']
             for col in analysis['columns']:
-                col_name = col['name']
-                if col_name not in all_columns:
-                    all_columns[col_name] = []
-                all_columns[col_name].append(table_name)
+                col_to_tables.setdefault(col['name'], set()).add(analysis['table_name'])
+                if self._is_join_candidate(col):
+                    key_candidates.add(col['name'])
         
         # Find shared columns (potential relationships)
-        for col_name, tables in all_columns.items():
-            if len(tables) > 1:
-                relationships.append(f"Column '{col_name}' appears in tables: {', '.join(tables)}")
+        return [
+            f"Column '{col_name}' appears in tables: {', '.join(sorted(tables))}"
+            for col_name, tables in col_to_tables.items()
+            if len(tables) > 1 and col_name in key_candidates
+        ]
+    
+    def _is_join_candidate(self, col: Dict[str, Any]) -> bool:
+        """
+        Whether a column could be one side of a join
         
-        return relationships
+        Text columns that are not id-like and repeat values (statuses, categories)
+        are shared by coincidence, not keys; a key is unique in at least one table.
+        """
+        if 'id' in col['name'].lower() or col['type'].upper() != 'TEXT':
+            return True
+        return col['unique_count'] == col['non_null_count']
     
     def get_table_context_for_prompt(self, user_prompt: str) -> str:
         """
@@ -245,8 +378,10 @@ class SchemaAnalyzer:
         Returns:
             Formatted context string for prompt enhancement
         """
-        schema_analysis = self.analyze_complete_schema()
-        
+        return self.get_prompt_context()[0]
+    
+    def _format_prompt_context(self, schema_analysis: Dict[str, Any]) -> str:
+        """Prompt enhancement context for a schema analysis"""
         if not schema_analysis['tables']:
             return "No database tables available."
         
@@ -0,0 +1,25 @@
+"""
+Gunicorn configuration for production deployments
+
+Run from the backend directory:
+- gunicorn -c gunicorn_conf.py api.app:app
+
+Chart jobs are processed by separate workers (python -m workers.chart),
+so API processes only handle I/O-bound requests.
+"""
+
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+
+# I/O-bound heuristic: 2 x cores + 1 worker processes
+workers = int(os.getenv("WEB_CONCURRENCY", 2 * (os.cpu_count() or 1) + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# LLM-backed requests run long; the default 30s would kill busy workers
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = "-"
+loglevel = os.getenv("LOG_LEVEL", "info")
@@ -1,10 +1,31 @@
 import chromadb
 from chromadb.config import Settings
+from chromadb.utils import embedding_functions
+import hashlib
 import json
+import logging
+import orjson
+import sqlite3
+import threading
 import uuid
 from typing import Dict, Any, List, Optional
 import os
 
+try:
+    import zstandard
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+# numpy scalars and non-string keys (e.g. common_values) appear in file metadata
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+ZSTD_LEVEL = 3
+
+# Cosine distance under which a cached prompt enhancement is reused (paraphrases)
+ENHANCEMENT_CACHE_DISTANCE = 0.05
+
+logger = logging.getLogger(__name__)
+
 class ChromaManager:
     """Manage ChromaDB operations for knowledge base storage and retrieval"""
     
@@ -20,11 +41,36 @@ class ChromaManager:
             )
         )
         
+        # Chroma's default embedding model, held here so a prompt can be embedded
+        # once and used for both the knowledge base and the enhancement cache
+        self.embedding_function = embedding_functions.DefaultEmbeddingFunction()
+        
         # Create or get collection
         self.collection = self.client.get_or_create_collection(
             name="knowledge_base",
-            metadata={"description": "File-based knowledge base for dashboard generation"}
+            metadata={"description": "File-based knowledge base for dashboard generation"},
+            embedding_function=self.embedding_function
         )
+        
+        # Previous enhancement results, found by prompt similarity
+        self.enhancement_cache = self.client.get_or_create_collection(
+            name="enhancement_cache",
+            metadata={"description": "Prompt enhancement results", "hnsw:space": "cosine"},
+            embedding_function=self.embedding_function
+        )
+        
+        # Complete contexts live in one SQLite file keyed by doc_id rather than
+        # one JSON file per document
+        self._contexts = sqlite3.connect(os.path.join(persist_directory, "contexts.db"), check_same_thread=False)
+        self._contexts_lock = threading.Lock()
+        with self._contexts_lock, self._contexts:
+            self._contexts.execute("""
+                CREATE TABLE IF NOT EXISTS contexts (
+                    doc_id TEXT PRIMARY KEY,
+                    payload BLOB NOT NULL,
+                    compressed INTEGER NOT NULL DEFAULT 0
+                )
+            """)
     
     def store_file_context(self, context_data: Dict[str, Any]) -> str:
         """
@@ -36,13 +82,50 @@ class ChromaManager:
         Returns:
             str: Document ID for the stored context
         """
-        doc_id = str(uuid.uuid4())
+        return self.store_file_contexts([context_data])[0]
+    
+    def store_file_contexts(self, contexts: List[Dict[str, Any]]) -> List[str]:
+        """
+        Store several file contexts with a single ChromaDB add
+        
+        The collection embeds everything added in one call as one batch, which
+        is much cheaper than an embedding pass per file.
         
-        # Prepare documents for embedding
+        Args:
+            contexts: Generated contexts from ContextExtractor
+            
+        Returns:
+            Document IDs, in the same order as contexts
+        """
+        doc_ids = []
         documents = []
         metadatas = []
         ids = []
         
+        for context_data in contexts:
+            doc_id = str(uuid.uuid4())
+            doc_ids.append(doc_id)
+            self._append_documents(doc_id, context_data, documents, metadatas, ids)
+        
+        if not ids:
+            return doc_ids
+        
+        # Add to ChromaDB
+        self.collection.add(
+            documents=documents,
+            metadatas=metadatas,
+            ids=ids
+        )
+        
+        # Store complete context as metadata for retrieval
+        for doc_id, context_data in zip(doc_ids, contexts):
+            self._store_complete_context(doc_id, context_data)
+        
+        return doc_ids
+    
+    def _append_documents(self, doc_id: str, context_data: Dict[str, Any],
+                          documents: List[str], metadatas: List[Dict[str, Any]], ids: List[str]):
+        """Append the embeddable documents for one file context"""
         # Store table description
         documents.append(f"Table: {context_data['file_info']['file_name']}\n{context_data['table_description']}")
         metadatas.append({
@@ -83,32 +166,31 @@ class ChromaManager:
             "doc_id": doc_id
         })
         ids.append(f"{doc_id}_queries")
-        
-        # Add to ChromaDB
-        self.collection.add(
-            documents=documents,
-            metadatas=metadatas,
-            ids=ids
-        )
-        
-        # Store complete context as metadata for retrieval
-        self._store_complete_context(doc_id, context_data)
-        
-        return doc_id
     
-    def query_relevant_context(self, query: str, n_results: int = 5) -> List[Dict[str, Any]]:
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a prompt with the knowledge base's embedding model"""
+        return self.embedding_function([query])[0]
+    
+    def query_relevant_context(self, query: str, n_results: int = 5,
+                               query_embedding: Optional[List[float]] = None) -> List[Dict[str, Any]]:
         """
         Query ChromaDB for relevant context based on user prompt
         
         Args:
             query: User's natural language query
             n_results: Number of results to return
+            query_embedding: Embedding of query from embed_query, if already computed
             
         Returns:
             List of relevant context documents
         """
+        # Explicit None check: embedding functions may return numpy arrays,
+        # which have no truth value
+        if query_embedding is None:
+            query_embedding = self.embed_query(query)
+        
         results = self.collection.query(
-            query_texts=[query],
+            query_embeddings=[query_embedding],
             n_results=n_results,
             include=["documents", "metadatas", "distances"]
         )
@@ -123,6 +205,62 @@ class ChromaManager:
         
         return relevant_contexts
     
+    def find_cached_enhancement(self, query_embedding: List[float], schema_fingerprint: str,
+                                max_distance: float = ENHANCEMENT_CACHE_DISTANCE) -> Optional[Dict[str, Any]]:
+        """
+        Look up an enhancement made for the same or a paraphrased prompt
+        
+        Args:
+            query_embedding: Embedding of the user prompt (embed_query)
+            schema_fingerprint: Fingerprint of the data context the result was built from;
+                results for other schemas never match
+            max_distance: Largest cosine distance accepted as the same question
+            
+        Returns:
+            Stored result dict, or None
+        """
+        if not self.enhancement_cache.count():
+            return None
+        
+        try:
+            results = self.enhancement_cache.query(
+                query_embeddings=[query_embedding],
+                n_results=1,
+                where={"schema_fingerprint": schema_fingerprint},
+                include=["metadatas", "distances"]
+            )
+        except Exception as e:
+            # Chroma raises when no entry matches the filter
+            logger.debug("Enhancement cache lookup failed: %s", e)
+            return None
+        
+        if not results['ids'][0] or results['distances'][0][0] > max_distance:
+            return None
+        
+        return orjson.loads(results['metadatas'][0][0]['result'])
+    
+    def cache_enhancement(self, prompt: str, query_embedding: List[float], schema_fingerprint: str,
+                          result: Dict[str, Any]):
+        """
+        Store an enhancement result for find_cached_enhancement
+        
+        Args:
+            prompt: User prompt
+            query_embedding: Embedding of the prompt (embed_query)
+            schema_fingerprint: Fingerprint of the data context the result was built from
+            result: JSON-serializable enhancement result
+        """
+        entry_id = hashlib.blake2b(f"{schema_fingerprint}:{prompt}".encode(), digest_size=16).hexdigest()
+        self.enhancement_cache.upsert(
+            ids=[entry_id],
+            embeddings=[query_embedding],
+            documents=[prompt],
+            metadatas=[{
+                "schema_fingerprint": schema_fingerprint,
+                "result": orjson.dumps(result, default=str, option=_ORJSON_OPTS).decode()
+            }]
+        )
+    
     def get_file_context(self, file_name: str) -> Optional[Dict[str, Any]]:
         """
         Get complete context for a specific file
@@ -133,14 +271,15 @@ class ChromaManager:
         Returns:
             Complete context data or None if not found
         """
-        results = self.collection.query(
-            query_texts=[f"file:{file_name}"],
+        # Metadata lookup only: no query embedding or vector search needed to find the doc_id
+        results = self.collection.get(
             where={"file_name": file_name},
-            n_results=1
+            limit=1,
+            include=["metadatas"]
         )
         
-        if results['documents'][0]:
-            doc_id = results['metadatas'][0][0]['doc_id']
+        if results['ids']:
+            doc_id = results['metadatas'][0]['doc_id']
             return self._get_complete_context(doc_id)
         
         return None
@@ -187,8 +326,12 @@ class ChromaManager:
                 # Delete from ChromaDB
                 self.collection.delete(ids=results['ids'])
                 
-                # Delete complete context file
+                # Delete complete context
                 doc_id = results['metadatas'][0]['doc_id']
+                with self._contexts_lock, self._contexts:
+                    self._contexts.execute("DELETE FROM contexts WHERE doc_id = ?", (doc_id,))
+                
+                # Contexts stored before the SQLite table were JSON files
                 context_file = os.path.join(self.persist_directory, f"{doc_id}_context.json")
                 if os.path.exists(context_file):
                     os.remove(context_file)
@@ -197,19 +340,41 @@ class ChromaManager:
             
             return False
         except Exception as e:
-            print(f"Error deleting file context: {e}")
+            logger.exception("Error deleting file context for %s", file_name)
             return False
     
     def _store_complete_context(self, doc_id: str, context_data: Dict[str, Any]):
-        """Store complete context data as JSON file for full retrieval"""
-        context_file = os.path.join(self.persist_directory, f"{doc_id}_context.json")
-        with open(context_file, 'w') as f:
-            json.dump(context_data, f, indent=2, default=str)
+        """Store complete context data (orjson, zstd-compressed when available) for full retrieval"""
+        payload = orjson.dumps(context_data, default=str, option=_ORJSON_OPTS)
+        if HAS_ZSTD:
+            payload = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload)
+        
+        with self._contexts_lock, self._contexts:
+            self._contexts.execute(
+                "INSERT OR REPLACE INTO contexts (doc_id, payload, compressed) VALUES (?, ?, ?)",
+                (doc_id, payload, int(HAS_ZSTD))
+            )
     
     def _get_complete_context(self, doc_id: str) -> Optional[Dict[str, Any]]:
-        """Retrieve complete context data from JSON file"""
-        context_file = os.path.join(self.persist_directory, f"{doc_id}_context.json")
-        if os.path.exists(context_file):
-            with open(context_file, 'r') as f:
-                return json.load(f)
-        return None
\ No newline at end of file
+        """Retrieve complete context data stored by _store_complete_context"""
+        with self._contexts_lock:
+            row = self._contexts.execute(
+                "SELECT payload, compressed FROM contexts WHERE doc_id = ?", (doc_id,)
+            ).fetchone()
+        
+        if row is None:
+            # Contexts stored before the SQLite table were JSON files
+            context_file = os.path.join(self.persist_directory, f"{doc_id}_context.json")
+            if os.path.exists(context_file):
+                with open(context_file, 'r') as f:
+                    return json.load(f)
+            return None
+        
+        payload, compressed = row
+        if compressed:
+            if not HAS_ZSTD:
+                logger.error("Context %s is zstd-compressed but zstandard is not installed", doc_id)
+                return None
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        
+        return orjson.loads(payload)
@@ -0,0 +1,297 @@
+"""
+Streaming column statistics for files too large to load at once
+
+FileParser feeds CSV chunks through FrameStats, which keeps running aggregates
+per column (counts, min/max, mean/std merged chunk by chunk, string lengths,
+most common values) plus fixed-size sketches for distinct counts and quartiles.
+Peak memory is one chunk plus the sketches instead of the whole file.
+"""
+
+from collections import Counter
+import math
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Distinct values counted exactly (as 64-bit hashes) before switching to HyperLogLog
+EXACT_DISTINCT_LIMIT = 10_000
+
+# 2**14 HyperLogLog registers: 16 KB per column, ~0.8% standard error
+HLL_PRECISION = 14
+
+# Values sampled per numeric column to estimate quartiles
+QUANTILE_SAMPLE_SIZE = 10_000
+
+# Distinct values kept per text column while tracking the most common ones
+TOP_VALUES_CAPACITY = 1_000
+
+_NUMERIC_DTYPES = ('int64', 'float64')
+
+def _leading_zeros(values: np.ndarray) -> np.ndarray:
+    """Count leading zero bits of each (non-zero) uint64"""
+    zeros = np.zeros(values.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        small = values < (np.uint64(1) << np.uint64(64 - shift))
+        zeros[small] += shift
+        values = np.where(small, values << np.uint64(shift), values)
+    return zeros
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: spread Python hashes (hash(1) == 1) over all 64 bits"""
+    with np.errstate(over='ignore'):
+        values = values ^ (values >> np.uint64(30))
+        values = values * np.uint64(0xbf58476d1ce4e5b9)
+        values = values ^ (values >> np.uint64(27))
+        values = values * np.uint64(0x94d049bb133111eb)
+        return values ^ (values >> np.uint64(31))
+
+def _hash_values(values: pd.Series) -> np.ndarray:
+    """64-bit hashes of non-null values (numbers hashed as floats so 1 and 1.0 match)"""
+    if values.dtype == 'object':
+        # Python's cached str hashes are much cheaper than hash_pandas_object,
+        # which factorizes (builds the very hash set we're avoiding) first
+        hashes = np.fromiter(map(hash, values.to_numpy()), dtype=np.int64, count=len(values))
+        return _mix64(hashes.view(np.uint64))
+
+    if pd.api.types.is_numeric_dtype(values.dtype) and not pd.api.types.is_bool_dtype(values.dtype):
+        values = values.astype('float64')
+    return pd.util.hash_pandas_object(values, index=False).to_numpy()
+
+class DistinctCounter:
+    """Distinct count: exact up to a limit (0 = always estimate), HyperLogLog beyond it"""
+
+    def __init__(self, exact_limit: int = EXACT_DISTINCT_LIMIT, precision: int = HLL_PRECISION):
+        self.exact_limit = exact_limit
+        self.precision = precision
+        self._hashes = np.empty(0, dtype=np.uint64)
+        self._registers: Optional[np.ndarray] = None
+
+    def update(self, values: pd.Series):
+        """Add a column (or chunk of one); nulls are ignored"""
+        hashes = _hash_values(values.dropna())
+
+        if self._registers is None and self.exact_limit:
+            self._hashes = np.unique(np.concatenate([self._hashes, hashes]))
+            if len(self._hashes) <= self.exact_limit:
+                return
+
+            # Too many to track exactly: fold what we have into the sketch
+            hashes, self._hashes = self._hashes, np.empty(0, dtype=np.uint64)
+
+        if self._registers is None:
+            self._registers = np.zeros(1 << self.precision, dtype=np.uint8)
+
+        p = np.uint64(self.precision)
+        buckets = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # The marker bit caps the rank at 65 - p for all-zero remainders
+        remainder = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        np.maximum.at(self._registers, buckets, _leading_zeros(remainder) + 1)
+
+    def count(self) -> int:
+        """Exact distinct count, or the HyperLogLog estimate once past the limit"""
+        if self._registers is None:
+            return len(self._hashes)
+
+        m = len(self._registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self._registers.astype(np.int64)))
+
+        # Small-range correction (linear counting)
+        empty = int(np.count_nonzero(self._registers == 0))
+        if estimate <= 2.5 * m and empty:
+            estimate = m * math.log(m / empty)
+
+        return int(round(estimate))
+
+def approximate_nunique(values: pd.Series) -> int:
+    """HyperLogLog estimate of Series.nunique() in fixed memory"""
+    counter = DistinctCounter(exact_limit=0)
+    counter.update(values)
+    return counter.count()
+
+def _merge_dtypes(current: Optional[np.dtype], new: np.dtype) -> np.dtype:
+    """dtype pandas would infer for the whole column from per-chunk dtypes"""
+    if current is None or current == new:
+        return new
+    if str(current) in _NUMERIC_DTYPES and str(new) in _NUMERIC_DTYPES:
+        return np.dtype('float64')
+    return np.dtype('object')
+
+class ColumnStats:
+    """Running statistics for one column, fed chunk by chunk"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.dtype: Optional[np.dtype] = None
+        self.row_count = 0
+        self.non_null_count = 0
+        self.distinct = DistinctCounter()
+        self.sample_values: List[Any] = []
+
+        # Numeric chunks: count/mean/M2 merged with Chan et al.'s parallel update
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min_value = None
+        self.max_value = None
+        # Uniform sample for quartiles: the values with the smallest random keys
+        self._sample = np.empty(0, dtype=np.float64)
+        self._sample_keys = np.empty(0, dtype=np.float64)
+
+        # Text chunks
+        self.length_total = 0
+        self.length_max = None
+        self.top_values: Counter = Counter()
+
+    def update(self, values: pd.Series, rng: np.random.Generator):
+        """Add one chunk of the column"""
+        self.dtype = _merge_dtypes(self.dtype, values.dtype)
+        self.row_count += len(values)
+
+        non_null = values.dropna()
+        self.non_null_count += len(non_null)
+        self.distinct.update(non_null)
+
+        if len(self.sample_values) < 5:
+            self.sample_values.extend(non_null.head(5 - len(self.sample_values)).tolist())
+
+        if str(values.dtype) in _NUMERIC_DTYPES:
+            self._update_numeric(non_null, rng)
+        elif values.dtype == 'object':
+            self._update_text(values)
+
+    def _update_numeric(self, values: pd.Series, rng: np.random.Generator):
+        n = len(values)
+        if not n:
+            return
+
+        chunk_min, chunk_max = values.min(), values.max()
+        self.min_value = chunk_min if self.min_value is None else min(self.min_value, chunk_min)
+        self.max_value = chunk_max if self.max_value is None else max(self.max_value, chunk_max)
+
+        chunk_mean = float(values.mean())
+        chunk_m2 = float(((values - chunk_mean) ** 2).sum())
+        total = self.numeric_count + n
+        delta = chunk_mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += chunk_m2 + delta * delta * self.numeric_count * n / total
+        self.numeric_count = total
+
+        sample = np.concatenate([self._sample, values.to_numpy(dtype=np.float64)])
+        keys = np.concatenate([self._sample_keys, rng.random(n)])
+        if len(sample) > QUANTILE_SAMPLE_SIZE:
+            keep = np.argpartition(keys, QUANTILE_SAMPLE_SIZE)[:QUANTILE_SAMPLE_SIZE]
+            sample, keys = sample[keep], keys[keep]
+        self._sample, self._sample_keys = sample, keys
+
+    def _update_text(self, values: pd.Series):
+        lengths = values.astype(str).str.len()
+        self.length_total += int(lengths.sum())
+        chunk_max = lengths.max()
+        self.length_max = chunk_max if self.length_max is None else max(self.length_max, chunk_max)
+
+        self.top_values.update(values.value_counts().to_dict())
+        if len(self.top_values) > 2 * TOP_VALUES_CAPACITY:
+            self.top_values = Counter(dict(self.top_values.most_common(TOP_VALUES_CAPACITY)))
+
+    @property
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas)"""
+        return math.sqrt(self.m2 / (self.numeric_count - 1)) if self.numeric_count > 1 else float('nan')
+
+    def numeric_summary(self) -> Dict[str, float]:
+        """Same keys as DataFrame.describe(); quartiles are estimated from a sample"""
+        quartiles = np.quantile(self._sample, [0.25, 0.5, 0.75]) if len(self._sample) else [float('nan')] * 3
+        return {
+            'count': float(self.numeric_count),
+            'mean': self.mean if self.numeric_count else float('nan'),
+            'std': self.std,
+            'min': float(self.min_value) if self.min_value is not None else float('nan'),
+            '25%': float(quartiles[0]),
+            '50%': float(quartiles[1]),
+            '75%': float(quartiles[2]),
+            'max': float(self.max_value) if self.max_value is not None else float('nan')
+        }
+
+    def to_info(self) -> Dict[str, Any]:
+        """Column description in FileParser._analyze_columns's format"""
+        info = {
+            'name': self.name,
+            'dtype': str(self.dtype),
+            'non_null_count': self.non_null_count,
+            'null_count': self.row_count - self.non_null_count,
+            'unique_count': self.distinct.count(),
+            'sample_values': self.sample_values,
+        }
+
+        if str(self.dtype) in _NUMERIC_DTYPES:
+            info.update({
+                'min_value': self.min_value,
+                'max_value': self.max_value,
+                'mean_value': self.mean if self.numeric_count else float('nan'),
+                'std_value': self.std
+            })
+
+        elif self.dtype == 'object':
+            info.update({
+                'avg_length': self.length_total / self.row_count if self.row_count else float('nan'),
+                'max_length': self.length_max,
+                'common_values': dict(self.top_values.most_common(3))
+            })
+
+        return info
+
+class FrameStats:
+    """Running statistics for a whole file, fed one DataFrame chunk at a time"""
+
+    def __init__(self, n_samples: int = 3, seed: int = 0):
+        self.n_samples = n_samples
+        self.row_count = 0
+        self.memory_usage = 0
+        self.sample_data: List[Dict] = []
+        self.columns: Dict[str, ColumnStats] = {}
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, chunk: pd.DataFrame):
+        """Add the next chunk of rows"""
+        if len(self.sample_data) < self.n_samples:
+            self.sample_data.extend(chunk.head(self.n_samples - len(self.sample_data)).to_dict('records'))
+
+        self.row_count += len(chunk)
+        self.memory_usage += int(chunk.memory_usage(deep=True).sum())
+
+        for name in chunk.columns:
+            if name not in self.columns:
+                self.columns[name] = ColumnStats(name)
+            self.columns[name].update(chunk[name], self._rng)
+
+    def columns_info(self) -> List[Dict[str, Any]]:
+        return [column.to_info() for column in self.columns.values()]
+
+    def data_types(self) -> Dict[str, str]:
+        return {name: str(column.dtype) for name, column in self.columns.items()}
+
+    def missing_values(self) -> Dict[str, int]:
+        return {name: column.row_count - column.non_null_count for name, column in self.columns.items()}
+
+    def summary_stats(self) -> Dict[str, Any]:
+        """Overall statistics in FileParser._get_summary_stats's format"""
+        numeric = [c for c in self.columns.values() if pd.api.types.is_numeric_dtype(c.dtype)
+                   and not pd.api.types.is_bool_dtype(c.dtype)]
+        categorical = [c for c in self.columns.values() if c.dtype == 'object']
+        missing = sum(self.missing_values().values())
+
+        summary = {
+            'total_rows': self.row_count,
+            'total_columns': len(self.columns),
+            'numeric_columns': len(numeric),
+            'categorical_columns': len(categorical),
+            'memory_usage': self.memory_usage,
+            'completeness': (1 - missing / (self.row_count * len(self.columns))) * 100
+        }
+
+        if numeric:
+            summary['numeric_summary'] = {c.name: c.numeric_summary() for c in numeric}
+
+        return summary
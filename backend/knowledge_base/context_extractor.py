@@ -1,16 +1,112 @@
+import asyncio
 import groq
-import json
-from typing import Dict, Any, List
+from itertools import zip_longest
+import logging
+import orjson
+import pandas as pd
+import re
+from typing import Dict, Any, List, Optional
 import os
 from dotenv import load_dotenv
+from utils import (
+    cached_llm_section, close_groq_client, compact_sample_rows, compact_values,
+    get_groq_client, groq_retry, is_skippable_llm_error, summarize_names
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Upper bound on in-flight Groq requests per generate_context call
+GROQ_CONCURRENCY = int(os.getenv('GROQ_CONCURRENCY', '8'))
+
+# Column insights are requested in one JSON batch; wider files are split into
+# groups (run concurrently) because output tokens grow with every column
+COLUMN_BATCH_LIMIT = 20
+COLUMN_GROUP_SIZE = 15
+TOKENS_PER_COLUMN_INSIGHT = 150
+
+# Query suggestions are built from column-type templates and only reworded by the LLM
+MAX_QUERY_SUGGESTIONS = 7
+TOKENS_PER_QUESTION = 40
+_DATE_WORDS = ('date', 'time', 'day', 'week', 'month', 'quarter', 'year', 'period')
+_ID_COLUMN_RE = re.compile(r'(^|_)id$', re.IGNORECASE)
+
+_SAMPLE_JSON_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+def _sample_json(metadata: Dict[str, Any]) -> str:
+    """First two sample rows, trimmed, as indented JSON for prompts"""
+    rows = compact_sample_rows(metadata['sample_data'])
+    return orjson.dumps(rows, default=str, option=_SAMPLE_JSON_OPTS).decode()
+
+def _column_names(metadata: Dict[str, Any]) -> str:
+    """Column names for prompts, capped for very wide files"""
+    return summarize_names([col['name'] for col in metadata['columns']])
+
+def _column_label(col: Dict[str, Any]) -> str:
+    """Column name as it reads in a question"""
+    return str(col['name']).replace('_', ' ').strip()
+
+def _is_date_column(col: Dict[str, Any]) -> bool:
+    """Dates are kept as text by FileParser; recognise them by name or by their samples"""
+    if col['dtype'] != 'object':
+        return False
+    
+    name = str(col['name']).lower()
+    if any(word in name for word in _DATE_WORDS):
+        return True
+    
+    # Only values shaped like dates: dateutil would also read '12' or 'May'
+    samples = [value for value in col['sample_values'] if isinstance(value, str)]
+    if not samples or not all(any(sep in value for sep in '-/:') for value in samples):
+        return False
+    parsed = pd.to_datetime(pd.Series(samples), errors='coerce', format='mixed')
+    return bool(parsed.notna().all())
+
+def _template_questions(metadata: Dict[str, Any]) -> List[str]:
+    """
+    Analysis questions derived from the column types alone
+    
+    Args:
+        metadata: Parsed file metadata from FileParser
+        
+    Returns:
+        Up to MAX_QUERY_SUGGESTIONS questions, alternating between trends,
+        rankings, breakdowns and distributions so they cover different columns
+    """
+    columns = metadata['columns']
+    dates = [col for col in columns if _is_date_column(col)]
+    date_names = {col['name'] for col in dates}
+    numeric = [
+        col for col in columns
+        if col['dtype'] in ('int64', 'float64') and not _ID_COLUMN_RE.search(str(col['name']))
+    ]
+    categorical = [
+        col for col in columns
+        if col['dtype'] == 'object' and col['name'] not in date_names
+        and col['unique_count'] < 0.5 * col['non_null_count']
+    ]
+    
+    kinds = [
+        [f"Trend of {_column_label(num)} over {_column_label(date)}" for date in dates for num in numeric],
+        [f"Top {_column_label(cat)} by {_column_label(num)}" for num in numeric for cat in categorical],
+        [f"Breakdown of {_column_label(a)} by {_column_label(b)}"
+         for i, a in enumerate(categorical) for b in categorical[i + 1:]],
+        [f"Distribution of {_column_label(num)}" for num in numeric],
+        [f"Number of records by {_column_label(cat)}" for cat in categorical]
+    ]
+    
+    questions = []
+    for round_questions in zip_longest(*kinds):
+        questions.extend(question for question in round_questions if question)
+    return list(dict.fromkeys(questions))[:MAX_QUERY_SUGGESTIONS]
+
 class ContextExtractor:
     """Use LLM to generate rich context and insights from parsed file data"""
     
     def __init__(self):
-        self.client = groq.Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.aclient: Optional[groq.AsyncGroq] = None
+        self.sem: Optional[asyncio.Semaphore] = None
     
     def generate_context(self, file_metadata: Dict[str, Any]) -> Dict[str, Any]:
         """
@@ -22,12 +118,25 @@ class ContextExtractor:
         Returns:
             Dict containing LLM-generated context and insights
         """
-        
-        # Create context for different aspects
-        table_description = self._generate_table_description(file_metadata)
-        column_insights = self._generate_column_insights(file_metadata)
-        business_context = self._generate_business_context(file_metadata)
-        query_suggestions = self._generate_query_suggestions(file_metadata)
+        return asyncio.run(self._agenerate_context(file_metadata))
+    
+    async def _agenerate_context(self, file_metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """Run every LLM request for a file concurrently (see generate_context)"""
+        # The shared client's connection pool and the semaphore are bound to the
+        # running event loop, which asyncio.run discards after this call.
+        # Retries are handled by _call, so the client's own retries are disabled.
+        self.sem = asyncio.Semaphore(GROQ_CONCURRENCY)
+        self.aclient = get_groq_client().with_options(max_retries=0)
+        try:
+            # Create context for different aspects
+            table_description, column_insights, business_context, query_suggestions = await asyncio.gather(
+                self._generate_table_description(file_metadata),
+                self._generate_column_insights(file_metadata),
+                self._generate_business_context(file_metadata),
+                self._generate_query_suggestions(file_metadata)
+            )
+        finally:
+            await close_groq_client()
         
         return {
             'file_info': {
@@ -43,7 +152,38 @@ class ContextExtractor:
             'raw_metadata': file_metadata
         }
     
-    def _generate_table_description(self, metadata: Dict[str, Any]) -> str:
+    @groq_retry
+    async def _call(self, prompt: str, temperature: float, max_tokens: Optional[int] = None,
+                    json_mode: bool = False) -> str:
+        """
+        Send one prompt to Groq, rate limited and retried
+        
+        Args:
+            prompt: User message
+            temperature: Sampling temperature
+            max_tokens: Completion length cap (model default when None)
+            json_mode: Constrain the completion to a JSON object
+            
+        Returns:
+            Stripped completion text
+        """
+        options = {'max_tokens': max_tokens} if max_tokens else {}
+        if json_mode:
+            options['response_format'] = {'type': 'json_object'}
+        
+        # Each attempt takes a slot, so backoff sleeps don't hold one
+        async with self.sem:
+            response = await self.aclient.chat.completions.create(
+                model="llama-3.1-8b-instant",
+                messages=[{"role": "user", "content": prompt}],
+                temperature=temperature,
+                **options
+            )
+        
+        return response.choices[0].message.content.strip()
+    
+    @cached_llm_section
+    async def _generate_table_description(self, metadata: Dict[str, Any]) -> str:
         """Generate overall table description"""
         prompt = f"""
         Analyze this dataset and provide a comprehensive description:
@@ -52,8 +192,8 @@ class ContextExtractor:
         Rows: {metadata['row_count']}
         Columns: {metadata['column_count']}
         
-        Column names: {[col['name'] for col in metadata['columns']]}
-        Sample data: {json.dumps(metadata['sample_data'][:2], indent=2)}
+        Column names: {_column_names(metadata)}
+        Sample data: {_sample_json(metadata)}
         
         Provide a clear, concise description of:
         1. What this dataset appears to represent
@@ -64,60 +204,86 @@ class ContextExtractor:
         Keep it under 200 words and focus on what would help someone understand the data's purpose.
         """
         
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
+        return await self._call(prompt, temperature=0.3)
+    
+    @cached_llm_section
+    async def _generate_column_insights(self, metadata: Dict[str, Any]) -> List[Dict[str, str]]:
+        """Generate insights for each column (batched into as few requests as possible)"""
+        columns = metadata['columns']
+        group_size = len(columns) if len(columns) <= COLUMN_BATCH_LIMIT else COLUMN_GROUP_SIZE
+        groups = [columns[i:i + group_size] for i in range(0, len(columns), group_size)]
+        
+        results = await asyncio.gather(
+            *(self._generate_column_group_insights(group) for group in groups),
+            return_exceptions=True
         )
         
-        return response.choices[0].message.content.strip()
-    
-    def _generate_column_insights(self, metadata: Dict[str, Any]) -> List[Dict[str, str]]:
-        """Generate insights for each column"""
-        column_insights = []
+        insights = {}
+        for group, result in zip(groups, results):
+            if isinstance(result, Exception):
+                if not is_skippable_llm_error(result):
+                    raise result
+                logger.warning("Skipping insights for columns %s: %s", [col['name'] for col in group], result)
+                continue
+            insights.update(result)
         
-        for col in metadata['columns']:
-            prompt = f"""
-            Analyze this column from a dataset:
-            
-            Column name: {col['name']}
-            Data type: {col['dtype']}
-            Sample values: {col['sample_values']}
-            Unique count: {col['unique_count']}
-            Non-null count: {col['non_null_count']}
-            
-            Provide:
-            1. A clear description of what this column represents
-            2. The business meaning or purpose
-            3. Any data quality observations
-            4. Potential relationships with other data
-            
-            Be concise but informative (under 100 words).
-            """
-            
-            response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3
-            )
-            
-            column_insights.append({
+        return [
+            {
                 'column_name': col['name'],
-                'insight': response.choices[0].message.content.strip(),
+                'insight': insights[col['name']],
                 'data_type': col['dtype'],
                 'sample_values': col['sample_values']
-            })
+            }
+            for col in columns
+            if col['name'] in insights
+        ]
+    
+    async def _generate_column_group_insights(self, columns: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Generate insights for a group of columns in one JSON request (name -> insight)"""
+        columns_info = "\n".join(
+            f"{i}. {col['name']} (data type: {col['dtype']}, sample values: {compact_values(col['sample_values'])}, "
+            f"unique count: {col['unique_count']}, non-null count: {col['non_null_count']})"
+            for i, col in enumerate(columns, 1)
+        )
+        
+        prompt = f"""
+        Analyze these columns from a dataset:
+        
+        {columns_info}
+        
+        For each column provide:
+        1. A clear description of what this column represents
+        2. The business meaning or purpose
+        3. Any data quality observations
+        4. Potential relationships with other data
+        
+        Be concise but informative (under 100 words per column).
+        
+        Respond ONLY as JSON: {{"columns": [{{"name": "<column name>", "insight": "<insight>"}}, ...]}}
+        """
         
-        return column_insights
+        content = await self._call(
+            prompt,
+            temperature=0.3,
+            max_tokens=TOKENS_PER_COLUMN_INSIGHT * len(columns),
+            json_mode=True
+        )
+        
+        return {
+            item['name']: str(item['insight']).strip()
+            for item in orjson.loads(content).get('columns', [])
+            if isinstance(item, dict) and 'name' in item and 'insight' in item
+        }
     
-    def _generate_business_context(self, metadata: Dict[str, Any]) -> str:
+    @cached_llm_section
+    async def _generate_business_context(self, metadata: Dict[str, Any]) -> str:
         """Generate business context and use cases"""
         prompt = f"""
         Based on this dataset analysis, provide business context:
         
         Dataset: {metadata['file_name']}
-        Columns: {[col['name'] for col in metadata['columns']]}
-        Sample data: {json.dumps(metadata['sample_data'][:2], indent=2)}
+        Columns: {_column_names(metadata)}
+        Sample data: {_sample_json(metadata)}
         Summary: {metadata['summary_stats']}
         
         Provide:
@@ -129,22 +295,52 @@ class ContextExtractor:
         Focus on practical business applications. Keep under 150 words.
         """
         
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3
-        )
-        
-        return response.choices[0].message.content.strip()
+        return await self._call(prompt, temperature=0.3)
     
-    def _generate_query_suggestions(self, metadata: Dict[str, Any]) -> List[str]:
+    @cached_llm_section
+    async def _generate_query_suggestions(self, metadata: Dict[str, Any]) -> List[str]:
         """Generate common query patterns and analysis suggestions"""
+        templates = _template_questions(metadata)
+        if not templates:
+            return await self._generate_free_query_suggestions(metadata)
+        
+        # The questions are fixed by the schema; the LLM only rewords them
+        prompt = f"""
+        Rewrite these analysis questions about the dataset {metadata['file_name']} so they sound
+        like natural questions a business user would ask. Keep the same order, one rewrite per
+        question, and keep the column each question refers to.
+        
+        {chr(10).join(f"{i}. {question}" for i, question in enumerate(templates, 1))}
+        
+        Respond ONLY as JSON: {{"questions": ["<question>", ...]}}
+        """
+        
+        try:
+            content = await self._call(
+                prompt,
+                temperature=0.2,
+                max_tokens=TOKENS_PER_QUESTION * len(templates),
+                json_mode=True
+            )
+            questions = orjson.loads(content).get('questions')
+        except Exception as e:
+            if not is_skippable_llm_error(e):
+                raise
+            logger.warning("Keeping template questions for %s: %s", metadata['file_name'], e)
+            return templates
+        
+        if not isinstance(questions, list) or len(questions) != len(templates):
+            return templates
+        return [str(question).strip() or template for question, template in zip(questions, templates)]
+    
+    async def _generate_free_query_suggestions(self, metadata: Dict[str, Any]) -> List[str]:
+        """Ask the LLM for questions outright (files with no numeric or categorical columns)"""
         prompt = f"""
         Based on this dataset, suggest 5-7 common analysis queries or questions that users might ask:
         
         Dataset: {metadata['file_name']}
-        Columns: {[col['name'] for col in metadata['columns']]}
-        Sample data: {json.dumps(metadata['sample_data'][:2], indent=2)}
+        Columns: {_column_names(metadata)}
+        Sample data: {_sample_json(metadata)}
         
         Provide natural language questions that would be common for this type of data.
         Examples: "Show me sales by month", "What are the top performing products"
@@ -152,12 +348,8 @@ class ContextExtractor:
         Return as a simple list, one question per line.
         """
         
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.4
-        )
+        content = await self._call(prompt, temperature=0.4)
         
         # Split response into list of questions
-        questions = [q.strip('- ').strip() for q in response.choices[0].message.content.strip().split('\n') if q.strip()]
-        return questions[:7]  # Limit to 7 suggestions
\ No newline at end of file
+        questions = [q.strip('- ').strip() for q in content.split('\n') if q.strip()]
+        return questions[:7]  # Limit to 7 suggestions
@@ -1,7 +1,31 @@
+import logging
 import pandas as pd
 import os
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple
+
+from utils import sniff_csv
+from .column_stats import FrameStats, approximate_nunique
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+logger = logging.getLogger(__name__)
+
+# CSVs larger than this are analyzed in chunks instead of loaded whole
+STREAM_PARSE_BYTES = int(os.getenv('STREAM_PARSE_BYTES', str(100 * 1024 * 1024)))
+STREAM_CHUNK_ROWS = 100_000
+
+# Unique counts only drive rough heuristics (categorical vs not), so columns
+# this long are counted with HyperLogLog (~1% error) instead of a full hash set
+APPROX_UNIQUE_MIN_ROWS = 10_000
+
+# Rows read to infer CSV column types when pyarrow is not installed
+SUMMARY_SAMPLE_ROWS = 1000
 
 class FileParser:
     """Parse CSV and Excel files to extract structured data information"""
@@ -9,23 +33,25 @@ class FileParser:
     def __init__(self):
         self.supported_extensions = {'.csv', '.xlsx', '.xls'}
     
-    def parse_file(self, file_path: str) -> Dict[str, Any]:
+    def parse_file(self, file_path: str, deep: bool = True) -> Dict[str, Any]:
         """
         Parse a file and extract comprehensive metadata
         
         Args:
             file_path: Path to the file to parse
+            deep: Load the data for column analysis and summary statistics;
+                False returns parse_file_summary's shallow metadata instead
             
         Returns:
             Dict containing file metadata and data analysis
         """
-        path = Path(file_path)
+        path = self._check_path(file_path)
         
-        if not path.exists():
-            raise FileNotFoundError(f"File not found: {file_path}")
+        if not deep:
+            return self.parse_file_summary(file_path)
         
-        if path.suffix.lower() not in self.supported_extensions:
-            raise ValueError(f"Unsupported file type: {path.suffix}")
+        if path.suffix.lower() == '.csv' and path.stat().st_size > STREAM_PARSE_BYTES:
+            return self._parse_csv_streaming(path)
         
         # Read the file
         df = self._read_file(file_path)
@@ -47,19 +73,147 @@ class FileParser:
         
         return metadata
     
+    def parse_file_summary(self, file_path: str) -> Dict[str, Any]:
+        """
+        Row count, column names and types without loading the data
+        
+        For listings, schema previews and change detection. CSV columns and
+        types come from the first block of the file and rows are counted as
+        lines (a quoted field spanning lines counts more than once), so the
+        file is scanned once in raw blocks instead of parsed.
+        
+        Args:
+            file_path: Path to the file
+            
+        Returns:
+            Dict with file_path, file_name, file_size, extension, row_count,
+            column_count, columns (name and dtype) and data_types
+        """
+        path = self._check_path(file_path)
+        
+        if path.suffix.lower() == '.csv':
+            data_types = self._csv_column_types(file_path)
+            row_count = max(self._count_lines(path) - 1, 0)
+        else:
+            # Workbooks are small and zipped; read the sheet rather than parse XML by hand
+            df = pd.read_excel(file_path)
+            data_types = self._get_data_types(df)
+            row_count = len(df)
+        
+        return {
+            'file_path': str(path.absolute()),
+            'file_name': path.name,
+            'file_size': path.stat().st_size,
+            'extension': path.suffix.lower(),
+            'row_count': row_count,
+            'column_count': len(data_types),
+            'columns': [{'name': name, 'dtype': dtype} for name, dtype in data_types.items()],
+            'data_types': data_types
+        }
+    
+    def _check_path(self, file_path: str) -> Path:
+        """Path of an existing file with a supported extension"""
+        path = Path(file_path)
+        
+        if not path.exists():
+            raise FileNotFoundError(f"File not found: {file_path}")
+        
+        if path.suffix.lower() not in self.supported_extensions:
+            raise ValueError(f"Unsupported file type: {path.suffix}")
+        
+        return path
+    
+    def _csv_column_types(self, file_path: str) -> Dict[str, str]:
+        """Column dtypes inferred from the head of a CSV, named as pandas would"""
+        encoding, sep = sniff_csv(file_path)
+        
+        if HAS_PYARROW:
+            try:
+                reader = pa_csv.open_csv(
+                    file_path,
+                    read_options=pa_csv.ReadOptions(encoding=encoding),
+                    parse_options=pa_csv.ParseOptions(delimiter=sep)
+                )
+                types = {}
+                for field in reader.schema:
+                    # Dates stay text, as in parse_file
+                    if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+                        types[field.name] = 'object'
+                    else:
+                        types[field.name] = str(pd.Series([], dtype=field.type.to_pandas_dtype()).dtype)
+                reader.close()
+                return types
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, UnicodeDecodeError) as e:
+                logger.warning("Arrow CSV schema read failed for %s, falling back to pandas: %s", file_path, e)
+        
+        try:
+            head = pd.read_csv(file_path, encoding=encoding, sep=sep, engine='c', nrows=SUMMARY_SAMPLE_ROWS)
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            raise ValueError(f"Could not read CSV file: {e}")
+        return self._get_data_types(head)
+    
+    def _count_lines(self, path: Path) -> int:
+        """Number of lines in a file, counted over raw 1 MB blocks"""
+        lines = 0
+        last = b'\n'
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                lines += block.count(b'\n')
+                last = block[-1:]
+        # A final line without a trailing newline still counts
+        return lines + (last != b'\n')
+    
+    def _parse_csv_streaming(self, path: Path) -> Dict[str, Any]:
+        """
+        Extract the same metadata as parse_file from a large CSV, one chunk at a time
+        
+        Counts, min/max, mean/std and lengths are exact; unique counts past
+        10k values, numeric quartiles and common values are estimated (see
+        column_stats).
+        """
+        encoding, sep = sniff_csv(str(path))
+        stats = FrameStats()
+        
+        try:
+            reader = pd.read_csv(path, encoding=encoding, sep=sep, engine='c', chunksize=STREAM_CHUNK_ROWS)
+            with reader:
+                for chunk in reader:
+                    stats.update(chunk)
+        except (UnicodeDecodeError, pd.errors.ParserError) as e:
+            raise ValueError(f"Could not read CSV file: {e}")
+        
+        return {
+            'file_path': str(path.absolute()),
+            'file_name': path.name,
+            'file_size': path.stat().st_size,
+            'extension': path.suffix.lower(),
+            'row_count': stats.row_count,
+            'column_count': len(stats.columns),
+            'columns': stats.columns_info(),
+            'sample_data': stats.sample_data,
+            'data_types': stats.data_types(),
+            'missing_values': stats.missing_values(),
+            'summary_stats': stats.summary_stats()
+        }
+    
     def _read_file(self, file_path: str) -> pd.DataFrame:
         """Read file based on extension"""
         path = Path(file_path)
         
         if path.suffix.lower() == '.csv':
-            # Try different encodings and separators
-            for encoding in ['utf-8', 'latin-1', 'cp1252']:
-                for sep in [',', ';', '\t']:
-                    try:
-                        return pd.read_csv(file_path, encoding=encoding, sep=sep)
-                    except:
-                        continue
-            raise ValueError("Could not read CSV file with any encoding/separator combination")
+            # Detect encoding and delimiter from the head of the file, then parse once
+            encoding, sep = sniff_csv(file_path)
+            
+            if HAS_PYARROW:
+                try:
+                    return self._read_csv_arrow(file_path, encoding, sep)
+                except (pa.ArrowInvalid, UnicodeDecodeError) as e:
+                    logger.warning("Arrow CSV read failed for %s, falling back to pandas: %s", path.name, e)
+            
+            try:
+                return pd.read_csv(file_path, encoding=encoding, sep=sep, engine='c', low_memory=False)
+            except (UnicodeDecodeError, pd.errors.ParserError) as e:
+                raise ValueError(f"Could not read CSV file: {e}")
         
         elif path.suffix.lower() in ['.xlsx', '.xls']:
             return pd.read_excel(file_path)
@@ -67,40 +221,103 @@ class FileParser:
         else:
             raise ValueError(f"Unsupported file extension: {path.suffix}")
     
+    def _read_csv_arrow(self, file_path: str, encoding: str, sep: str) -> pd.DataFrame:
+        """Parse a CSV with pyarrow's multithreaded reader into a numpy-backed DataFrame"""
+        tbl = pa_csv.read_csv(
+            file_path,
+            read_options=pa_csv.ReadOptions(use_threads=True, encoding=encoding),
+            parse_options=pa_csv.ParseOptions(delimiter=sep),
+            # Empty fields are missing values, as with pd.read_csv
+            convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)
+        )
+        
+        # pandas keeps dates as text; do the same so column analysis is unchanged
+        for i, field in enumerate(tbl.schema):
+            if pa.types.is_timestamp(field.type) or pa.types.is_date(field.type):
+                tbl = tbl.set_column(i, field.name, tbl.column(i).cast(pa.string()))
+        
+        return tbl.to_pandas(split_blocks=True, self_destruct=True)
+    
     def _analyze_columns(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Analyze each column in detail"""
+        # Column-wise statistics computed once over the whole frame (or per dtype
+        # block) instead of one pass per column and statistic
+        non_null_counts = df.count()
+        null_counts = len(df) - non_null_counts
+        if len(df) < APPROX_UNIQUE_MIN_ROWS:
+            unique_counts = df.nunique()
+        else:
+            unique_counts = pd.Series({col: approximate_nunique(df[col]) for col in df.columns})
+        
+        numeric_stats = {}
+        for dtype in ('int64', 'float64'):
+            block = df.select_dtypes(include=[dtype])
+            if len(block.columns):
+                # min/max per dtype block keep the column dtype (ints stay ints)
+                mins, maxs, means, stds = block.min(), block.max(), block.mean(), block.std()
+                for col in block.columns:
+                    numeric_stats[col] = (mins[col], maxs[col], means[col], stds[col])
+        
+        text_stats = {}
+        for col in df.select_dtypes(include=['object']).columns:
+            text_stats[col] = self._analyze_text_column(df[col])
+        
         columns_info = []
         
         for col in df.columns:
             col_info = {
                 'name': col,
                 'dtype': str(df[col].dtype),
-                'non_null_count': df[col].count(),
-                'null_count': df[col].isnull().sum(),
-                'unique_count': df[col].nunique(),
+                'non_null_count': non_null_counts[col],
+                'null_count': null_counts[col],
+                'unique_count': int(unique_counts[col]),
                 'sample_values': df[col].dropna().head(5).tolist(),
             }
             
             # Add type-specific analysis
-            if df[col].dtype in ['int64', 'float64']:
+            if col in numeric_stats:
+                min_value, max_value, mean_value, std_value = numeric_stats[col]
                 col_info.update({
-                    'min_value': df[col].min(),
-                    'max_value': df[col].max(),
-                    'mean_value': df[col].mean(),
-                    'std_value': df[col].std()
+                    'min_value': min_value,
+                    'max_value': max_value,
+                    'mean_value': mean_value,
+                    'std_value': std_value
                 })
             
-            elif df[col].dtype == 'object':
+            elif col in text_stats:
+                avg_length, max_length, common_values = text_stats[col]
                 col_info.update({
-                    'avg_length': df[col].astype(str).str.len().mean(),
-                    'max_length': df[col].astype(str).str.len().max(),
-                    'common_values': df[col].value_counts().head(3).to_dict()
+                    'avg_length': avg_length,
+                    'max_length': max_length,
+                    'common_values': common_values
                 })
             
             columns_info.append(col_info)
         
         return columns_info
     
+    def _analyze_text_column(self, values: pd.Series) -> Tuple[float, int, Dict[Any, int]]:
+        """
+        Length statistics and most common values of a text column
+        
+        Args:
+            values: Object-dtype column
+            
+        Returns:
+            Tuple of (average length, max length, three most common values)
+        """
+        # Arrow-backed strings sit in contiguous buffers with native length and
+        # hashing kernels, instead of one Python object per cell
+        if HAS_PYARROW and pd.api.types.infer_dtype(values, skipna=True) == 'string':
+            strings = values.astype('string[pyarrow]')
+            # Missing values count as 'nan' (3 characters), as with astype(str)
+            lengths = strings.str.len().fillna(3).astype('int64')
+        else:
+            strings = values
+            lengths = values.astype(str).str.len()
+        
+        return lengths.mean(), lengths.max(), strings.value_counts().head(3).to_dict()
+    
     def _get_sample_data(self, df: pd.DataFrame, n_samples: int = 3) -> List[Dict]:
         """Get sample rows from the dataframe"""
         return df.head(n_samples).to_dict('records')
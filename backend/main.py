@@ -8,11 +8,25 @@ For API server functionality, use:
 This file contains testing and pipeline functions for development.
 """
 
-from knowledge_base import FileParser, ContextExtractor, ChromaManager
-from prompt_enhancement import PromptEnhancer
-from database import DatabaseManager, SchemaAnalyzer
-from query_generation import SQLGenerator, QueryExecutor, DataProcessor
-from chart_generation import ComponentGenerator
+# Pipeline stages (Chroma, pandas, Groq clients, ...) are imported inside the
+# functions that use them so e.g. a database status check starts quickly
+from database import DatabaseManager
+from utils import configure_logging
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+import logging
+import threading
+import traceback
+
+logger = logging.getLogger(__name__)
+
+# Generated components are written to disk off the pipeline thread
+_file_writer = ThreadPoolExecutor(max_workers=1)
+
+# Pipeline tests run side by side in threads; each collects its report and
+# prints it as one block so the output of concurrent prompts doesn't interleave
+_print_lock = threading.Lock()
 
 def process_file_complete_pipeline(file_path: str) -> str:
     """
@@ -24,6 +38,8 @@ def process_file_complete_pipeline(file_path: str) -> str:
     Returns:
         str: Document ID of stored context
     """
+    from knowledge_base import FileParser, ContextExtractor, ChromaManager
+    
     # Initialize components
     parser = FileParser()
     extractor = ContextExtractor()
@@ -61,134 +77,213 @@ def process_file_complete_pipeline(file_path: str) -> str:
         print(f"❌ Error processing file: {e}")
         raise
 
-def test_complete_pipeline_with_chart_generation(user_prompt: str):
+def process_files_complete_pipeline(file_paths: List[str]) -> List[str]:
+    """
+    Complete pipeline for several files, storing every context with one
+    knowledge base write so the embeddings are computed in a single batch
+    
+    Args:
+        file_paths: Paths to the CSV/Excel files
+        
+    Returns:
+        List[str]: Document IDs of stored contexts, in file order
+    """
+    from knowledge_base import FileParser, ContextExtractor, ChromaManager
+    
+    parser = FileParser()
+    extractor = ContextExtractor()
+    chroma_manager = ChromaManager()
+    db_manager = DatabaseManager()
+    
+    print(f"=== PROCESSING {len(file_paths)} FILES ===")
+    
+    print("1. Loading files into database...")
+    for db_result in db_manager.load_files_to_database(file_paths):
+        print(f"   Created table: {db_result['table_name']} ({db_result['row_count']} rows)")
+    
+    print("2. Parsing metadata and generating context with LLM...")
+    contexts = [extractor.generate_context(parser.parse_file(file_path)) for file_path in file_paths]
+    
+    print("3. Storing in knowledge base...")
+    doc_ids = chroma_manager.store_file_contexts(contexts)
+    
+    print(f"✅ Successfully processed {len(doc_ids)} files!")
+    return doc_ids
+
+def test_complete_pipeline_with_chart_generation(user_prompt: str, *, enhancer=None, executor=None, component_generator=None, report: Optional[List[str]] = None):
     """
     Test the COMPLETE pipeline: Prompt -> SQL -> Data -> Chart Component Generation
     
     Args:
         user_prompt: Raw user prompt
+        enhancer: PromptEnhancer to reuse (created if not given)
+        executor: QueryExecutor to reuse (created if not given)
+        component_generator: ComponentGenerator to reuse (created if not given)
+        report: List to collect the output lines in (printed if not given)
     """
-    print(f"\n{'='*80}")
-    print(f"🚀 COMPLETE PIPELINE TEST WITH CHART GENERATION")
-    print(f"USER PROMPT: {user_prompt}")
-    print(f"{'='*80}")
+    from prompt_enhancement import PromptEnhancer
+    from query_generation import QueryExecutor, DataProcessor
+    from chart_generation import ComponentGenerator
+    
+    emit = report.append if report is not None else print
+    
+    emit(f"\n{'='*80}")
+    emit(f"🚀 COMPLETE PIPELINE TEST WITH CHART GENERATION")
+    emit(f"USER PROMPT: {user_prompt}")
+    emit(f"{'='*80}")
     
     try:
         # Step 1: Enhance prompt
-        print("\n1️⃣ ENHANCING PROMPT...")
-        enhancer = PromptEnhancer()
-        enhancement_result = enhancer.enhance_prompt(user_prompt)
+        emit("\n1️⃣ ENHANCING PROMPT...")
+        enhancer = enhancer or PromptEnhancer()
+        enhancement_result = enhancer.enhance_prompt_sync(user_prompt)
         
-        print(f"   ✅ Enhanced (Context: {enhancement_result.has_context})")
-        print(f"   📊 Data Sources: {', '.join(enhancement_result.data_sources)}")
+        emit(f"   ✅ Enhanced (Context: {enhancement_result.has_context})")
+        emit(f"   📊 Data Sources: {', '.join(enhancement_result.data_sources)}")
         
         # Step 2: Generate and execute SQL
-        print("\n2️⃣ GENERATING & EXECUTING SQL...")
-        executor = QueryExecutor()
+        emit("\n2️⃣ GENERATING & EXECUTING SQL...")
+        executor = executor or QueryExecutor()
         sql_result, execution_results = executor.execute_sql_generation(
             enhancement_result.enhanced_prompt,
             enhancement_result.sql_context
         )
         
         if sql_result.success:
-            print(f"   ✅ Generated {len(sql_result.queries)} queries")
+            emit(f"   ✅ Generated {len(sql_result.queries)} queries")
             successful_executions = [r for r in execution_results if r.success]
-            print(f"   🎯 Executed successfully: {len(successful_executions)}/{len(execution_results)}")
+            emit(f"   🎯 Executed successfully: {len(successful_executions)}/{len(execution_results)}")
         else:
-            print(f"   ❌ SQL Generation failed: {sql_result.error_message}")
+            emit(f"   ❌ SQL Generation failed: {sql_result.error_message}")
             return
         
         # Step 3: Process data
-        print("\n3️⃣ PROCESSING DATA...")
+        emit("\n3️⃣ PROCESSING DATA...")
         processor = DataProcessor()
         processed_data = processor.process_query_results(sql_result, execution_results)
         
         if processed_data.success:
-            print(f"   ✅ Processed {len(processed_data.chart_data)} data points")
-            print(f"   📈 Chart type: {processed_data.chart_config.get('chart_type', 'unknown')}")
+            emit(f"   ✅ Processed {len(processed_data.chart_data)} data points")
+            emit(f"   📈 Chart type: {processed_data.chart_config.get('chart_type', 'unknown')}")
         else:
-            print(f"   ❌ Data processing failed: {processed_data.error_message}")
+            emit(f"   ❌ Data processing failed: {processed_data.error_message}")
             return
         
         # Step 4: Generate React Component
-        print("\n4️⃣ GENERATING REACT COMPONENT...")
-        component_generator = ComponentGenerator()
-        component_result = component_generator.generate_component(processed_data, user_prompt)
+        emit("\n4️⃣ GENERATING REACT COMPONENT...")
+        component_generator = component_generator or ComponentGenerator()
+        component_result = component_generator.generate_component_sync(processed_data, user_prompt)
         
         if component_result.success:
-            print(f"   ✅ Generated component: {component_result.component_name}")
-            print(f"   🎨 Chart type: {component_result.chart_type}")
-            print(f"   📝 Code length: {len(component_result.component_code)} characters")
+            emit(f"   ✅ Generated component: {component_result.component_name}")
+            emit(f"   🎨 Chart type: {component_result.chart_type}")
+            emit(f"   📝 Code length: {len(component_result.component_code)} characters")
         else:
-            print(f"   ❌ Component generation failed: {component_result.error_message}")
+            emit(f"   ❌ Component generation failed: {component_result.error_message}")
             # Generate fallback component
-            print("   🔄 Generating fallback component...")
+            emit("   🔄 Generating fallback component...")
             component_result = component_generator.generate_fallback_component(
                 processed_data, 
                 component_result.error_message or "Unknown error"
             )
         
         # Step 5: Show complete results
-        print(f"\n5️⃣ FINAL RESULTS:")
-        print(f"{'='*50}")
+        emit(f"\n5️⃣ FINAL RESULTS:")
+        emit(f"{'='*50}")
         
-        print(f"\n📊 DATA SUMMARY:")
+        emit(f"\n📊 DATA SUMMARY:")
         summary = processed_data.data_summary
-        print(f"   Rows: {summary.get('total_rows', 0)}")
-        print(f"   Columns: {summary.get('total_columns', 0)}")
-        print(f"   Execution time: {summary.get('execution_time', 0):.3f}s")
+        emit(f"   Rows: {summary.get('total_rows', 0)}")
+        emit(f"   Columns: {summary.get('total_columns', 0)}")
+        emit(f"   Execution time: {summary.get('execution_time', 0):.3f}s")
         
-        print(f"\n🎨 CHART CONFIG:")
+        emit(f"\n🎨 CHART CONFIG:")
         config = processed_data.chart_config
-        print(f"   Type: {config.get('chart_type', 'unknown')}")
-        print(f"   X-axis: {config.get('x_axis', 'unknown')}")
-        print(f"   Y-axis: {config.get('y_axis', 'unknown')}")
-        print(f"   Title: {config.get('title', 'No title')}")
-        
-        print(f"\n⚛️ GENERATED COMPONENT:")
-        print(f"   Name: {component_result.component_name}")
-        print(f"   Type: {component_result.chart_type}")
-        print(f"   Code preview (first 300 chars):")
-        print(f"   {'-'*40}")
-        print(f"   {component_result.component_code[:300]}...")
-        print(f"   {'-'*40}")
-        
-        print(f"\n💾 SAMPLE DATA (first 3 rows):")
+        emit(f"   Type: {config.get('chart_type', 'unknown')}")
+        emit(f"   X-axis: {config.get('x_axis', 'unknown')}")
+        emit(f"   Y-axis: {config.get('y_axis', 'unknown')}")
+        emit(f"   Title: {config.get('title', 'No title')}")
+        
+        emit(f"\n⚛️ GENERATED COMPONENT:")
+        emit(f"   Name: {component_result.component_name}")
+        emit(f"   Type: {component_result.chart_type}")
+        emit(f"   Code preview (first 300 chars):")
+        emit(f"   {'-'*40}")
+        emit(f"   {component_result.component_code[:300]}...")
+        emit(f"   {'-'*40}")
+        
+        emit(f"\n💾 SAMPLE DATA (first 3 rows):")
         for i, row in enumerate(processed_data.chart_data[:3]):
-            print(f"   Row {i+1}: {row}")
+            emit(f"   Row {i+1}: {row}")
         
-        print(f"\n🔍 QUERIES EXECUTED:")
+        emit(f"\n🔍 QUERIES EXECUTED:")
         for i, result in enumerate(execution_results):
             if result.success:
-                print(f"   ✅ Query {i+1}: {result.query_used[:100]}...")
-                print(f"      → {result.row_count} rows in {result.execution_time:.3f}s")
+                emit(f"   ✅ Query {i+1}: {result.query_used[:100]}...")
+                emit(f"      → {result.row_count} rows in {result.execution_time:.3f}s")
             else:
-                print(f"   ❌ Query {i+1}: {result.error_message}")
+                emit(f"   ❌ Query {i+1}: {result.error_message}")
         
-        print(f"\n{'='*80}")
-        print("🎉 COMPLETE PIPELINE WITH CHART GENERATION SUCCESSFUL!")
-        print("📋 The generated React component is ready to be rendered in the frontend container!")
+        emit(f"\n{'='*80}")
+        emit("🎉 COMPLETE PIPELINE WITH CHART GENERATION SUCCESSFUL!")
+        emit("📋 The generated React component is ready to be rendered in the frontend container!")
         
         # Optionally save the generated component to a file for inspection
-        try:
-            with open(f"generated_component_{component_result.component_name}.jsx", "w") as f:
-                f.write(component_result.component_code)
-            print(f"💾 Component saved to: generated_component_{component_result.component_name}.jsx")
-        except:
-            pass
+        component_path = Path(f"generated_component_{component_result.component_name}.jsx")
+        _file_writer.submit(save_component, component_path, component_result.component_code)
+        emit(f"💾 Saving component to: {component_path}")
         
     except Exception as e:
-        print(f"\n❌ PIPELINE ERROR: {e}")
-        import traceback
-        traceback.print_exc()
+        emit(f"\n❌ PIPELINE ERROR: {e}")
+        emit(traceback.format_exc())
+
+def save_component(path: Path, code: str):
+    """Write generated component code to a file, logging instead of raising on failure"""
+    try:
+        path.write_text(code, encoding="utf-8")
+    except OSError as e:
+        logger.warning("Could not save component to %s: %s", path, e)
 
 def test_complete_pipeline(user_prompt: str):
     """Legacy function - redirects to new chart generation pipeline"""
     test_complete_pipeline_with_chart_generation(user_prompt)
 
-def show_database_status():
+def run_pipeline_tests(prompts: List[str], max_workers: int = 3, db_manager: DatabaseManager = None):
+    """
+    Run test_complete_pipeline_with_chart_generation for several prompts
+    concurrently (each run is mostly waiting on LLM and database I/O)
+    
+    Args:
+        prompts: Raw user prompts
+        max_workers: Number of prompts in flight at once
+        db_manager: Database to query (created if not given)
+    """
+    from prompt_enhancement import PromptEnhancer
+    from query_generation import QueryExecutor
+    from chart_generation import ComponentGenerator
+    
+    # Set up once and shared by every prompt (DataProcessor keeps per-call
+    # state, so each run creates its own)
+    components = {
+        'enhancer': PromptEnhancer(),
+        'executor': QueryExecutor(db_manager),
+        'component_generator': ComponentGenerator()
+    }
+    
+    def run(prompt: str):
+        lines = []
+        try:
+            test_complete_pipeline_with_chart_generation(prompt, report=lines, **components)
+        finally:
+            with _print_lock:
+                print("\n".join(lines))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(run, prompts))
+
+def show_database_status(db_manager: DatabaseManager = None):
     """Show current database status"""
-    db_manager = DatabaseManager()
+    db_manager = db_manager or DatabaseManager()
     tables = db_manager.get_all_tables()
     
     print(f"\n📁 DATABASE STATUS:")
@@ -202,6 +297,8 @@ def show_database_status():
 
 def test_raw_sql_query(query: str):
     """Test a raw SQL query"""
+    from query_generation import QueryExecutor
+    
     print(f"\n🔍 TESTING RAW QUERY:")
     print(f"Query: {query}")
     
@@ -216,6 +313,8 @@ def test_raw_sql_query(query: str):
         print(f"❌ Failed: {result.error_message}")
 
 if __name__ == "__main__":
+    configure_logging()
+    
     # Example usage
     file_path = "path/to/your/data.csv"  # Replace with actual file path
     
@@ -227,8 +326,10 @@ if __name__ == "__main__":
         # Step 1: Process file (uncomment when you have a file)
         # doc_id = process_file_complete_pipeline(file_path)
         
+        db_manager = DatabaseManager()
+        
         # Step 2: Show current database status
-        show_database_status()
+        show_database_status(db_manager)
         
         # Step 3: Test complete pipeline with chart generation
         test_prompts = [
@@ -237,8 +338,7 @@ if __name__ == "__main__":
             "display the top 10 best selling games"
         ]
         
-        for prompt in test_prompts:
-            test_complete_pipeline_with_chart_generation(prompt)
+        run_pipeline_tests(test_prompts, db_manager=db_manager)
         
         # Step 4: Test raw SQL (optional)
         # test_raw_sql_query("SELECT * FROM your_table_name LIMIT 5")
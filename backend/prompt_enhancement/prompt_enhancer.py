@@ -1,15 +1,106 @@
+import asyncio
 import groq
-import json
-from typing import Dict, Any, List, Optional
-import os
-from dotenv import load_dotenv
-from dataclasses import dataclass
+import logging
+import orjson
+import re
+from typing import Dict, Any, List, Optional, Tuple
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 
 from knowledge_base import ChromaManager
 from database import SchemaAnalyzer
-from .templates import CONTEXT_ENHANCED_TEMPLATE, GENERIC_ENHANCED_TEMPLATE, METADATA_EXTRACTION_TEMPLATE
+from utils import get_groq_client, get_llm_cache, prompt_cache_key, run_with_groq_client
+from .templates import CONTEXT_ENHANCED_SEGMENTS, GENERIC_ENHANCED_SEGMENTS, fill_template
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+ENHANCEMENT_MODEL = "llama-3.1-8b-instant"
+
+# The short <META> object plus ~1000 tokens of instructions; generation ends
+# server-side at the closing instructions marker. Metadata comes first, so
+# hitting the cap only shortens the instructions
+ENHANCEMENT_MAX_TOKENS = 1100
+
+# Metadata is read off the enhanced prompt: chart types it names ("bar chart",
+# Recharts' "BarChart"), SQL features it calls for, and schema names it uses
+_CHART_TYPE_RE = re.compile(r'\b(bar|line|pie|scatter|area|radar|donut|histogram)[ -]?(?:chart|graph|plot)s?\b')
+_COMPLEX_CUES = [re.compile(pattern) for pattern in (
+    r'\bjoin(s|ed|ing)?\b', r'\bover\s*\(', r'\bpartition by\b', r'\bwindow function',
+    r'\bwith\s+\w+\s+as\s*\(', r'\bcte\b', r'\bsubquer'
+)]
+_MODERATE_CUES = [re.compile(pattern) for pattern in (
+    r'\bgroup by\b', r'\bhaving\b', r'\b(sum|avg|count|min|max)\s*\(', r'\baggregat'
+)]
+_LOAD_TIME = {"simple": "fast", "moderate": "moderate", "complex": "slow"}
+_SCHEMA_TABLE_RE = re.compile(r'^Table: (\S+)$')
+_SCHEMA_COLUMN_RE = re.compile(r'^  - (.+) \([^)]*\)$')
+
+# The completion is complete once the instructions close (the marker itself is not returned)
+_RESPONSE_END = '</ENHANCED>'
+_METADATA_RE = re.compile(r'<META>(.*?)</META>', re.DOTALL)
+
+def _schema_tables(schema_context: str) -> Dict[str, List[str]]:
+    """Table name -> column names, read from SchemaAnalyzer's prompt context"""
+    tables: Dict[str, List[str]] = {}
+    columns = None
+    for line in schema_context.splitlines():
+        table = _SCHEMA_TABLE_RE.match(line)
+        if table:
+            columns = tables.setdefault(table.group(1), [])
+            continue
+        column = _SCHEMA_COLUMN_RE.match(line)
+        if column and columns is not None:
+            columns.append(column.group(1))
+    return tables
+
+def _is_string_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, str) for item in value)
+
+# Fields of the model's metadata that are used when they have the expected shape
+_METADATA_VALIDATORS = {
+    "confidence_score": lambda value: isinstance(value, (int, float)) and 0 <= value <= 1,
+    "suggested_chart_types": _is_string_list,
+    "data_requirements": _is_string_list,
+    "complexity_level": lambda value: value in _LOAD_TIME,
+    "estimated_load_time": lambda value: value in _LOAD_TIME.values()
+}
+
+def _split_response(text: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """
+    Split a completion into the enhanced prompt and the model's metadata
+    
+    Args:
+        text: Completion in RESPONSE_FORMAT_INSTRUCTIONS's layout
+        
+    Returns:
+        (enhanced prompt, metadata dict or None when missing or malformed);
+        a completion without markers is all enhanced prompt
+    """
+    match = _METADATA_RE.search(text)
+    enhanced = text[:match.start()] + text[match.end():] if match else text
+    enhanced = enhanced.replace('<ENHANCED>', '').replace('</ENHANCED>', '').strip()
+    if not match:
+        return enhanced, None
+    
+    try:
+        metadata = orjson.loads(match.group(1).strip())
+    except orjson.JSONDecodeError:
+        return enhanced, None
+    return enhanced, metadata if isinstance(metadata, dict) else None
+
+def _mentions(text: str, name: str) -> bool:
+    """True if the lower-cased text uses the identifier as a whole word"""
+    return re.search(rf'(?<!\w){re.escape(name.lower())}(?!\w)', text) is not None
+
+@lru_cache(maxsize=1)
+def get_shared_chroma_manager() -> ChromaManager:
+    """ChromaManager shared by every enhancer (Chroma client and embedding model load once per process)"""
+    return ChromaManager()
+
+@lru_cache(maxsize=1)
+def get_shared_schema_analyzer() -> SchemaAnalyzer:
+    """SchemaAnalyzer shared by every enhancer (one database connection per process)"""
+    return SchemaAnalyzer()
 
 @dataclass
 class EnhancementResult:
@@ -24,11 +115,18 @@ class PromptEnhancer:
     """Enhance user prompts with context and visualization guidance"""
     
     def __init__(self):
-        self.client = groq.Groq(api_key=os.getenv('GROQ_API_KEY'))
-        self.chroma_manager = ChromaManager()
-        self.schema_analyzer = SchemaAnalyzer()
+        self.chroma_manager = get_shared_chroma_manager()
+        self.schema_analyzer = get_shared_schema_analyzer()
+    
+    @property
+    def client(self) -> groq.AsyncGroq:
+        return get_groq_client()
     
-    def enhance_prompt(self, user_prompt: str) -> EnhancementResult:
+    def enhance_prompt_sync(self, user_prompt: str) -> EnhancementResult:
+        """Blocking wrapper around enhance_prompt for synchronous callers"""
+        return run_with_groq_client(self.enhance_prompt(user_prompt))
+    
+    async def enhance_prompt(self, user_prompt: str) -> EnhancementResult:
         """
         Enhance user prompt with context and best practices
         
@@ -39,139 +137,212 @@ class PromptEnhancer:
             EnhancementResult with enhanced prompt and metadata
         """
         
-        # Query knowledge base for relevant context
-        relevant_contexts = self.chroma_manager.query_relevant_context(
-            user_prompt, 
-            n_results=3
+        # Schema context and knowledge base lookup are independent (SQLite vs
+        # embedding + vector search), so they run side by side in threads
+        (schema_context, schema_fingerprint), (query_embedding, relevant_contexts) = await asyncio.gather(
+            asyncio.to_thread(self.schema_analyzer.get_prompt_context),
+            asyncio.to_thread(self._query_knowledge_base, user_prompt)
         )
         
-        # Debug prints
-        print(f"DEBUG: Found {len(relevant_contexts)} contexts")
-        if relevant_contexts:
-            print(f"DEBUG: Best distance: {relevant_contexts[0].get('distance', 1.0)}")
-            for i, ctx in enumerate(relevant_contexts):
-                print(f"DEBUG: Context {i+1}: {ctx['metadata'].get('file_name', 'Unknown')} - Distance: {ctx.get('distance', 1.0)}")
+        # Reuse the result for the same or a paraphrased prompt over the same schema
+        cached = await asyncio.to_thread(
+            self.chroma_manager.find_cached_enhancement, query_embedding, schema_fingerprint
+        )
+        if cached is not None:
+            return EnhancementResult(**cached)
         
-        # Get database schema context
-        schema_context = self.schema_analyzer.get_table_context_for_prompt(user_prompt)
+        # Lazy %-formatting: nothing is formatted unless DEBUG logging is enabled
+        logger.debug("Found %d contexts", len(relevant_contexts))
+        if relevant_contexts and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Best distance: %s", relevant_contexts[0].get('distance', 1.0))
+            for i, ctx in enumerate(relevant_contexts, 1):
+                logger.debug("Context %d: %s - Distance: %s", i, ctx['metadata'].get('file_name', 'Unknown'), ctx.get('distance', 1.0))
         
         # Determine if we have good context
         has_context = len(relevant_contexts) > 0 and relevant_contexts[0].get('distance', 1.0) < 0.7
         
         if has_context or schema_context.strip() != "No database tables available.":
-            enhanced_prompt, data_sources = self._enhance_with_context(
+            enhanced_prompt, data_sources = await self._enhance_with_context(
                 user_prompt, 
                 relevant_contexts,
                 schema_context
             )
             has_context = True  # Consider schema context as valid context
         else:
-            enhanced_prompt, data_sources = self._enhance_generic(user_prompt)
+            enhanced_prompt, data_sources = await self._enhance_generic(user_prompt)
         
-        # Extract metadata
-        metadata = self._extract_metadata(enhanced_prompt)
+        # One completion carries both the enhanced prompt and the model's metadata
+        enhanced_prompt, llm_metadata = _split_response(enhanced_prompt)
+        metadata = self._extract_metadata(enhanced_prompt, schema_context, llm_metadata)
         
-        return EnhancementResult(
+        result = EnhancementResult(
             enhanced_prompt=enhanced_prompt,
             metadata=metadata,
             data_sources=data_sources,
             has_context=has_context,
             sql_context=schema_context
         )
+        await asyncio.to_thread(
+            self.chroma_manager.cache_enhancement, user_prompt, query_embedding, schema_fingerprint, asdict(result)
+        )
+        
+        return result
     
-    def _enhance_with_context(self, user_prompt: str, contexts: List[Dict[str, Any]], schema_context: str) -> tuple[str, List[str]]:
+    def _query_knowledge_base(self, user_prompt: str) -> Tuple[List[float], List[Dict[str, Any]]]:
+        """
+        Embed the prompt once and find the most relevant file contexts with it
+        
+        The embedding is returned too, for the semantic cache lookup and store.
+        """
+        query_embedding = self.chroma_manager.embed_query(user_prompt)
+        relevant_contexts = self.chroma_manager.query_relevant_context(user_prompt, 3, query_embedding)
+        return query_embedding, relevant_contexts
+    
+    async def _enhance_with_context(self, user_prompt: str, contexts: List[Dict[str, Any]], schema_context: str) -> tuple[str, List[str]]:
         """Enhance prompt using knowledge base context and database schema"""
         
         # Format context information
         data_context = self._format_contexts(contexts) if contexts else "No specific file context available."
-        data_sources = list(set([ctx['metadata'].get('file_name', 'Unknown') for ctx in contexts])) if contexts else []
+        data_sources = list(dict.fromkeys(ctx['metadata'].get('file_name', 'Unknown') for ctx in contexts))
         
         # Add database tables as data sources
         if "No database tables available." not in schema_context:
             data_sources.append("Database Tables")
         
         # Apply context enhancement template
-        formatted_prompt = CONTEXT_ENHANCED_TEMPLATE.format(
+        formatted_prompt = fill_template(
+            CONTEXT_ENHANCED_SEGMENTS,
             user_prompt=user_prompt,
             data_context=data_context,
             schema_context=schema_context
         )
         
         # Get enhanced prompt from LLM
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": formatted_prompt}],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        enhanced_prompt = response.choices[0].message.content.strip()
+        enhanced_prompt = await self._complete(formatted_prompt, max_tokens=ENHANCEMENT_MAX_TOKENS)
         
         return enhanced_prompt, data_sources
     
-    def _enhance_generic(self, user_prompt: str) -> tuple[str, List[str]]:
+    async def _enhance_generic(self, user_prompt: str) -> tuple[str, List[str]]:
         """Enhance prompt with generic best practices"""
         
-        formatted_prompt = GENERIC_ENHANCED_TEMPLATE.format(
+        formatted_prompt = fill_template(
+            GENERIC_ENHANCED_SEGMENTS,
             user_prompt=user_prompt
         )
         
-        response = self.client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": formatted_prompt}],
-            temperature=0.7,
-            max_tokens=2000
-        )
-        
-        enhanced_prompt = response.choices[0].message.content.strip()
+        enhanced_prompt = await self._complete(formatted_prompt, max_tokens=ENHANCEMENT_MAX_TOKENS)
         
         return enhanced_prompt, ["Generic Enhancement"]
     
-    def _extract_metadata(self, enhanced_prompt: str) -> Dict[str, Any]:
-        """Extract structured metadata from enhanced prompt"""
+    def _extract_metadata(self, enhanced_prompt: str, schema_context: str,
+                          llm_metadata: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Structured metadata for the enhanced prompt, without an extra LLM call
+        
+        Args:
+            enhanced_prompt: Enhanced prompt from the LLM
+            schema_context: Schema context the prompt was enhanced with
+            llm_metadata: Metadata the model returned with the prompt, if any;
+                its valid fields take precedence over the values derived here
+            
+        Returns:
+            Dict with confidence_score, suggested_chart_types, data_requirements,
+            complexity_level and estimated_load_time
+        """
+        text = enhanced_prompt.lower()
+        
+        # Chart types in the order the prompt mentions them
+        chart_types = []
+        for match in _CHART_TYPE_RE.finditer(text):
+            chart_type = match.group(1)
+            if chart_type not in chart_types:
+                chart_types.append(chart_type)
+        
+        if any(cue.search(text) for cue in _COMPLEX_CUES):
+            complexity = "complex"
+        elif any(cue.search(text) for cue in _MODERATE_CUES):
+            complexity = "moderate"
+        else:
+            complexity = "simple"
+        
+        # Tables and columns of the schema that the enhanced prompt actually uses
+        tables = _schema_tables(schema_context)
+        referenced_tables = [table for table in tables if _mentions(text, table)]
+        referenced_columns = [
+            column for table in referenced_tables for column in tables[table] if _mentions(text, column)
+        ]
+        
+        if not tables:
+            confidence = 0.5
+        elif not referenced_tables:
+            confidence = 0.3
+        else:
+            confidence = 0.6 + 0.1 * min(len(referenced_columns), 3)
+        
+        metadata = {
+            "confidence_score": round(confidence, 2),
+            "suggested_chart_types": chart_types[:3] or self._get_default_metadata_value("suggested_chart_types"),
+            "data_requirements": list(dict.fromkeys(referenced_columns))[:10] or self._get_default_metadata_value("data_requirements"),
+            "complexity_level": complexity,
+            "estimated_load_time": _LOAD_TIME[complexity]
+        }
+        
+        for field, is_valid in _METADATA_VALIDATORS.items():
+            value = (llm_metadata or {}).get(field)
+            if value is not None and is_valid(value):
+                metadata[field] = value
+        
+        return metadata
+    
+    async def _complete(self, formatted_prompt: str, max_tokens: int) -> str:
+        """
+        Completion of a formatted prompt, served from the LLM cache when the same
+        prompt (template, context and user prompt) was enhanced before
         
-        formatted_prompt = METADATA_EXTRACTION_TEMPLATE.format(
-            enhanced_prompt=enhanced_prompt
+        Args:
+            formatted_prompt: Prompt with the template filled in
+            max_tokens: Completion length cap
+            
+        Returns:
+            Completion text
+        """
+        key = prompt_cache_key(ENHANCEMENT_MODEL, formatted_prompt, temperature=0.7, max_tokens=max_tokens, stop=[_RESPONSE_END])
+        cache = get_llm_cache()
+        
+        text = cache.get(key)
+        if text is not None:
+            return text
+        
+        text = await self._stream_completion(formatted_prompt, max_tokens)
+        
+        cache.put(key, text)
+        return text
+    
+    async def _stream_completion(self, formatted_prompt: str, max_tokens: int) -> str:
+        """
+        Stream the completion; generation stops at the end of the instructions
+        section, so no trailing prose after it is generated or downloaded
+        """
+        parts = []
+        
+        stream = await self.client.chat.completions.create(
+            model=ENHANCEMENT_MODEL,
+            messages=[{"role": "user", "content": formatted_prompt}],
+            temperature=0.7,
+            max_tokens=max_tokens,
+            stop=[_RESPONSE_END],
+            stream=True
         )
         
         try:
-            response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[{"role": "user", "content": formatted_prompt}],
-                temperature=0.7,
-                max_tokens=1000
-            )
-            
-            metadata_text = response.choices[0].message.content.strip()
-            
-            # Clean up response to extract JSON
-            if metadata_text.startswith('```json'):
-                metadata_text = metadata_text.replace('```json', '').replace('```', '').strip()
-            elif metadata_text.startswith('```'):
-                metadata_text = metadata_text.replace('```', '').strip()
-            
-            # Find JSON object in response
-            start_idx = metadata_text.find('{')
-            end_idx = metadata_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = metadata_text[start_idx:end_idx]
-                metadata = json.loads(json_str)
-            else:
-                raise ValueError("No JSON object found in response")
-            
-            # Validate required fields
-            required_fields = ['confidence_score', 'suggested_chart_types', 'data_requirements', 'complexity_level']
-            for field in required_fields:
-                if field not in metadata:
-                    metadata[field] = self._get_default_metadata_value(field)
-            
-            return metadata
-            
-        except (json.JSONDecodeError, ValueError, Exception) as e:
-            print(f"Error extracting metadata: {e}")
-            print(f"Raw response: {metadata_text if 'metadata_text' in locals() else 'No response'}")
-            return self._get_default_metadata()
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+        finally:
+            await stream.response.aclose()
+        
+        return "".join(parts).strip()
     
     def _format_contexts(self, contexts: List[Dict[str, Any]]) -> str:
         """Format context information for template"""
@@ -192,16 +363,6 @@ CONTENT: {document}
         
         return "\n".join(formatted_contexts)
     
-    def _get_default_metadata(self) -> Dict[str, Any]:
-        """Return default metadata when extraction fails"""
-        return {
-            "confidence_score": 0.5,
-            "suggested_chart_types": ["bar", "line"],
-            "data_requirements": ["data columns", "numeric values"],
-            "complexity_level": "moderate",
-            "estimated_load_time": "moderate"
-        }
-    
     def _get_default_metadata_value(self, field: str) -> Any:
         """Get default value for specific metadata field"""
         defaults = {
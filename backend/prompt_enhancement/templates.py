@@ -1,17 +1,17 @@
 """Prompt templates for enhancement engine"""
 
-CONTEXT_ENHANCED_TEMPLATE = """
-You are an expert data visualization and SQL assistant. Create comprehensive instructions for generating both SQL queries and interactive charts.
-
-USER REQUEST: "{user_prompt}"
+from string import Formatter
+from typing import Optional, Tuple
 
-AVAILABLE DATA CONTEXT:
-{data_context}
+# Templates put fixed instructions first and the per-request parts last, most
+# stable first (schema, then file context, then the user's words), so
+# consecutive requests share the longest possible prompt prefix and the
+# provider's prompt cache can reuse it.
 
-DATABASE SCHEMA:
-{schema_context}
+CONTEXT_ENHANCEMENT_INSTRUCTIONS = """
+You are an expert data visualization and SQL assistant. Create comprehensive instructions for generating both SQL queries and interactive charts.
 
-TASK: Generate detailed instructions that include:
+TASK: For the user request at the end, generate detailed instructions that include:
 
 1. SQL QUERY GENERATION:
    - Write a specific SQL query using the exact table and column names provided
@@ -39,10 +39,28 @@ TASK: Generate detailed instructions that include:
 Generate a comprehensive response that enables creation of both the SQL query and the interactive visualization.
 """
 
-GENERIC_ENHANCED_TEMPLATE = """
-You are an expert data visualization assistant. Enhance this user request with comprehensive technical guidance.
+# Metadata is returned with the enhanced prompt in the same completion, ahead of
+# the instructions so a long enhancement hitting the token cap cannot cut it off
+# (format fragment, so JSON braces are doubled)
+RESPONSE_FORMAT_INSTRUCTIONS = """
+RESPONSE FORMAT:
+Start with a single JSON object between <META> and </META>:
+<META>{{"confidence_score": <float between 0-1 indicating how well the request can be fulfilled>, "suggested_chart_types": [<recommended chart types>], "data_requirements": [<key data elements needed>], "complexity_level": "<simple|moderate|complex>", "estimated_load_time": "<fast|moderate|slow>"}}</META>
+Then write the instructions between <ENHANCED> and </ENHANCED>.
+"""
+
+CONTEXT_ENHANCED_TEMPLATE = CONTEXT_ENHANCEMENT_INSTRUCTIONS + RESPONSE_FORMAT_INSTRUCTIONS + """
+DATABASE SCHEMA:
+{schema_context}
+
+AVAILABLE DATA CONTEXT:
+{data_context}
 
 USER REQUEST: "{user_prompt}"
+"""
+
+GENERIC_ENHANCED_TEMPLATE = """
+You are an expert data visualization assistant. Enhance the user request at the end with comprehensive technical guidance.
 
 Since no specific data context is available, provide general but detailed instructions that include:
 
@@ -76,21 +94,21 @@ Since no specific data context is available, provide general but detailed instru
    - Recommend caching strategies
 
 Generate comprehensive instructions that enable creation of both robust SQL queries and engaging interactive visualizations, even without specific schema knowledge.
+""" + RESPONSE_FORMAT_INSTRUCTIONS + """
+USER REQUEST: "{user_prompt}"
 """
 
-METADATA_EXTRACTION_TEMPLATE = """
-Analyze this enhanced prompt and extract key metadata:
+# Templates split once into (literal text, placeholder) pairs, so filling one
+# is a single join instead of str.format re-parsing the template every request
+TemplateSegments = Tuple[Tuple[str, Optional[str]], ...]
 
-ENHANCED PROMPT: "{enhanced_prompt}"
+def compile_template(template: str) -> TemplateSegments:
+    """Split a str.format template into literal text and placeholder names"""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
 
-Extract and return ONLY a JSON object with:
-{{
-  "confidence_score": <float between 0-1 indicating how well the request can be fulfilled>,
-  "suggested_chart_types": [<list of recommended chart types>],
-  "data_requirements": [<list of key data elements needed>],
-  "complexity_level": "<simple|moderate|complex>",
-  "estimated_load_time": "<fast|moderate|slow>"
-}}
+def fill_template(segments: TemplateSegments, **values: str) -> str:
+    """Equivalent of template.format(**values) for a compiled template"""
+    return "".join([literal + values[field] if field else literal for literal, field in segments])
 
-Return only valid JSON, no additional text.
-"""
\ No newline at end of file
+CONTEXT_ENHANCED_SEGMENTS = compile_template(CONTEXT_ENHANCED_TEMPLATE)
+GENERIC_ENHANCED_SEGMENTS = compile_template(GENERIC_ENHANCED_TEMPLATE)
@@ -1,12 +1,22 @@
 import pandas as pd
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 import json
 import numpy as np
+import warnings
+
+try:
+    import pyarrow as pa
+    HAS_ARROW = True
+except ImportError:
+    HAS_ARROW = False
 
 from .query_executor import QueryExecutionResult
 from .sql_generator import SQLGenerationResult
 
+# Column name words that mark a text column as holding numbers
+_NUMERIC_KEYWORDS = ['sales', 'amount', 'count', 'price', 'quantity', 'total', 'sum', 'avg', 'mean']
+
 @dataclass
 class ProcessedData:
     """Structure for processed data ready for visualization"""
@@ -58,8 +68,8 @@ class DataProcessor:
         primary_result = successful_results[0]
         
         try:
-            # Convert to DataFrame for processing
-            df = pd.DataFrame(primary_result.data)
+            # Convert to DataFrame for processing, straight from the column lists
+            df = self._build_dataframe(primary_result)
             
             if df.empty:
                 return ProcessedData(
@@ -73,19 +83,25 @@ class DataProcessor:
             
             self.processing_log.append(f"Loaded {len(df)} rows with columns: {list(df.columns)}")
             
+            df = self._downcast_integers(df)
+            
+            # Inspect column dtypes once; the steps keep this up to date
+            column_types = self._column_types(df)
+            
             # Apply processing steps from SQL generation
-            processed_df = self._apply_processing_steps(df, sql_result.processing_steps)
+            processed_df, column_types = self._apply_processing_steps(df, sql_result.processing_steps, column_types)
             
             # Format data for charts
             chart_data = self._format_for_chart(processed_df, sql_result.chart_config)
             
             # Generate data summary
-            data_summary = self._generate_data_summary(processed_df, primary_result)
+            data_summary = self._generate_data_summary(processed_df, primary_result, column_types)
             
             # Enhance chart config with processed data insights
             enhanced_chart_config = self._enhance_chart_config(
                 sql_result.chart_config, 
-                processed_df
+                processed_df,
+                column_types
             )
             
             return ProcessedData(
@@ -106,10 +122,65 @@ class DataProcessor:
                 error_message=f"Data processing error: {str(e)}"
             )
     
-    def _apply_processing_steps(self, df: pd.DataFrame, processing_steps: List[Dict[str, Any]]) -> pd.DataFrame:
-        """Apply processing steps to the DataFrame"""
+    def _build_dataframe(self, query_result: QueryExecutionResult) -> pd.DataFrame:
+        """
+        DataFrame from a result's column lists
+        
+        With pyarrow installed the columns go through an Arrow table, whose
+        to_pandas allocates each column's block up front (split_blocks) and
+        frees the Arrow buffers as it goes (self_destruct), skipping pandas'
+        block consolidation copy. Columns Arrow cannot type (SQLite allows
+        mixed types in one column) fall back to the plain pandas constructor.
+        Duplicate column names collapse as in the dict form, last one wins.
+        """
+        columns = dict(zip(query_result.columns, query_result.column_data))
+        
+        if HAS_ARROW:
+            try:
+                return pa.table(columns).to_pandas(split_blocks=True, self_destruct=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                pass
+        
+        return pd.DataFrame(columns)
+    
+    def _downcast_integers(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Store integer columns in the smallest integer dtype that holds them
         
-        processed_df = df.copy()
+        Lossless (group sums and means still come back as int64/float64) and
+        shrinks the frame every later step and statistic has to scan. Floats
+        stay float64 since float32 would change the values sent to charts,
+        and text stays object since the axis and grouping logic keys on it.
+        """
+        integer_cols = df.select_dtypes(include=['integer']).columns
+        if len(integer_cols) == 0:
+            return df
+        
+        return df.assign(**{col: pd.to_numeric(df[col], downcast='integer') for col in integer_cols})
+    
+    def _column_types(self, df: pd.DataFrame) -> Dict[str, List[str]]:
+        """Numeric and categorical (object) column names, in column order"""
+        return {
+            'numeric': list(df.select_dtypes(include=['number']).columns),
+            'object': list(df.select_dtypes(include=['object']).columns)
+        }
+    
+    def _apply_processing_steps(
+        self, 
+        df: pd.DataFrame, 
+        processing_steps: List[Dict[str, Any]], 
+        column_types: Dict[str, List[str]]
+    ) -> Tuple[pd.DataFrame, Dict[str, List[str]]]:
+        """
+        Apply processing steps to the DataFrame
+        
+        Returns:
+            Tuple of (processed DataFrame, its column types)
+        """
+        
+        # Steps never modify their input in place (each returns a new frame, or
+        # the same one when it has nothing to do), so no defensive copy is needed
+        processed_df = df
         
         for step in processing_steps:
             step_type = step.get('type', '').lower()
@@ -119,37 +190,45 @@ class DataProcessor:
             
             try:
                 if step_type == 'aggregation':
-                    processed_df = self._apply_aggregation(processed_df, step)
+                    result_df = self._apply_aggregation(processed_df, step, column_types)
                 elif step_type == 'filtering':
-                    processed_df = self._apply_filtering(processed_df, step)
+                    result_df = self._apply_filtering(processed_df, step)
                 elif step_type == 'transformation':
-                    processed_df = self._apply_transformation(processed_df, step)
+                    result_df = self._apply_transformation(processed_df, step, column_types)
                 elif step_type == 'sorting':
-                    processed_df = self._apply_sorting(processed_df, step)
+                    result_df = self._apply_sorting(processed_df, step, column_types)
                 else:
                     self.processing_log.append(f"Unknown processing step type: {step_type}")
+                    continue
+                
+                # Aggregation drops columns and transformation converts dtypes;
+                # filtering and sorting keep the columns as they are
+                if step_type in ('aggregation', 'transformation') and result_df is not processed_df:
+                    column_types = self._column_types(result_df)
+                processed_df = result_df
                     
             except Exception as e:
                 self.processing_log.append(f"Error in processing step '{description}': {str(e)}")
                 continue
         
-        return processed_df
+        return processed_df, column_types
     
-    def _apply_aggregation(self, df: pd.DataFrame, step: Dict[str, Any]) -> pd.DataFrame:
+    def _apply_aggregation(self, df: pd.DataFrame, step: Dict[str, Any], column_types: Dict[str, List[str]]) -> pd.DataFrame:
         """Apply aggregation transformations"""
         details = step.get('details', '')
         
         # Simple aggregation logic based on details
         if 'group by' in details.lower():
             # Try to identify grouping column from first non-numeric column
-            group_cols = df.select_dtypes(include=['object']).columns
+            group_cols = column_types['object']
             if len(group_cols) > 0:
                 group_col = group_cols[0]
-                numeric_cols = df.select_dtypes(include=['number']).columns
+                numeric_cols = column_types['numeric']
                 
                 if len(numeric_cols) > 0:
-                    agg_dict = {col: 'sum' for col in numeric_cols}
-                    result = df.groupby(group_col).agg(agg_dict).reset_index()
+                    # Column-wise sum on the grouped frame (vectorized per dtype
+                    # block); same result as agg({col: 'sum'}).reset_index()
+                    result = df.groupby(group_col, as_index=False)[numeric_cols].sum()
                     self.processing_log.append(f"Grouped by {group_col}, aggregated {len(numeric_cols)} numeric columns")
                     return result
         
@@ -160,65 +239,66 @@ class DataProcessor:
         details = step.get('details', '')
         
         # Basic filtering - remove null values from key columns
-        initial_rows = len(df)
-        df_filtered = df.dropna()
+        complete_rows = df.notna().all(axis=1)
+        if complete_rows.all():
+            return df
         
-        if len(df_filtered) < initial_rows:
-            self.processing_log.append(f"Filtered out {initial_rows - len(df_filtered)} rows with null values")
+        df_filtered = df[complete_rows]
+        self.processing_log.append(f"Filtered out {len(df) - len(df_filtered)} rows with null values")
         
         return df_filtered
     
-    def _apply_transformation(self, df: pd.DataFrame, step: Dict[str, Any]) -> pd.DataFrame:
+    def _apply_transformation(self, df: pd.DataFrame, step: Dict[str, Any], column_types: Dict[str, List[str]]) -> pd.DataFrame:
         """Apply data transformations"""
         details = step.get('details', '')
         
-        # Basic transformations
-        df_transformed = df.copy()
-        
         # IMPORTANT: Only convert columns that are clearly numeric
         # Do NOT convert string columns that might be categories/labels
-        for col in df_transformed.columns:
-            if df_transformed[col].dtype == 'object':
-                # Check if this column contains numeric-looking values
-                sample_values = df_transformed[col].dropna().head(10)
-                
-                # Only convert if ALL non-null values look like numbers
-                try:
-                    # Try to convert a sample
-                    test_values = pd.to_numeric(sample_values, errors='coerce')
-                    
-                    # Only proceed if:
-                    # 1. No NaN values were created (all were valid numbers)
-                    # 2. The column name suggests it's numeric (contains words like 'sales', 'amount', 'count', etc.)
-                    numeric_keywords = ['sales', 'amount', 'count', 'price', 'quantity', 'total', 'sum', 'avg', 'mean']
-                    is_numeric_column = any(keyword in col.lower() for keyword in numeric_keywords)
-                    
-                    if not test_values.isna().any() and is_numeric_column:
-                        df_transformed[col] = pd.to_numeric(df_transformed[col], errors='coerce')
-                        self.processing_log.append(f"Converted {col} to numeric (detected numeric values)")
-                    else:
-                        self.processing_log.append(f"Kept {col} as string (categorical data)")
-                except:
-                    # If conversion fails, keep as string
-                    self.processing_log.append(f"Kept {col} as string (conversion failed)")
-                    continue
+        to_convert = []
         
-        return df_transformed
+        for col in column_types['object']:
+            # The column name must suggest it's numeric; checked first since
+            # it is free and rules out most label columns without parsing
+            if not any(keyword in col.lower() for keyword in _NUMERIC_KEYWORDS):
+                self.processing_log.append(f"Kept {col} as string (categorical data)")
+                continue
+            
+            # Only convert if ALL sampled non-null values look like numbers
+            try:
+                sample_values = df[col].dropna().head(10)
+                test_values = pd.to_numeric(sample_values, errors='coerce')
+            except Exception:
+                # If conversion fails, keep as string
+                self.processing_log.append(f"Kept {col} as string (conversion failed)")
+                continue
+            
+            if not test_values.isna().any():
+                to_convert.append(col)
+                self.processing_log.append(f"Converted {col} to numeric (detected numeric values)")
+            else:
+                self.processing_log.append(f"Kept {col} as string (categorical data)")
+        
+        if not to_convert:
+            return df
+        
+        # Convert every qualifying column in one pass and copy the frame once
+        converted = df[to_convert].apply(pd.to_numeric, errors='coerce')
+        return df.assign(**{col: converted[col] for col in to_convert})
     
-    def _apply_sorting(self, df: pd.DataFrame, step: Dict[str, Any]) -> pd.DataFrame:
+    def _apply_sorting(self, df: pd.DataFrame, step: Dict[str, Any], column_types: Dict[str, List[str]]) -> pd.DataFrame:
         """Apply sorting transformations"""
         details = step.get('details', '')
         
         # Sort by first numeric column descending, or first column ascending
         if len(df) > 1:
-            numeric_cols = df.select_dtypes(include=['number']).columns
+            numeric_cols = column_types['numeric']
             if len(numeric_cols) > 0:
                 sort_col = numeric_cols[0]
-                df_sorted = df.sort_values(by=sort_col, ascending=False)
+                df_sorted = df.sort_values(by=sort_col, ascending=False, kind='stable')
                 self.processing_log.append(f"Sorted by {sort_col} (descending)")
             else:
                 sort_col = df.columns[0]
-                df_sorted = df.sort_values(by=sort_col, ascending=True)
+                df_sorted = df.sort_values(by=sort_col, ascending=True, kind='stable')
                 self.processing_log.append(f"Sorted by {sort_col} (ascending)")
             
             return df_sorted
@@ -239,66 +319,38 @@ class DataProcessor:
         y_axis = chart_config.get('y_axis')
         
         if x_axis and y_axis and x_axis in df.columns and y_axis in df.columns:
-            # Return data with explicit x/y naming for charts
-            chart_data = []
-            for _, row in df.iterrows():
-                # Create the data point
-                data_point = {
-                    'x': row[x_axis],
-                    'y': row[y_axis],
-                    x_axis: row[x_axis],  # Keep original column names too
-                    y_axis: row[y_axis],
-                }
-                
-                # Add all other columns
-                for col in df.columns:
-                    if col not in [x_axis, y_axis]:
-                        data_point[col] = row[col]
-                
-                # Convert any NaN values to None for JSON serialization
-                for key, value in data_point.items():
-                    if pd.isna(value):
-                        data_point[key] = None
-                    # Convert numpy types to Python types
-                    elif isinstance(value, np.integer):
-                        data_point[key] = int(value)
-                    elif isinstance(value, np.floating):
-                        data_point[key] = float(value)
-                    elif isinstance(value, np.ndarray):
-                        data_point[key] = value.tolist()
-                
-                chart_data.append(data_point)
+            # Return data with explicit x/y naming for charts, keeping the
+            # original column names too (x/y and the axis columns come first)
+            chart_data = [
+                {'x': row[x_axis], 'y': row[y_axis], x_axis: row[x_axis], y_axis: row[y_axis], **row}
+                for row in self._json_records(df)
+            ]
             
             self.processing_log.append(f"Formatted data for {chart_type} chart with x={x_axis}, y={y_axis}")
             return chart_data
         
         # Fallback to raw data with type conversion
-        chart_data = []
-        for _, row in df.iterrows():
-            data_point = {}
-            for col in df.columns:
-                value = row[col]
-                # Convert any NaN values to None for JSON serialization
-                if pd.isna(value):
-                    data_point[col] = None
-                # Convert numpy types to Python types
-                elif isinstance(value, np.integer):
-                    data_point[col] = int(value)
-                elif isinstance(value, np.floating):
-                    data_point[col] = float(value)
-                elif isinstance(value, np.ndarray):
-                    data_point[col] = value.tolist()
-                else:
-                    data_point[col] = value
-            chart_data.append(data_point)
+        return self._json_records(df)
+    
+    def _json_records(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
+        """
+        Rows as dicts ready for JSON serialization, built column-wise
         
-        return chart_data
+        Casting to object turns numpy scalars into Python ints/floats, and
+        missing values (NaN, NaT, None) become None.
+        """
+        return df.astype(object).where(df.notna(), None).to_dict('records')
     
-    def _generate_data_summary(self, df: pd.DataFrame, query_result: QueryExecutionResult) -> Dict[str, Any]:
+    def _generate_data_summary(
+        self, 
+        df: pd.DataFrame, 
+        query_result: QueryExecutionResult, 
+        column_types: Dict[str, List[str]]
+    ) -> Dict[str, Any]:
         """Generate summary statistics about the processed data"""
         
-        numeric_cols = df.select_dtypes(include=['number']).columns
-        categorical_cols = df.select_dtypes(include=['object']).columns
+        numeric_cols = column_types['numeric']
+        categorical_cols = column_types['object']
         
         summary = {
             'total_rows': len(df),
@@ -311,36 +363,74 @@ class DataProcessor:
         }
         
         # Add statistics for numeric columns
+        # (one float64 block, reduced column-wise in a single numpy pass)
         if len(numeric_cols) > 0:
-            summary['numeric_stats'] = {}
-            for col in numeric_cols:
-                summary['numeric_stats'][col] = {
-                    'min': float(df[col].min()),
-                    'max': float(df[col].max()),
-                    'mean': float(df[col].mean()),
-                    'null_count': int(df[col].isnull().sum())
+            values = df[numeric_cols].to_numpy(dtype='float64', na_value=np.nan)
+            null_counts = np.isnan(values).sum(axis=0)
+            with warnings.catch_warnings():
+                # All-null columns reduce to NaN, as Series.min()/max()/mean() do
+                warnings.simplefilter('ignore', RuntimeWarning)
+                mins = np.nanmin(values, axis=0)
+                maxs = np.nanmax(values, axis=0)
+                means = np.nanmean(values, axis=0)
+            
+            summary['numeric_stats'] = {
+                col: {
+                    'min': float(mins[i]),
+                    'max': float(maxs[i]),
+                    'mean': float(means[i]),
+                    'null_count': int(null_counts[i])
                 }
+                for i, col in enumerate(numeric_cols)
+            }
         
-        # Add info about categorical columns
+        # Add info about categorical columns (the unique count comes from the
+        # same value_counts pass as the top values)
         if len(categorical_cols) > 0:
             summary['categorical_stats'] = {}
             for col in categorical_cols[:3]:  # Limit to first 3
+                value_counts = df[col].value_counts()
                 summary['categorical_stats'][col] = {
-                    'unique_count': int(df[col].nunique()),
-                    'top_values': df[col].value_counts().head(3).to_dict()
+                    'unique_count': len(value_counts),
+                    'top_values': value_counts.head(3).to_dict()
                 }
         
+        summary['schema'] = self._describe_schema(df, summary)
+        
         return summary
     
-    def _enhance_chart_config(self, original_config: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any]:
+    def _describe_schema(self, df: pd.DataFrame, summary: Dict[str, Any]) -> str:
+        """Compact one-line schema for LLM prompts, e.g. region (object, 4 unique); sales (float64, 1.5..920)"""
+        numeric_stats = summary.get('numeric_stats', {})
+        categorical_stats = summary.get('categorical_stats', {})
+        
+        parts = []
+        for col in df.columns:
+            if col in numeric_stats:
+                detail = f", {numeric_stats[col]['min']:g}..{numeric_stats[col]['max']:g}"
+            elif col in categorical_stats:
+                detail = f", {categorical_stats[col]['unique_count']} unique"
+            else:
+                detail = ""
+            parts.append(f"{col} ({df[col].dtype}{detail})")
+        
+        return "; ".join(parts)
+    
+    def _enhance_chart_config(
+        self, 
+        original_config: Dict[str, Any], 
+        df: pd.DataFrame, 
+        column_types: Dict[str, List[str]]
+    ) -> Dict[str, Any]:
         """Enhance chart configuration based on processed data"""
         
         enhanced_config = original_config.copy()
+        numeric_cols = column_types['numeric']
+        categorical_cols = column_types['object']
         
         # Auto-detect better x/y columns if not specified or invalid
         if not enhanced_config.get('x_axis') or enhanced_config.get('x_axis') not in df.columns:
             # Use first categorical or first column as x-axis
-            categorical_cols = df.select_dtypes(include=['object']).columns
             if len(categorical_cols) > 0:
                 enhanced_config['x_axis'] = categorical_cols[0]
             elif len(df.columns) > 0:
@@ -348,7 +438,6 @@ class DataProcessor:
         
         if not enhanced_config.get('y_axis') or enhanced_config.get('y_axis') not in df.columns:
             # Use first numeric column as y-axis
-            numeric_cols = df.select_dtypes(include=['number']).columns
             if len(numeric_cols) > 0:
                 enhanced_config['y_axis'] = numeric_cols[0]
             elif len(df.columns) > 1:
@@ -356,9 +445,6 @@ class DataProcessor:
         
         # Suggest better chart type based on data
         if not enhanced_config.get('chart_type'):
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            categorical_cols = df.select_dtypes(include=['object']).columns
-            
             if len(numeric_cols) >= 1 and len(categorical_cols) >= 1:
                 enhanced_config['chart_type'] = 'bar'
             elif len(numeric_cols) >= 2:
@@ -1,27 +1,69 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import dataclasses
 import sqlite3
+import threading
 from typing import Dict, Any, List, Optional, Tuple
 from dataclasses import dataclass
 import pandas as pd
 
-from database import DatabaseManager
+from database import DatabaseManager, get_shared_db_manager
 from .sql_generator import SQLGenerator, SQLGenerationResult
 
+# Successful results kept per process, reused while the schema signature
+# (tables, loads, row counts) is unchanged
+QUERY_RESULT_CACHE_SIZE = 128
+
+# Cache size limits in values (rows x columns): results above the per-result
+# limit are never cached, and least recently used results are evicted while
+# the cache holds more than the total
+QUERY_RESULT_MAX_CACHED_CELLS = 100_000
+QUERY_RESULT_CACHE_MAX_CELLS = 1_000_000
+
+# Upper bound on generated queries executed at once
+MAX_PARALLEL_QUERIES = 4
+
+# Generated queries run on one long-lived pool per process: each thread opens
+# its database read connection once and reuses it for every later request,
+# so connections stay bounded instead of piling up per request
+_query_pool = ThreadPoolExecutor(max_workers=MAX_PARALLEL_QUERIES, thread_name_prefix='query')
+
 @dataclass
 class QueryExecutionResult:
-    """Structure for query execution results"""
-    data: List[Dict[str, Any]]
+    """Structure for query execution results (values stored column-wise)"""
+    column_data: List[List[Any]]
     columns: List[str]
     row_count: int
     execution_time: float
     query_used: str
     success: bool
     error_message: Optional[str] = None
+    
+    @property
+    def rows(self) -> List[Tuple]:
+        """Rows as tuples (built on access)"""
+        return list(zip(*self.column_data))
+    
+    @property
+    def data(self) -> List[Dict[str, Any]]:
+        """Rows as dictionaries keyed by column name (built on access)"""
+        return [dict(zip(self.columns, row)) for row in self.rows]
+
+def _result_cells(result: QueryExecutionResult) -> int:
+    """Number of values a result holds (what the cache limits count)"""
+    return result.row_count * len(result.columns)
 
 class QueryExecutor:
     """Execute SQL queries with automatic error handling and retry logic"""
     
+    # (db_path, query) -> (schema signature, result); shared by every executor
+    # in the process since callers create one per request
+    _result_cache: "OrderedDict[Tuple[str, str], Tuple[Tuple, QueryExecutionResult]]" = OrderedDict()
+    _result_cache_lock = threading.Lock()
+    _result_cache_cells = 0
+    
     def __init__(self, db_manager: DatabaseManager = None):
-        self.db_manager = db_manager or DatabaseManager()
+        self.db_manager = db_manager or get_shared_db_manager()
         self.sql_generator = SQLGenerator()
         self.max_retry_attempts = 3
     
@@ -43,20 +85,27 @@ class QueryExecutor:
         if not sql_result.success:
             return sql_result, []
         
-        # Execute all generated queries
-        execution_results = []
+        # Execute all generated queries; they are independent reads, so they
+        # run concurrently on the query pool (each thread on its own read
+        # connection, with the GIL released inside sqlite3) and results keep
+        # the generated order
+        queries = sql_result.queries
         
-        for i, query in enumerate(sql_result.queries):
-            print(f"Executing query {i+1}/{len(sql_result.queries)}...")
+        def execute(indexed_query: Tuple[int, str]) -> QueryExecutionResult:
+            i, query = indexed_query
+            print(f"Executing query {i+1}/{len(queries)}...")
             print(f"Query: {query[:100]}...")
             
             result = self._execute_single_query(query, schema_context)
-            execution_results.append(result)
             
             if result.success:
                 print(f"✅ Query {i+1} executed successfully: {result.row_count} rows returned")
             else:
                 print(f"❌ Query {i+1} failed: {result.error_message}")
+            
+            return result
+        
+        execution_results = list(_query_pool.map(execute, enumerate(queries)))
         
         return sql_result, execution_results
     
@@ -73,34 +122,41 @@ class QueryExecutor:
         """
         import time
         
+        # Repeated queries (dashboard refreshes, identical prompts) are served
+        # from the result cache until the data changes
+        start_time = time.time()
+        cache_key = (self.db_manager.db_path, query)
+        signature = self.db_manager.get_schema_signature()
+        
+        with self._result_cache_lock:
+            cached = self._result_cache.get(cache_key)
+            if cached and cached[0] == signature:
+                self._result_cache.move_to_end(cache_key)
+                return dataclasses.replace(cached[1], execution_time=time.time() - start_time)
+        
         current_query = query
         
         for attempt in range(self.max_retry_attempts):
             try:
                 start_time = time.time()
                 
-                # Execute query
-                with sqlite3.connect(self.db_manager.db_path) as conn:
-                    conn.row_factory = sqlite3.Row
-                    cursor = conn.cursor()
-                    
-                    cursor.execute(current_query)
-                    rows = cursor.fetchall()
-                    
-                    # Convert to list of dictionaries
-                    data = [dict(row) for row in rows]
-                    columns = list(rows[0].keys()) if rows else []
-                    
-                    execution_time = time.time() - start_time
-                    
-                    return QueryExecutionResult(
-                        data=data,
-                        columns=columns,
-                        row_count=len(data),
-                        execution_time=execution_time,
-                        query_used=current_query,
-                        success=True
-                    )
+                # Execute query (read-only, on this thread's read connection)
+                columns, column_data = self.db_manager.execute_query_columns(current_query)
+                
+                execution_time = time.time() - start_time
+                
+                result = QueryExecutionResult(
+                    column_data=column_data,
+                    columns=columns,
+                    row_count=len(column_data[0]) if column_data else 0,
+                    execution_time=execution_time,
+                    query_used=current_query,
+                    success=True
+                )
+                
+                self._cache_result(cache_key, signature, result)
+                
+                return result
                     
             except sqlite3.Error as e:
                 error_message = str(e)
@@ -124,7 +180,7 @@ class QueryExecutor:
                 # If this is the last attempt or no fix available
                 if attempt == self.max_retry_attempts - 1:
                     return QueryExecutionResult(
-                        data=[],
+                        column_data=[],
                         columns=[],
                         row_count=0,
                         execution_time=0.0,
@@ -136,7 +192,7 @@ class QueryExecutor:
             except Exception as e:
                 # Non-SQL errors (shouldn't happen in normal operation)
                 return QueryExecutionResult(
-                    data=[],
+                    column_data=[],
                     columns=[],
                     row_count=0,
                     execution_time=0.0,
@@ -147,7 +203,7 @@ class QueryExecutor:
         
         # This shouldn't be reached, but just in case
         return QueryExecutionResult(
-            data=[],
+            column_data=[],
             columns=[],
             row_count=0,
             execution_time=0.0,
@@ -156,6 +212,35 @@ class QueryExecutor:
             error_message="Maximum retry attempts exceeded"
         )
     
+    @classmethod
+    def _cache_result(cls, cache_key: Tuple[str, str], signature: Tuple, result: QueryExecutionResult):
+        """Store a result in the shared cache, evicting to stay within its limits"""
+        cells = _result_cells(result)
+        
+        with cls._result_cache_lock:
+            cls._uncache(cache_key)
+            if cells > QUERY_RESULT_MAX_CACHED_CELLS:
+                return
+            
+            cls._result_cache[cache_key] = (signature, result)
+            cls._result_cache_cells += cells
+            while (len(cls._result_cache) > QUERY_RESULT_CACHE_SIZE
+                   or cls._result_cache_cells > QUERY_RESULT_CACHE_MAX_CELLS):
+                cls._uncache(next(iter(cls._result_cache)))
+    
+    @classmethod
+    def _uncache(cls, cache_key: Tuple[str, str]):
+        """Remove a cached result, if present (caller holds the lock)"""
+        cached = cls._result_cache.pop(cache_key, None)
+        if cached:
+            cls._result_cache_cells -= _result_cells(cached[1])
+    
+    def clear_cache(self):
+        """Drop cached query results for this executor's database"""
+        with self._result_cache_lock:
+            for key in [key for key in self._result_cache if key[0] == self.db_manager.db_path]:
+                self._uncache(key)
+    
     def execute_raw_query(self, query: str) -> QueryExecutionResult:
         """
         Execute a raw SQL query (for testing/debugging)
@@ -170,7 +255,7 @@ class QueryExecutor:
         # Validate query first
         if not self.sql_generator._validate_sql_query(query):
             return QueryExecutionResult(
-                data=[],
+                column_data=[],
                 columns=[],
                 row_count=0,
                 execution_time=0.0,
@@ -179,7 +264,9 @@ class QueryExecutor:
                 error_message="Query failed validation (unsafe or invalid syntax)"
             )
         
-        return self._execute_single_query(query, "")
+        # On the query pool, like generated queries, so no other thread opens
+        # a read connection
+        return _query_pool.submit(self._execute_single_query, query, "").result()
     
     def get_sample_queries(self) -> List[Dict[str, str]]:
         """
@@ -1,11 +1,13 @@
 import groq
+import orjson
 import re
 from typing import Dict, Any, List, Optional, Tuple
-import os
-from dotenv import load_dotenv
 from dataclasses import dataclass
+from utils import get_llm_cache, get_settings, prompt_cache_key
 
-load_dotenv()
+SQL_MODEL = "llama-3.1-8b-instant"
+
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
 
 @dataclass
 class SQLGenerationResult:
@@ -20,7 +22,7 @@ class SQLGenerator:
     """Generate and validate SQL queries from enhanced prompts"""
     
     def __init__(self):
-        self.client = groq.Groq(api_key=os.getenv('GROQ_API_KEY'))
+        self.client = groq.Groq(api_key=get_settings().groq_api_key)
         
         # SQL validation patterns
         self.dangerous_patterns = [
@@ -84,14 +86,20 @@ Return ONLY the JSON object, no additional text.
 """
         
         try:
-            response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[{"role": "user", "content": generation_prompt}],
-                temperature=0.2,
-                max_tokens=1500
-            )
+            # The same enhanced prompt over the same schema reuses its SQL
+            cache = get_llm_cache()
+            cache_key = prompt_cache_key(SQL_MODEL, generation_prompt, temperature=0.2, max_tokens=1500)
+            response_text = cache.get(cache_key)
             
-            response_text = response.choices[0].message.content.strip()
+            if response_text is None:
+                response = self.client.chat.completions.create(
+                    model=SQL_MODEL,
+                    messages=[{"role": "user", "content": generation_prompt}],
+                    temperature=0.2,
+                    max_tokens=1500
+                )
+                
+                response_text = response.choices[0].message.content.strip()
             
             # Extract JSON from response
             json_data = self._extract_json_from_response(response_text)
@@ -124,6 +132,8 @@ Return ONLY the JSON object, no additional text.
                     error_message="No valid queries generated"
                 )
             
+            cache.put(cache_key, response_text)
+            
             return SQLGenerationResult(
                 queries=validated_queries,
                 processing_steps=json_data.get('processing_steps', []),
@@ -177,7 +187,7 @@ Fixed Query:
         
         try:
             response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
+                model=SQL_MODEL,
                 messages=[{"role": "user", "content": fix_prompt}],
                 temperature=0.1,
                 max_tokens=500
@@ -201,47 +211,16 @@ Fixed Query:
     
     def _extract_json_from_response(self, response_text: str) -> Optional[Dict[str, Any]]:
         """Extract JSON object from LLM response"""
-        import json
+        # Outermost braces wherever the model put them (```json fences, prose)
+        match = _JSON_OBJECT_RE.search(response_text)
+        json_str = match.group(0) if match else response_text
         
         try:
-            # Remove code block formatting if present
-            cleaned_text = response_text
-            
-            # Handle various markdown code block formats
-            if '```json' in cleaned_text:
-                # Extract content between ```json and ```
-                start_marker = '```json'
-                end_marker = '```'
-                start_idx = cleaned_text.find(start_marker)
-                if start_idx != -1:
-                    start_idx += len(start_marker)
-                    end_idx = cleaned_text.find(end_marker, start_idx)
-                    if end_idx != -1:
-                        cleaned_text = cleaned_text[start_idx:end_idx].strip()
-            
-            elif cleaned_text.startswith('```'):
-                # Remove generic code blocks
-                cleaned_text = re.sub(r'```[\w]*\n?', '', cleaned_text).strip()
-                cleaned_text = cleaned_text.replace('```', '').strip()
-            
-            # Find JSON object boundaries
-            start_idx = cleaned_text.find('{')
-            end_idx = cleaned_text.rfind('}') + 1
-            
-            if start_idx != -1 and end_idx > start_idx:
-                json_str = cleaned_text[start_idx:end_idx]
-                
-                # Clean up control characters that break JSON parsing
-                # Replace problematic characters in SQL strings
-                json_str = self._clean_json_string(json_str)
-                
-                return json.loads(json_str)
-            else:
-                # Try to parse the entire cleaned response as JSON
-                cleaned_text = self._clean_json_string(cleaned_text)
-                return json.loads(cleaned_text)
+            # Clean up control characters that break JSON parsing
+            # Replace problematic characters in SQL strings
+            return orjson.loads(self._clean_json_string(json_str))
                 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             print(f"JSON parsing error: {e}")
             print(f"Response text: {response_text}")
             
@@ -249,8 +228,8 @@ Fixed Query:
             try:
                 cleaned_json = self._aggressive_json_cleanup(response_text)
                 if cleaned_json:
-                    return json.loads(cleaned_json)
-            except:
+                    return orjson.loads(cleaned_json)
+            except orjson.JSONDecodeError:
                 pass
                 
             return None
@@ -356,7 +335,7 @@ Keep it non-technical and focused on business value.
         
         try:
             response = self.client.chat.completions.create(
-                model="llama3-8b-8192",
+                model=SQL_MODEL,
                 messages=[{"role": "user", "content": explain_prompt}],
                 temperature=0.3,
                 max_tokens=200
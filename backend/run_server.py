@@ -5,6 +5,7 @@ Run the AI Dashboard API server
 
 import uvicorn
 import os
+import sys
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -29,6 +30,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
+        # libuv event loop + C HTTP parser (uvloop is not available on Windows)
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
         log_level="info",
         access_log=True
     )
\ No newline at end of file
@@ -0,0 +1,70 @@
+"""
+Unit tests for the in-process component cache
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add backend directory to path so we can import chart_generation
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chart_generation.component_cache import ComponentMemoryCache, cosine_similarity, prompt_vector
+
+class TestComponentMemoryCache(unittest.TestCase):
+    """Test cases for ComponentMemoryCache"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.cache = ComponentMemoryCache(max_entries=2, similarity_threshold=0.8)
+    
+    def test_exact_lookup(self):
+        """Stored components are returned by cache key"""
+        self.cache.put("k1", "data", "sales by region", {"name": "A"})
+        self.assertEqual(self.cache.get("k1"), {"name": "A"})
+        self.assertIsNone(self.cache.get("missing"))
+    
+    def test_evicts_least_recently_used(self):
+        """The least recently used entry is evicted when full"""
+        self.cache.put("k1", "data", "one", {"name": "A"})
+        self.cache.put("k2", "data", "two", {"name": "B"})
+        self.cache.get("k1")
+        self.cache.put("k3", "data", "three", {"name": "C"})
+        
+        self.assertIsNone(self.cache.get("k2"))
+        self.assertEqual(self.cache.get("k1"), {"name": "A"})
+        self.assertEqual(self.cache.get("k3"), {"name": "C"})
+    
+    def test_find_similar_same_data_only(self):
+        """Near-duplicate prompts match only over the same data"""
+        self.cache.put("k1", "data", "show total sales by region", {"name": "A"})
+        
+        self.assertEqual(self.cache.find_similar("data", "Show total sales by region!"), {"name": "A"})
+        self.assertIsNone(self.cache.find_similar("other", "show total sales by region"))
+        self.assertIsNone(self.cache.find_similar("data", "plot customer churn over time"))
+    
+    def test_eviction_unindexes_data_key(self):
+        """Evicted entries are no longer found as near duplicates"""
+        self.cache.put("k1", "d1", "sales by region", {"name": "A"})
+        self.cache.put("k2", "d2", "one", {"name": "B"})
+        self.cache.put("k3", "d3", "two", {"name": "C"})
+        
+        self.assertIsNone(self.cache.find_similar("d1", "sales by region"))
+        self.assertNotIn("d1", self.cache._keys_by_data)
+    
+    def test_replacing_key_moves_data_index(self):
+        """Re-putting a key under new data removes it from the old data's index"""
+        self.cache.put("k1", "d1", "sales by region", {"name": "A"})
+        self.cache.put("k1", "d2", "sales by region", {"name": "B"})
+        
+        self.assertIsNone(self.cache.find_similar("d1", "sales by region"))
+        self.assertEqual(self.cache.find_similar("d2", "sales by region"), {"name": "B"})
+    
+    def test_cosine_similarity(self):
+        """Identical prompts score 1, disjoint or empty ones 0"""
+        self.assertAlmostEqual(cosine_similarity(prompt_vector("a b"), prompt_vector("B A")), 1.0)
+        self.assertEqual(cosine_similarity(prompt_vector("a"), prompt_vector("b")), 0.0)
+        self.assertEqual(cosine_similarity(prompt_vector(""), prompt_vector("b")), 0.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Unit tests for extracting component JSON from LLM responses
+"""
+
+import unittest
+import sys
+import json
+from pathlib import Path
+
+# Add backend directory to path so we can import chart_generation
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from chart_generation.component_generator import _find_json_object, _repair_component_code_value
+
+class TestFindJsonObject(unittest.TestCase):
+    """Test cases for _find_json_object"""
+    
+    def test_object_inside_prose(self):
+        """The balanced object is found between surrounding text"""
+        text = 'Here you go: {"a": {"b": 1}} hope that helps'
+        start, end = _find_json_object(text)
+        self.assertEqual(text[start:end], '{"a": {"b": 1}}')
+    
+    def test_braces_inside_strings(self):
+        """Braces inside string values do not end the object"""
+        text = '{"code": "const f = () => { return \\"}\\"; };"} tail'
+        start, end = _find_json_object(text)
+        self.assertEqual(json.loads(text[start:end])['code'], 'const f = () => { return "}"; };')
+    
+    def test_quotes_in_leading_prose(self):
+        """Quotes before the object are not treated as a string"""
+        text = 'The "chart": {"a": 1}'
+        start, end = _find_json_object(text)
+        self.assertEqual(text[start:end], '{"a": 1}')
+    
+    def test_no_object(self):
+        """Unbalanced or missing objects give None"""
+        self.assertIsNone(_find_json_object('no json here'))
+        self.assertIsNone(_find_json_object('{"a": {"b": 1}'))
+
+class TestRepairComponentCodeValue(unittest.TestCase):
+    """Test cases for _repair_component_code_value"""
+    
+    def test_unescaped_quotes_and_newlines(self):
+        """Raw quotes and newlines in the code value are escaped"""
+        code = 'const A = () => {\n  return <div className="chart">Hi</div>;\n};'
+        broken = '{"component_code": "' + code + '", "component_name": "A"}'
+        
+        repaired = json.loads(_repair_component_code_value(broken))
+        self.assertEqual(repaired, {"component_code": code, "component_name": "A"})
+    
+    def test_invalid_escape_and_control_characters(self):
+        """Invalid escapes keep their backslash; control characters are escaped"""
+        broken = '{"component_code": "a\\d\tb\x01"}'
+        
+        repaired = json.loads(_repair_component_code_value(broken))
+        self.assertEqual(repaired["component_code"], 'a\\d\tb\x01')
+    
+    def test_valid_json_unchanged(self):
+        """Already valid JSON is returned as is"""
+        valid = json.dumps({"component_code": 'x = "y";\n', "chart_type": "bar"})
+        self.assertEqual(_repair_component_code_value(valid), valid)
+    
+    def test_missing_value(self):
+        """No component_code string gives None"""
+        self.assertIsNone(_repair_component_code_value('{"component_name": "A"}'))
+        self.assertIsNone(_repair_component_code_value('{"component_code": 5}'))
+        self.assertIsNone(_repair_component_code_value('{"component_code": "unterminated'))
+
+if __name__ == '__main__':
+    unittest.main()
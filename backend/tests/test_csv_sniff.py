@@ -0,0 +1,63 @@
+"""
+Unit tests for CSV encoding and delimiter detection
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+from pathlib import Path
+
+# Add backend directory to path so we can import utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from utils.csv_sniff import CSV_SNIFF_BYTES, sniff_csv
+
+class TestSniffCsv(unittest.TestCase):
+    """Test cases for sniff_csv"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+    
+    def _write(self, data: bytes) -> str:
+        path = os.path.join(self.tmp_dir.name, 'data.csv')
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+    
+    def test_utf8_comma(self):
+        """Plain UTF-8 comma-separated files"""
+        path = self._write('name,city\nJosé,Zürich\nAnn,Oslo\n'.encode('utf-8'))
+        self.assertEqual(sniff_csv(path), ('utf-8', ','))
+    
+    def test_ascii_head_reads_as_utf8(self):
+        """An ASCII-only head is reported as UTF-8, not ASCII"""
+        path = self._write(b'a;b\n1;2\n3;4\n')
+        encoding, sep = sniff_csv(path)
+        self.assertEqual(encoding, 'utf-8')
+        self.assertEqual(sep, ';')
+    
+    def test_tab_and_pipe_delimiters(self):
+        """Tabs and pipes are detected as delimiters"""
+        self.assertEqual(sniff_csv(self._write(b'a\tb\n1\t2\n3\t4\n'))[1], '\t')
+        self.assertEqual(sniff_csv(self._write(b'a|b\n1|2\n3|4\n'))[1], '|')
+    
+    def test_legacy_encoding(self):
+        """Bytes that are not UTF-8 fall back to a single-byte encoding"""
+        path = self._write('name,city\nJosé,Zürich\n'.encode('cp1252'))
+        encoding, sep = sniff_csv(path)
+        self.assertNotEqual(encoding, 'utf-8')
+        self.assertEqual(sep, ',')
+    
+    def test_multibyte_character_cut_at_sniff_limit(self):
+        """A UTF-8 character split by the 64 KB cut does not demote the encoding"""
+        row = 'x,y\n'.encode('utf-8')
+        filler = row * ((CSV_SNIFF_BYTES - 1) // len(row))
+        padding = b'a' * (CSV_SNIFF_BYTES - 1 - len(filler))
+        path = self._write(filler + padding + 'é,1\n'.encode('utf-8'))
+        self.assertEqual(sniff_csv(path), ('utf-8', ','))
+
+if __name__ == '__main__':
+    unittest.main()
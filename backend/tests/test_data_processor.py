@@ -0,0 +1,72 @@
+"""
+Unit tests for DataProcessor's frame helpers
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add backend directory to path so we can import query_generation
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from query_generation.data_processor import DataProcessor
+
+class TestJsonRecords(unittest.TestCase):
+    """Test cases for DataProcessor._json_records"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.processor = DataProcessor()
+    
+    def test_native_python_values(self):
+        """numpy scalars become Python ints and floats"""
+        df = pd.DataFrame({'region': ['N', 'S'], 'units': np.array([1, 2], dtype='int16'), 'price': [1.5, 2.0]})
+        records = self.processor._json_records(df)
+        
+        self.assertEqual(records, [
+            {'region': 'N', 'units': 1, 'price': 1.5},
+            {'region': 'S', 'units': 2, 'price': 2.0}
+        ])
+        self.assertIs(type(records[0]['units']), int)
+        self.assertIs(type(records[0]['price']), float)
+    
+    def test_missing_values_become_none(self):
+        """NaN, NaT and None are all None"""
+        df = pd.DataFrame({
+            'price': [1.0, np.nan],
+            'day': pd.to_datetime(['2024-01-01', None]),
+            'name': ['a', None]
+        })
+        records = self.processor._json_records(df)
+        
+        self.assertEqual(records[1], {'price': None, 'day': None, 'name': None})
+        self.assertEqual(records[0]['price'], 1.0)
+
+class TestDowncastIntegers(unittest.TestCase):
+    """Test cases for DataProcessor._downcast_integers"""
+    
+    def setUp(self):
+        """Set up test fixtures"""
+        self.processor = DataProcessor()
+    
+    def test_smallest_integer_dtype(self):
+        """Integer columns shrink to the smallest dtype holding their values"""
+        df = pd.DataFrame({'small': [1, 2, 3], 'large': [0, 70000, -5], 'price': [1.5, 2.5, 3.5], 'name': ['a', 'b', 'c']})
+        result = self.processor._downcast_integers(df)
+        
+        self.assertEqual(result['small'].dtype, np.int8)
+        self.assertEqual(result['large'].dtype, np.int32)
+        self.assertEqual(result['price'].dtype, np.float64)
+        self.assertEqual(result['name'].dtype, object)
+        pd.testing.assert_frame_equal(result, df, check_dtype=False)
+    
+    def test_no_integer_columns(self):
+        """Frames without integer columns are returned unchanged"""
+        df = pd.DataFrame({'price': [1.5], 'name': ['a']})
+        self.assertIs(self.processor._downcast_integers(df), df)
+
+if __name__ == '__main__':
+    unittest.main()
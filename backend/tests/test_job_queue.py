@@ -0,0 +1,51 @@
+"""
+Unit tests for JobQueue's Redis hash encoding
+"""
+
+import unittest
+import sys
+from enum import Enum
+from pathlib import Path
+
+# Add backend directory to path so we can import workers
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from workers.job_queue import JobQueue
+
+class _Status(Enum):
+    RUNNING = "running"
+
+class TestJobEncoding(unittest.TestCase):
+    """Test cases for JobQueue._encode/_decode"""
+    
+    def setUp(self):
+        """Set up test fixtures (redis clients connect lazily, so no server is needed)"""
+        self.queue = JobQueue("redis://localhost:6379/0")
+    
+    def test_encode_stringifies_values(self):
+        """Numbers become strings, enums their value and None an empty string"""
+        encoded = self.queue._encode({
+            "status": _Status.RUNNING, "progress": 40, "claimed_at": 12.5, "error": None
+        })
+        self.assertEqual(encoded, {"status": "running", "progress": "40", "claimed_at": "12.5", "error": ""})
+    
+    def test_decode_restores_types(self):
+        """Numeric fields come back as numbers and empty strings as None"""
+        decoded = self.queue._decode({
+            "status": "running", "progress": "40", "container_id": "3",
+            "claimed_at": "12.5", "error": "", "prompt": "sales by region"
+        })
+        self.assertEqual(decoded, {
+            "status": "running", "progress": 40, "container_id": 3,
+            "claimed_at": 12.5, "error": None, "prompt": "sales by region"
+        })
+        self.assertIsInstance(decoded["progress"], int)
+        self.assertIsInstance(decoded["claimed_at"], float)
+    
+    def test_round_trip(self):
+        """Decoding an encoded job gives back the original fields"""
+        fields = {"status": "queued", "progress": 0, "claimed_at": 1700000000.25, "result": None}
+        self.assertEqual(self.queue._decode(self.queue._encode(fields)), fields)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Unit tests for parsing prompt enhancement completions
+"""
+
+import unittest
+import sys
+from pathlib import Path
+
+# Add backend directory to path so we can import prompt_enhancement
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+try:
+    from prompt_enhancement.prompt_enhancer import _split_response
+    HAS_PROMPT_ENHANCER = True
+except ImportError:
+    # The enhancer imports the knowledge base, which needs chromadb
+    HAS_PROMPT_ENHANCER = False
+
+@unittest.skipUnless(HAS_PROMPT_ENHANCER, "prompt_enhancement dependencies (chromadb) not installed")
+class TestSplitResponse(unittest.TestCase):
+    """Test cases for _split_response"""
+    
+    def test_enhanced_and_metadata(self):
+        """Markers are stripped and the metadata parsed"""
+        text = '<META>{"confidence_score": 0.9}</META>\n<ENHANCED>Bar chart of sales</ENHANCED>'
+        self.assertEqual(_split_response(text), ("Bar chart of sales", {"confidence_score": 0.9}))
+    
+    def test_metadata_after_prompt(self):
+        """Metadata may follow the enhanced prompt"""
+        text = '<ENHANCED>Line chart</ENHANCED>\n<META>{"complexity_level": "simple"}</META>'
+        self.assertEqual(_split_response(text), ("Line chart", {"complexity_level": "simple"}))
+    
+    def test_no_markers(self):
+        """A completion without markers is all enhanced prompt"""
+        self.assertEqual(_split_response("  Pie chart of share  "), ("Pie chart of share", None))
+    
+    def test_malformed_metadata(self):
+        """Invalid or non-object metadata is dropped, the prompt kept"""
+        self.assertEqual(_split_response('<META>{not json</META>Prompt'), ("Prompt", None))
+        self.assertEqual(_split_response('<META>[1, 2]</META>Prompt'), ("Prompt", None))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,10 @@
+from .csv_sniff import sniff_csv
+from .groq_client import get_groq_client, close_groq_client, run_with_groq_client
+from .groq_retry import groq_retry, is_skippable_llm_error
+from .llm_cache import LLMCache, get_llm_cache, schema_fingerprint, prompt_cache_key, cached_llm_section
+from .logging_config import configure_logging
+from .settings import Settings, get_settings
+from .prompt_samples import compact_sample_rows, summarize_names, compact_values
+
+__all__ = ['sniff_csv', 'get_groq_client', 'close_groq_client', 'run_with_groq_client', 'groq_retry', 'is_skippable_llm_error', 'configure_logging', 'LLMCache', 'get_llm_cache', 'schema_fingerprint', 'prompt_cache_key', 'cached_llm_section',
+           'compact_sample_rows', 'summarize_names', 'compact_values', 'Settings', 'get_settings']
@@ -0,0 +1,67 @@
+"""
+CSV encoding and delimiter detection
+
+Shared by the database loader and the file parser so a CSV is parsed once
+with known options instead of retried across encoding/separator guesses.
+"""
+
+import codecs
+import csv
+from typing import Tuple
+
+try:
+    import charset_normalizer
+    HAS_CHARSET_NORMALIZER = True
+except ImportError:
+    HAS_CHARSET_NORMALIZER = False
+
+# Bytes read from the head of a CSV to detect its encoding and delimiter
+CSV_SNIFF_BYTES = 65536
+
+def _decode_head(head: bytes, encoding: str) -> str:
+    """Decode the start of a file; a multi-byte character cut off at the end is not an error"""
+    return codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+
+def sniff_csv(file_path: str) -> Tuple[str, str]:
+    """
+    Detect a CSV file's encoding and delimiter from its first 64 KB
+
+    Args:
+        file_path: Path to the CSV file
+
+    Returns:
+        (encoding, delimiter) to pass to pd.read_csv or pyarrow's CSV reader
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(CSV_SNIFF_BYTES)
+
+    encoding = None
+    if HAS_CHARSET_NORMALIZER:
+        match = charset_normalizer.from_bytes(head).best()
+        encoding = match.encoding if match else None
+
+    # An ASCII-only head says nothing about the rest of the file; UTF-8 reads
+    # the same bytes and also any non-ASCII text further down
+    if encoding is not None and codecs.lookup(encoding).name == 'ascii':
+        encoding = 'utf-8'
+
+    if encoding is None:
+        # Same candidates the loader always supported; latin-1 decodes anything
+        for candidate in ['utf-8', 'cp1252', 'latin-1']:
+            try:
+                _decode_head(head, candidate)
+                encoding = candidate
+                break
+            except UnicodeDecodeError:
+                continue
+
+    # The 64 KB cut may split the last line
+    sample = _decode_head(head, encoding)
+    sample = sample[:sample.rfind('\n') + 1] or sample
+
+    try:
+        sep = csv.Sniffer().sniff(sample, delimiters=',;\t|').delimiter
+    except csv.Error:
+        sep = ','
+
+    return encoding, sep
@@ -0,0 +1,64 @@
+"""
+Shared async Groq client
+
+Every async LLM caller (component generation, file context extraction) goes
+through one client per event loop, backed by a single keep-alive httpx pool
+(HTTP/2 when h2 is installed). Concurrent requests issued with asyncio.gather
+are multiplexed over the same connection, so TLS handshakes are paid once per
+loop rather than once per request or per caller.
+"""
+
+import asyncio
+import groq
+import httpx
+import os
+import weakref
+from typing import Awaitable, TypeVar
+from .settings import get_settings
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+T = TypeVar('T')
+
+# Read timeout for Groq requests (streamed replies reset it on every chunk)
+GROQ_TIMEOUT = float(os.getenv('GROQ_TIMEOUT', '30'))
+
+# Async clients hold loop-bound connection pools, so they are shared per event loop
+_groq_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, groq.AsyncGroq]" = weakref.WeakKeyDictionary()
+
+def get_groq_client() -> groq.AsyncGroq:
+    """Shared async Groq client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    if loop not in _groq_clients:
+        http_client = httpx.AsyncClient(
+            http2=HAS_HTTP2,
+            timeout=httpx.Timeout(GROQ_TIMEOUT, connect=5.0),
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+        )
+        _groq_clients[loop] = groq.AsyncGroq(api_key=get_settings().groq_api_key, http_client=http_client)
+    return _groq_clients[loop]
+
+async def close_groq_client():
+    """Close the running loop's client (for loops about to end, e.g. asyncio.run)"""
+    client = _groq_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+def run_with_groq_client(awaitable: Awaitable[T]) -> T:
+    """
+    asyncio.run for synchronous callers of async LLM code
+
+    The loop's shared client is closed before asyncio.run discards the loop,
+    so its connection pool is released instead of leaking on every call.
+    """
+    async def run() -> T:
+        try:
+            return await awaitable
+        finally:
+            await close_groq_client()
+
+    return asyncio.run(run())
@@ -0,0 +1,41 @@
+"""
+Retry policy for Groq requests
+
+Rate limits and dropped connections are transient and retried with backoff
+(honouring Groq's retry-after header); everything else surfaces immediately.
+Works on both sync and async functions.
+"""
+
+import groq
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential
+
+# Errors worth retrying (APITimeoutError is an APIConnectionError)
+RETRYABLE_ERRORS = (groq.RateLimitError, groq.APIConnectionError)
+
+_backoff = wait_exponential(multiplier=0.2, max=5)
+
+def wait_for_retry(retry_state) -> float:
+    """Wait as long as Groq's retry-after header asks, else back off exponentially"""
+    response = getattr(retry_state.outcome.exception(), 'response', None)
+    retry_after = response.headers.get('retry-after') if response is not None else None
+
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return _backoff(retry_state)
+
+groq_retry = retry(
+    stop=stop_after_attempt(5),
+    wait=wait_for_retry,
+    retry=retry_if_exception_type(RETRYABLE_ERRORS),
+    reraise=True
+)
+
+def is_skippable_llm_error(error: BaseException) -> bool:
+    """
+    Whether a failed LLM request for one item can be skipped rather than failing the job
+
+    The request itself was rejected (bad input, oversized prompt) or the model
+    answered with unparseable JSON; retrying won't help and other items are fine.
+    """
+    return isinstance(error, (groq.BadRequestError, ValueError))
@@ -0,0 +1,204 @@
+"""
+Persistent cache of LLM-generated schema descriptions and completions
+
+Descriptions depend only on a table's name, columns, size and first sample
+rows, so they are stored in SQLite keyed by a hash of those fields (plus the
+generating method). Unchanged tables skip their Groq requests entirely, across
+processes and restarts. Completions of fully formatted prompts (e.g. prompt
+enhancement) are keyed by a hash of the prompt, model and sampling options.
+
+Entries expire after LLM_CACHE_TTL seconds (checked on read) and the table is
+pruned to the newest LLM_CACHE_MAX_ROWS entries as values are added.
+"""
+
+import asyncio
+from collections import OrderedDict
+from functools import wraps
+import hashlib
+import orjson
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+LLM_CACHE_PATH = os.getenv('LLM_CACHE_PATH', 'data/llm_cache.db')
+
+# Recently used values also kept in process memory
+LLM_MEMORY_CACHE_SIZE = 1024
+
+# Entry lifetime in seconds (0 keeps entries forever) and on-disk row cap
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ROWS = int(os.getenv('LLM_CACHE_MAX_ROWS', '20000'))
+
+# Expired and surplus rows are deleted once every this many puts
+LLM_CACHE_PRUNE_EVERY = 256
+
+_ORJSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+class LLMCache:
+    """Key/value store for generated text in a small SQLite database"""
+
+    def __init__(self, db_path: str = LLM_CACHE_PATH, memory_size: int = LLM_MEMORY_CACHE_SIZE,
+                 ttl: int = LLM_CACHE_TTL, max_rows: int = LLM_CACHE_MAX_ROWS):
+        self.memory_size = memory_size
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._memory: "OrderedDict[str, Tuple[str, int]]" = OrderedDict()
+        self._puts = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT, ts INTEGER)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_ts ON llm_cache(ts)")
+            self._prune()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None (also when the entry has expired)"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            else:
+                entry = self._conn.execute("SELECT value, ts FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if entry is None:
+                    return None
+                self._remember(key, *entry)
+
+            encoded, ts = entry
+            if self._expired(ts):
+                del self._memory[key]
+                with self._conn:
+                    self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+        # Decoded per call so callers never share (and mutate) one cached object
+        return orjson.loads(encoded)
+
+    def put(self, key: str, value: Any):
+        """Store a JSON-serializable value under key"""
+        encoded = orjson.dumps(value, default=str, option=_ORJSON_OPTS).decode()
+        ts = int(time.time())
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, ts) VALUES (?, ?, ?)",
+                (key, encoded, ts)
+            )
+            self._remember(key, encoded, ts)
+
+            self._puts += 1
+            if self._puts % LLM_CACHE_PRUNE_EVERY == 0:
+                self._prune()
+
+    def _expired(self, ts: Optional[int]) -> bool:
+        """Whether an entry written at ts is past the TTL"""
+        return self.ttl > 0 and (ts or 0) < time.time() - self.ttl
+
+    def _prune(self):
+        """Delete expired rows and all but the newest max_rows (caller holds the lock)"""
+        if self.ttl > 0:
+            self._conn.execute("DELETE FROM llm_cache WHERE ts < ?", (int(time.time()) - self.ttl,))
+        if self.max_rows > 0:
+            self._conn.execute(
+                "DELETE FROM llm_cache WHERE key NOT IN "
+                "(SELECT key FROM llm_cache ORDER BY ts DESC LIMIT ?)",
+                (self.max_rows,)
+            )
+
+    def _remember(self, key: str, encoded: str, ts: int):
+        """Keep an encoded value in the in-memory LRU (caller holds the lock)"""
+        self._memory[key] = (encoded, ts)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+_cache: Optional[LLMCache] = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache() -> LLMCache:
+    """Process-wide cache (opened on first use)"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache()
+    return _cache
+
+def schema_fingerprint(section: str, schema: Dict[str, Any]) -> str:
+    """
+    Cache key for a generated section of a table's context
+
+    Args:
+        section: Name of the generating method
+        schema: Table schema (SchemaAnalyzer) or file metadata (ContextExtractor)
+
+    Returns:
+        Hex digest of the section, table name, columns, row count and first sample rows
+    """
+    payload = orjson.dumps({
+        'section': section,
+        'name': schema.get('table_name') or schema.get('file_name'),
+        'columns': schema.get('columns'),
+        'row_count': schema.get('row_count'),
+        'sample_data': (schema.get('sample_data') or [])[:2]
+    }, default=str, option=_ORJSON_OPTS | orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=20).hexdigest()
+
+def prompt_cache_key(model: str, prompt: str, **options: Any) -> str:
+    """
+    Cache key for the completion of a fully formatted prompt
+
+    Args:
+        model: Model name
+        prompt: Prompt text (templates are part of it, so editing one changes the key)
+        **options: Sampling options such as temperature and max_tokens
+
+    Returns:
+        SHA-256 hex digest of the model, options and prompt
+    """
+    payload = orjson.dumps({'model': model, 'options': options, 'prompt': prompt}, option=orjson.OPT_SORT_KEYS)
+    return hashlib.sha256(payload).hexdigest()
+
+def cached_llm_section(method):
+    """
+    Cache a `method(self, schema)` LLM section generator in the LLM cache
+
+    Works for both sync and async methods. Empty results are not stored so
+    failed generations are retried on the next call.
+    """
+    section = method.__qualname__
+
+    if asyncio.iscoroutinefunction(method):
+        @wraps(method)
+        async def async_wrapper(self, schema: Dict[str, Any]):
+            key = schema_fingerprint(section, schema)
+            cached = get_llm_cache().get(key)
+            if cached is not None:
+                return cached
+
+            value = await method(self, schema)
+            if value:
+                get_llm_cache().put(key, value)
+            return value
+
+        return async_wrapper
+
+    @wraps(method)
+    def wrapper(self, schema: Dict[str, Any]):
+        key = schema_fingerprint(section, schema)
+        cached = get_llm_cache().get(key)
+        if cached is not None:
+            return cached
+
+        value = method(self, schema)
+        if value:
+            get_llm_cache().put(key, value)
+        return value
+
+    return wrapper
@@ -0,0 +1,35 @@
+"""
+Process-wide logging setup
+
+Called once from each entry point (API app, worker, CLI). Logs go to stderr
+and, unless LOG_FILE is set to an empty string, to a file.
+"""
+
+import logging
+import os
+
+LOG_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+
+_configured = False
+
+def configure_logging():
+    """Configure the root logger (idempotent)"""
+    global _configured
+    if _configured:
+        return
+
+    handlers = [logging.StreamHandler()]
+
+    log_file = os.getenv('LOG_FILE', 'logs/backend.log')
+    if log_file:
+        log_dir = os.path.dirname(log_file)
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+        handlers.append(logging.FileHandler(log_file))
+
+    logging.basicConfig(
+        format=LOG_FORMAT,
+        level=os.getenv('LOG_LEVEL', 'INFO').upper(),
+        handlers=handlers
+    )
+    _configured = True
@@ -0,0 +1,61 @@
+"""
+Compact renderings of table samples for LLM prompts
+
+Prompt length drives prefill latency and cost, and wide files can overflow
+the context window, so prompts get trimmed sample rows, capped column lists
+and short sample values instead of the raw metadata.
+"""
+
+from typing import Any, Dict, List, Sequence
+
+def _is_missing(value: Any) -> bool:
+    """None or a float NaN"""
+    return value is None or (isinstance(value, float) and value != value)
+
+def compact_sample_rows(rows: Sequence[Dict[str, Any]], max_rows: int = 2,
+                        max_field_chars: int = 40, max_chars: int = 800) -> List[Dict[str, Any]]:
+    """
+    Trim sample rows for a prompt
+
+    Args:
+        rows: Sample rows as records
+        max_rows: Rows to keep
+        max_field_chars: Longer strings are cut to this length
+        max_chars: Rough budget for all kept fields; later fields are dropped
+
+    Returns:
+        Rows without null fields, with long strings truncated
+    """
+    budget = max_chars
+    compact = []
+
+    for row in rows[:max_rows]:
+        kept = {}
+        for key, value in row.items():
+            if _is_missing(value):
+                continue
+            if isinstance(value, str) and len(value) > max_field_chars:
+                value = value[:max_field_chars] + '...'
+
+            cost = len(str(key)) + len(str(value)) + 6
+            if cost > budget:
+                break
+            budget -= cost
+            kept[key] = value
+
+        compact.append(kept)
+        if budget <= 0:
+            break
+
+    return compact
+
+def summarize_names(names: Sequence[str], limit: int = 60) -> str:
+    """Comma-separated names, capped at limit with a count of the rest"""
+    shown = ', '.join(str(name) for name in names[:limit])
+    if len(names) > limit:
+        shown += f", ...and {len(names) - limit} more"
+    return shown
+
+def compact_values(values: Sequence[Any], limit: int = 3, max_chars: int = 25) -> str:
+    """First few values, each repr'd and cut to max_chars"""
+    return '[' + ', '.join(repr(value)[:max_chars] for value in values[:limit]) + ']'
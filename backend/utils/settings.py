@@ -0,0 +1,25 @@
+"""
+Process-wide settings
+
+The environment (and .env, if present) is read once, on the first
+get_settings() call, instead of on every client or component construction.
+"""
+
+from dataclasses import dataclass
+from functools import lru_cache
+import os
+from typing import Optional
+from dotenv import load_dotenv
+
+@dataclass(frozen=True)
+class Settings:
+    """Settings read from the environment"""
+    groq_api_key: Optional[str]
+
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """Settings for this process, loaded on first use"""
+    load_dotenv()
+    return Settings(
+        groq_api_key=os.getenv('GROQ_API_KEY')
+    )
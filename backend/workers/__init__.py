@@ -0,0 +1,3 @@
+from .job_queue import JobQueue
+
+__all__ = ['JobQueue']
\ No newline at end of file
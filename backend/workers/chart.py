@@ -0,0 +1,219 @@
+"""
+Chart generation worker
+
+Consumes jobs from the Redis queue and runs the chart generation pipeline.
+Run from the backend directory:
+- python -m workers.chart
+"""
+
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import logging
+import os
+from typing import Optional
+from redis.exceptions import RedisError
+
+from api.models import JobStatus
+from prompt_enhancement import PromptEnhancer
+from query_generation import QueryExecutor, DataProcessor
+from chart_generation import ComponentGenerator
+from utils import configure_logging
+from .job_queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+# How often the worker scans the processing list for abandoned jobs
+RECLAIM_INTERVAL = 60
+
+# Jobs run in separate processes so CPU-bound steps use every core
+MAX_PARALLEL_JOBS = os.cpu_count() or 1
+process_pool = ProcessPoolExecutor(max_workers=MAX_PARALLEL_JOBS)
+
+async def process_chart_generation(queue: JobQueue, job_id: str, user_prompt: str):
+    """
+    Run the chart generation pipeline for a single job
+
+    Args:
+        queue: Job queue used to report progress and results
+        job_id: Unique job identifier
+        user_prompt: User's prompt for chart generation
+    """
+    try:
+        # Update job status to processing
+        await queue.update_job(job_id, status=JobStatus.PROCESSING, progress=10)
+
+        # Step 1: Enhance prompt
+        enhancer = PromptEnhancer()
+        enhancement_result = await enhancer.enhance_prompt(user_prompt)
+        await queue.update_job(job_id, progress=25)
+
+        if not enhancement_result.has_context and enhancement_result.sql_context.strip() == "No database tables available.":
+            raise Exception("No database tables available. Please process data files first.")
+
+        # Step 2: Generate and execute SQL
+        executor = QueryExecutor()
+        sql_result, execution_results = await asyncio.to_thread(
+            executor.execute_sql_generation,
+            enhancement_result.enhanced_prompt,
+            enhancement_result.sql_context
+        )
+        await queue.update_job(job_id, progress=50)
+
+        if not sql_result.success:
+            raise Exception(f"SQL generation failed: {sql_result.error_message}")
+
+        # Step 3: Process data
+        processor = DataProcessor()
+        processed_data = await asyncio.to_thread(processor.process_query_results, sql_result, execution_results)
+        await queue.update_job(job_id, progress=75)
+
+        if not processed_data.success:
+            raise Exception(f"Data processing failed: {processed_data.error_message}")
+
+        # Step 4: Generate React component
+        component_generator = ComponentGenerator()
+        component_result = await component_generator.generate_component(processed_data, user_prompt)
+
+        if not component_result.success:
+            # Try fallback component
+            component_result = component_generator.generate_fallback_component(
+                processed_data,
+                component_result.error_message or "Component generation failed"
+            )
+
+        # Update job with result
+        await queue.finish_job(
+            job_id,
+            status=JobStatus.COMPLETED,
+            progress=100,
+            result=component_result.component_code,
+            component_name=component_result.component_name,
+            chart_type=component_result.chart_type,
+            completed_at=datetime.now().isoformat()
+        )
+
+    except Exception as e:
+        # Update job with error
+        error_message = str(e)
+
+        # Log full error for debugging
+        logger.exception("Chart generation error for job %s: %s", job_id, error_message)
+
+        await queue.finish_job(
+            job_id,
+            status=JobStatus.FAILED,
+            error_message=error_message,
+            completed_at=datetime.now().isoformat()
+        )
+
+# Per-process event loop and queue, kept alive across jobs so shared async
+# clients (Groq, Redis) keep their connection pools bound to a live loop
+_process_loop: Optional[asyncio.AbstractEventLoop] = None
+_process_queue: Optional[JobQueue] = None
+
+def _run_job(job_id: str, user_prompt: str):
+    """Process pool entry point: run one job on this process's event loop"""
+    global _process_loop, _process_queue
+
+    if _process_loop is None:
+        _process_loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_process_loop)
+        _process_queue = JobQueue()
+
+    _process_loop.run_until_complete(process_chart_generation(_process_queue, job_id, user_prompt))
+
+async def _heartbeat_until_done(queue: JobQueue, job_id: str, future: asyncio.Future):
+    """Wait for a job's future, re-stamping its claim while it runs"""
+    interval = queue.visibility_timeout / 3
+    while not (await asyncio.wait({future}, timeout=interval))[0]:
+        try:
+            await queue.heartbeat(job_id)
+        except RedisError as e:
+            logger.warning("Heartbeat for job %s failed: %s", job_id, e)
+    future.result()
+
+async def _dispatch(queue: JobQueue, slots: asyncio.Semaphore, job_id: str, user_prompt: str):
+    """
+    Run a claimed job in the process pool and acknowledge it when done
+
+    Pipeline errors are recorded by the job itself; this handles the job
+    never completing in the pool (a crashed child process, or a Redis error
+    while it reported its result) by marking it failed.
+    """
+    global process_pool
+
+    pool = process_pool
+    try:
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(pool, _run_job, job_id, user_prompt)
+            await _heartbeat_until_done(queue, job_id, future)
+        except Exception as e:
+            logger.exception("Chart job %s did not finish in the process pool", job_id)
+
+            # A dead child breaks the whole pool; replace it once for later jobs
+            if isinstance(e, BrokenProcessPool) and process_pool is pool:
+                process_pool = ProcessPoolExecutor(max_workers=MAX_PARALLEL_JOBS)
+
+            await queue.finish_job(
+                job_id,
+                status=JobStatus.FAILED,
+                error_message=f"Worker error: {e}",
+                completed_at=datetime.now().isoformat()
+            )
+        await queue.ack(job_id)
+    except RedisError:
+        # Left in the processing list, so reclaim_stale retries it later
+        logger.exception("Could not record the outcome of job %s; leaving it for reclaim", job_id)
+    finally:
+        slots.release()
+
+async def reclaim_loop(queue: JobQueue):
+    """Periodically re-enqueue jobs abandoned by crashed workers"""
+    while True:
+        # A transient Redis error must not end reclaiming for the worker's lifetime
+        try:
+            reclaimed = await queue.reclaim_stale()
+            if reclaimed:
+                logger.info("Re-enqueued %d stale job(s)", reclaimed)
+        except RedisError:
+            logger.exception("Reclaiming stale jobs failed; retrying in %ss", RECLAIM_INTERVAL)
+        await asyncio.sleep(RECLAIM_INTERVAL)
+
+async def run_worker():
+    """Claim and process chart generation jobs forever"""
+    queue = JobQueue()
+    reclaimer = asyncio.create_task(reclaim_loop(queue))
+    slots = asyncio.Semaphore(MAX_PARALLEL_JOBS)
+    running = set()
+
+    logger.info("Chart worker started (%d processes), waiting for jobs...", MAX_PARALLEL_JOBS)
+
+    try:
+        while True:
+            # Only claim a job when a process is free to run it
+            await slots.acquire()
+
+            job_id = await queue.claim(timeout=5)
+            job = await queue.get_job(job_id) if job_id else None
+
+            # A job deleted while queued has no hash (or, from older
+            # workers, a bare one without a prompt)
+            if job is None or job.get("prompt") is None:
+                if job_id:
+                    await queue.ack(job_id)
+                slots.release()
+                continue
+
+            task = asyncio.create_task(_dispatch(queue, slots, job_id, job["prompt"]))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        reclaimer.cancel()
+        process_pool.shutdown(wait=True)
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(run_worker())
@@ -0,0 +1,234 @@
+import orjson
+import redis.asyncio as redis
+import time
+from typing import Dict, Any, AsyncIterator, List, Optional
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+QUEUE_KEY = "queue:chart"
+PROCESSING_KEY = "queue:chart:processing"
+JOB_KEY_PREFIX = "jobs:"
+JOB_CHANNEL_PREFIX = "job:"
+
+# Finished jobs are kept this long for clients to fetch, then evicted by Redis
+FINISHED_JOB_TTL = int(os.getenv('JOB_TTL_SECONDS', '3600'))
+
+# A claimed job not heartbeated for this long is assumed abandoned and re-enqueued
+VISIBILITY_TIMEOUT = int(os.getenv('JOB_VISIBILITY_TIMEOUT', '300'))
+
+# How often a quiet watch_job re-checks that its job still exists
+WATCH_CHECK_INTERVAL = 15.0
+
+# Fields stored as numbers in the job hash (Redis hashes only hold strings)
+_INT_FIELDS = {"progress", "container_id"}
+_FLOAT_FIELDS = {"claimed_at"}
+
+# Stamp a claim time only on a job hash that still exists: a plain HSET would
+# recreate a deleted job as a bare, TTL-less hash holding just claimed_at
+_STAMP_CLAIM_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'claimed_at', ARGV[1])
+redis.call('PUBLISH', ARGV[2], ARGV[3])
+return 1
+"""
+
+class JobQueue:
+    """Redis-backed job queue shared by API processes and chart workers"""
+
+    def __init__(self, redis_url: Optional[str] = None, visibility_timeout: Optional[int] = None):
+        self.redis_url = redis_url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+        self.visibility_timeout = visibility_timeout or VISIBILITY_TIMEOUT
+        self.redis = redis.from_url(self.redis_url, decode_responses=True)
+        self._stamp_claim_script = self.redis.register_script(_STAMP_CLAIM_SCRIPT)
+
+    async def enqueue(self, job_id: str, payload: Dict[str, Any]) -> None:
+        """
+        Store job state and push the job onto the work queue
+
+        Args:
+            job_id: Unique job identifier
+            payload: Initial job fields (status, prompt, timestamps...)
+        """
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job_key(job_id), mapping=self._encode(payload))
+            pipe.lpush(QUEUE_KEY, job_id)
+            await pipe.execute()
+
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get job state, or None if the job does not exist"""
+        job = await self.redis.hgetall(self._job_key(job_id))
+        return self._decode(job) if job else None
+
+    async def update_job(self, job_id: str, **fields: Any) -> None:
+        """Update fields of an existing job and publish the change to watchers"""
+        await self._update(job_id, fields)
+
+    async def finish_job(self, job_id: str, **fields: Any) -> None:
+        """Record a job's final state and let it expire after FINISHED_JOB_TTL"""
+        await self._update(job_id, fields, ttl=FINISHED_JOB_TTL)
+
+    async def _update(self, job_id: str, fields: Dict[str, Any], ttl: Optional[int] = None) -> None:
+        encoded = self._encode(fields)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(self._job_key(job_id), mapping=encoded)
+            if ttl is not None:
+                pipe.expire(self._job_key(job_id), ttl)
+            pipe.publish(self._channel(job_id), orjson.dumps(self._decode(encoded)))
+            await pipe.execute()
+
+    async def watch_job(self, job_id: str, stale_after: Optional[float] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Yield the current job state, then every published update to it
+
+        Subscribes before reading the snapshot so no update is missed.
+        The caller decides when to stop iterating; the watch also ends once
+        the job is deleted or expires, or when its claim has not been
+        heartbeated for stale_after seconds (its worker died).
+
+        Args:
+            job_id: Unique job identifier
+            stale_after: Claim age at which to give up (None waits forever)
+        """
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self._channel(job_id))
+        try:
+            job = await self.get_job(job_id)
+            if job is None:
+                return
+            yield job
+
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=WATCH_CHECK_INTERVAL)
+                if message is not None:
+                    if message["type"] == "message":
+                        yield orjson.loads(message["data"])
+                    continue
+
+                # Quiet: make sure there is still something to wait for
+                job = await self.get_job(job_id)
+                if job is None:
+                    return
+                claimed_at = job.get("claimed_at")
+                if stale_after is not None and claimed_at is not None and time.time() - claimed_at >= stale_after:
+                    return
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.aclose()
+
+    async def delete_job(self, job_id: str) -> bool:
+        """Delete job state"""
+        return await self.redis.delete(self._job_key(job_id)) > 0
+
+    async def list_jobs(self) -> List[Dict[str, Any]]:
+        """List all known jobs (for debugging/monitoring)"""
+        jobs = []
+        async for key in self.redis.scan_iter(match=f"{JOB_KEY_PREFIX}*"):
+            job = await self.redis.hgetall(key)
+            if job:
+                jobs.append(self._decode(job))
+        return jobs
+
+    async def claim(self, timeout: int = 5) -> Optional[str]:
+        """
+        Claim the next job for processing (at-least-once delivery)
+
+        The job ID is atomically moved to the processing list and stays there
+        until ack() is called, so a crashed worker's jobs can be reclaimed.
+
+        Args:
+            timeout: Seconds to block waiting for a job
+
+        Returns:
+            Claimed job ID or None if the queue stayed empty
+        """
+        job_id = await self.redis.brpoplpush(QUEUE_KEY, PROCESSING_KEY, timeout)
+        if job_id:
+            await self._stamp_claim(job_id, time.time())
+        return job_id
+
+    async def _stamp_claim(self, job_id: str, claimed_at: float) -> bool:
+        """Set claimed_at (and notify watchers) if the job still exists"""
+        encoded = self._encode({"claimed_at": claimed_at})
+        stamped = await self._stamp_claim_script(
+            keys=[self._job_key(job_id)],
+            args=[encoded["claimed_at"], self._channel(job_id), orjson.dumps(self._decode(encoded))]
+        )
+        return bool(stamped)
+
+    async def heartbeat(self, job_id: str) -> bool:
+        """
+        Extend the claim on a job that is still running
+
+        Workers call this well within the visibility timeout so long jobs
+        (rate limit backoff, several LLM calls) are not reclaimed and run twice.
+
+        Returns:
+            False if the job no longer exists
+        """
+        return await self._stamp_claim(job_id, time.time())
+
+    async def ack(self, job_id: str) -> None:
+        """Remove a finished job from the processing list"""
+        await self.redis.lrem(PROCESSING_KEY, 1, job_id)
+
+    async def reclaim_stale(self) -> int:
+        """
+        Re-enqueue jobs that have been processing longer than the visibility timeout
+
+        Returns:
+            Number of reclaimed jobs
+        """
+        reclaimed = 0
+        now = time.time()
+
+        for job_id in await self.redis.lrange(PROCESSING_KEY, 0, -1):
+            job = await self.get_job(job_id)
+            claimed_at = job.get("claimed_at") if job else None
+
+            if job and claimed_at is None:
+                # Claimed but not yet stamped; start the clock now
+                await self._stamp_claim(job_id, now)
+                continue
+
+            if job and now - claimed_at < self.visibility_timeout:
+                continue
+
+            # Only re-enqueue if this call actually removed the entry,
+            # so concurrent reclaimers don't duplicate the job
+            if await self.redis.lrem(PROCESSING_KEY, 1, job_id):
+                if job:
+                    await self.redis.lpush(QUEUE_KEY, job_id)
+                reclaimed += 1
+
+        return reclaimed
+
+    def _job_key(self, job_id: str) -> str:
+        return f"{JOB_KEY_PREFIX}{job_id}"
+
+    def _channel(self, job_id: str) -> str:
+        return f"{JOB_CHANNEL_PREFIX}{job_id}"
+
+    def _encode(self, fields: Dict[str, Any]) -> Dict[str, str]:
+        """Encode job fields for a Redis hash (None is stored as empty string)"""
+        return {
+            key: "" if value is None else str(value.value if hasattr(value, "value") else value)
+            for key, value in fields.items()
+        }
+
+    def _decode(self, job: Dict[str, str]) -> Dict[str, Any]:
+        """Decode a Redis hash back into job fields"""
+        decoded = {}
+        for key, value in job.items():
+            if value == "":
+                decoded[key] = None
+            elif key in _INT_FIELDS:
+                decoded[key] = int(value)
+            elif key in _FLOAT_FIELDS:
+                decoded[key] = float(value)
+            else:
+                decoded[key] = value
+        return decoded